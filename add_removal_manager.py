@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 import os
+from wb_engine.profile import invalidate_aircraft_profile
 
 # Directorio base
 script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -57,6 +58,7 @@ def manage_add_removal():
                 st.error("Todos los campos numéricos deben tener valores válidos.")
             else:
                 edited_add_removal.to_csv(add_removal_path, sep=";", decimal=",", index=False)
+                invalidate_aircraft_profile(aircraft_folder)
                 st.success(f"Adiciones y remociones guardadas para la aeronave {tail} en {add_removal_path}.")
         except Exception as e:
             st.error(f"Error al guardar los datos: {str(e)}")
\ No newline at end of file
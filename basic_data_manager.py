@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 import os
+from wb_engine.profile import invalidate_aircraft_profile
 
 # Directorio base
 script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -56,6 +57,7 @@ def manage_basic_data():
                 st.error("MAC_length no puede ser cero.")
             else:
                 edited_basic_data.to_csv(basic_data_path, sep=";", decimal=",", index=False)
+                invalidate_aircraft_profile(aircraft_folder)
                 st.success(f"Datos básicos guardados para la aeronave {tail} en {basic_data_path}.")
         except Exception as e:
             st.error(f"Error al guardar los datos: {str(e)}")
\ No newline at end of file
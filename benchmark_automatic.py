@@ -0,0 +1,219 @@
+"""
+Benchmark de las estrategias de cálculo automático sobre los manifiestos de la carpeta LCS.
+
+Compara la evaluación incremental de posiciones candidatas (CGScorer) contra la evaluación
+anterior, que copiaba el DataFrame completo y llamaba a update_position_values por cada
+candidata, y verifica que ambas produzcan exactamente las mismas asignaciones. La evaluación
+anterior es una copia textual del código original (bucle de puntuación y update_position_values
+con búsqueda por máscaras en restricciones_df y exclusiones_df), no las versiones indexadas.
+
+Uso:
+    python benchmark_automatic.py --tail N334QT --tipo-carga simétrico
+"""
+import argparse
+import contextlib
+import glob
+import io
+import os
+import time
+
+import pandas as pd
+import streamlit as st
+
+import wb_engine.strategies
+from wb_engine.positions import clasificar_base_refinada, sugerencias_batch
+from wb_engine.strategies import assign_single_position_pallets, try_all_strategies
+from cg_scoring import CGScorer
+from utils import calculate_peso_maximo_efectivo
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+STRATEGIES = ["cg", "aft_cg", "destino", "ambos"]
+
+
+def legacy_update_position_values(df, idx, new_position, restricciones_df, tipo_carga, posiciones_usadas, exclusiones_df):
+    """Copia textual de calculations.update_position_values antes del índice de restricciones y la matriz de exclusiones."""
+    row = df.loc[idx]
+    restric = restricciones_df[
+        (restricciones_df["Position"] == new_position) &
+        (restricciones_df["Pallet_Base_size_Allowed"] == row["Baseplate Code"])
+    ]
+    if restric.empty:
+        restric = restricciones_df[restricciones_df["Position"] == new_position]
+    if restric.empty:
+        st.error(f"Posición {new_position} inválida.")
+        return False
+    
+    peso_max = calculate_peso_maximo_efectivo(restric.iloc[0], tipo_carga)
+    
+    print(f"Validando {new_position} para {row['Number ULD']}, peso={row['Weight (KGS)']:.1f}, peso_max={peso_max:.1f}, base_code={row['Baseplate Code']}, tipo_carga={tipo_carga}")
+    
+    if new_position in exclusiones_df.columns:
+        excluded_positions = exclusiones_df.index[exclusiones_df[new_position] == 0].tolist()
+        if any(pos in posiciones_usadas for pos in excluded_positions):
+            st.error(f"La posición {new_position} está excluida por posiciones ya asignadas: {excluded_positions}")
+            return False
+    
+    if row["Weight (KGS)"] > peso_max:
+        st.error(f"El peso {row['Weight (KGS)']:.1f} kg excede el máximo permitido de {peso_max:.1f} kg para la posición {new_position}.")
+        return False
+        
+    x_arm = restric["Average_X-Arm_(m)"].values[0]
+    y_arm = restric["Average_Y-Arm_(m)"].values[0]
+    
+    df.at[idx, "X-arm"] = x_arm
+    df.at[idx, "Y-arm"] = y_arm
+    df.at[idx, "Momento X"] = round(x_arm * row["Weight (KGS)"], 3)
+    df.at[idx, "Momento Y"] = round(y_arm * row["Weight (KGS)"], 3)
+    df.at[idx, "Posición Asignada"] = new_position
+    df.at[idx, "Bodega"] = restric["Bodega"].values[0]
+    
+    for i in df.index:
+        if i != idx and isinstance(df.at[i, "Posiciones Sugeridas"], list):
+            df.at[i, "Posiciones Sugeridas"] = [pos for pos in df.at[i, "Posiciones Sugeridas"] if pos != new_position]
+    
+    return True
+
+
+class LegacyCGScorer(CGScorer):
+    """Evaluación anterior: el bucle de puntuación original (df.copy() + update_position_values + sumas filtradas por candidata)."""
+
+    def best_position(self, df, idx, candidates, posiciones_usadas):
+        restricciones_df, tipo_carga, exclusiones_df = self.restricciones_df, self.tipo_carga, self.exclusiones_df
+        bow, fuel_kg, taxi_fuel, bow_moment_x = self.bow, self.fuel_kg, self.taxi_fuel, self.bow_moment_x
+        moment_x_fuel_tow, lemac, mac_length, target_mac = self.moment_x_fuel_tow, self.lemac, self.mac_length, self.target_mac
+        sugeridas = candidates
+
+        # Desde aquí, copia textual del bucle de strategy_by_cg original
+        best_position = None
+        best_combined_deviation = float('inf')
+        
+        for pos in sugeridas:
+            df_temp = df.copy()
+            temp_posiciones_usadas = posiciones_usadas.copy()
+            if legacy_update_position_values(df_temp, idx, pos, restricciones_df, tipo_carga, temp_posiciones_usadas, exclusiones_df):
+                temp_posiciones_usadas.add(pos)
+                # Calcular TOW CG
+                momento_x_total = df_temp[df_temp["Posición Asignada"] != ""]["Momento X"].sum()
+                peso_total = df_temp[df_temp["Posición Asignada"] != ""]["Weight (KGS)"].sum()
+                tow = bow + peso_total + fuel_kg - taxi_fuel
+                tow_momento_x = bow_moment_x + momento_x_total + moment_x_fuel_tow
+                tow_mac = ((tow_momento_x / tow - lemac) / mac_length) * 100 if tow != 0 else 0
+                tow_mac_deviation = abs(tow_mac - target_mac)
+                # Calcular ZFW CG
+                zfw = bow + peso_total
+                zfw_momento_x = bow_moment_x + momento_x_total
+                zfw_mac = ((zfw_momento_x / zfw - lemac) / mac_length) * 100 if zfw != 0 else 0
+                zfw_mac_deviation = abs(zfw_mac - target_mac)
+                # Combinar desviaciones (ponderadas igualmente)
+                combined_deviation = tow_mac_deviation + zfw_mac_deviation
+                if combined_deviation < best_combined_deviation:
+                    best_combined_deviation = combined_deviation
+                    best_position = pos
+        return best_position
+
+
+def load_tail_data(tail):
+    aircraft_folder = os.path.join(script_dir, tail)
+    restricciones_df = pd.read_csv(os.path.join(aircraft_folder, "MD_LD_BULK_restrictions.csv"), sep=";", decimal=",")
+    restricciones_df.columns = [col.strip().replace(" ", "_") for col in restricciones_df.columns]
+    restricciones_df["Temp_Restriction_Symmetric"] = pd.to_numeric(restricciones_df["Temp_Restriction_Symmetric"], errors="coerce").fillna(0)
+    restricciones_df["Temp_Restriction_Asymmetric"] = pd.to_numeric(restricciones_df["Temp_Restriction_Asymmetric"], errors="coerce").fillna(0)
+    exclusiones_df = pd.read_csv(os.path.join(aircraft_folder, "exclusiones.csv"), sep=";", decimal=",")
+    exclusiones_df.set_index(exclusiones_df.columns[0], inplace=True)
+    cumulative_restrictions_fwd_df = pd.read_csv(os.path.join(aircraft_folder, "cummulative_restrictions_FWD.csv"), sep=";", decimal=",")
+    cumulative_restrictions_aft_df = pd.read_csv(os.path.join(aircraft_folder, "cummulative_restrictions_AFT.csv"), sep=";", decimal=",")
+    basic_data = pd.read_csv(os.path.join(aircraft_folder, "basic_data.csv"), sep=";", decimal=",")
+    fuel_table = pd.read_csv(os.path.join(aircraft_folder, "Usable_fuel_table.csv"), sep=";", decimal=",", encoding="latin-1")
+    return restricciones_df, exclusiones_df, cumulative_restrictions_fwd_df, cumulative_restrictions_aft_df, basic_data, fuel_table
+
+
+def load_manifest(path, restricciones_df, tipo_carga):
+    df = pd.read_csv(path, skiprows=8, sep=";", encoding="latin-1", header=None, decimal=",")
+    df = df.iloc[:, :6]
+    df.columns = ["Contour", "Number ULD", "ULD Final Destination", "Weight (KGS)", "Pieces", "Notes"]
+    df = df.dropna(subset=["Number ULD", "Weight (KGS)"], how="any")
+    df = df[~df["Number ULD"].astype(str).str.upper().str.contains("TOTAL|NUMBER ULD")]
+    df = df[~df["Contour"].astype(str).str.upper().str.contains("TOTAL")]
+    df["Weight (KGS)"] = pd.to_numeric(df["Weight (KGS)"], errors="coerce")
+    df = df.dropna(subset=["Weight (KGS)"])
+
+    df[["Pallet Base Size", "Baseplate Code"]] = df["Number ULD"].apply(lambda x: pd.Series(clasificar_base_refinada(x)))
+    df["Posiciones Sugeridas"] = sugerencias_batch(df, restricciones_df, tipo_carga)
+    df["Posición Asignada"] = ""
+    df["X-arm"] = None
+    df["Y-arm"] = None
+    df["Momento X"] = None
+    df["Momento Y"] = None
+    df["Bodega"] = None
+    df["Rotated"] = False
+    return df
+
+
+def run_strategy(manifest_df, optimizacion, tail_data, params, tipo_carga):
+    restricciones_df, exclusiones_df, fwd_df, aft_df = tail_data
+    df = manifest_df.copy()
+    df["Posiciones Sugeridas"] = [list(pos) for pos in manifest_df["Posiciones Sugeridas"]]
+    posiciones_usadas = set()
+    start = time.perf_counter()
+    assign_single_position_pallets(df, restricciones_df, tipo_carga, exclusiones_df, posiciones_usadas)
+    posiciones_usadas, _, unassigned = try_all_strategies(
+        df, restricciones_df, tipo_carga, exclusiones_df, posiciones_usadas, params["destino_inicial"],
+        optimizacion, params["bow"], params["bow_moment_x"], 0.0, params["fuel_kg"], params["taxi_fuel"],
+        params["moment_x_fuel_tow"], params["moment_y_fuel_tow"], params["lemac"], params["mac_length"],
+        fwd_df, aft_df
+    )
+    elapsed = time.perf_counter() - start
+    return elapsed, df["Posición Asignada"].tolist(), [uld for uld, _ in unassigned]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de las estrategias automáticas sobre los manifiestos LCS.")
+    parser.add_argument("--tail", default="N334QT", help="Matrícula cuya carpeta de datos se usa (por defecto N334QT).")
+    parser.add_argument("--tipo-carga", default="simétrico", choices=["simétrico", "asimétrico"])
+    parser.add_argument("--fuel", type=float, default=40000.0, help="Combustible total (kg).")
+    parser.add_argument("--taxi-fuel", type=float, default=500.0, help="Combustible de taxi (kg).")
+    parser.add_argument("--destino", default="MIA", help="Destino inicial para las estrategias por destino.")
+    args = parser.parse_args()
+
+    restricciones_df, exclusiones_df, fwd_df, aft_df, basic_data, fuel_table = load_tail_data(args.tail)
+    fuel_row_tow = fuel_table.iloc[(fuel_table["Fuel_kg"] - (args.fuel - args.taxi_fuel)).abs().argsort()[0]]
+    params = {
+        "destino_inicial": args.destino,
+        "bow": basic_data["OEW"].values[0],
+        "bow_moment_x": basic_data["Moment_Aircraft"].values[0],
+        "fuel_kg": args.fuel,
+        "taxi_fuel": args.taxi_fuel,
+        "moment_x_fuel_tow": fuel_row_tow["MOMENT-X"],
+        "moment_y_fuel_tow": fuel_row_tow["MOMENT-Y"],
+        "lemac": basic_data["LEMAC"].values[0],
+        "mac_length": basic_data["MAC_length"].values[0],
+    }
+    tail_data = (restricciones_df, exclusiones_df, fwd_df, aft_df)
+
+    print(f"Aeronave: {args.tail} | Tipo de carga: {args.tipo_carga}")
+    print(f"{'Manifiesto':<50} {'ULDs':>4} {'Estrategia':<8} {'Anterior (s)':>12} {'Incremental (s)':>15} {'Aceleración':>11} {'Idéntico':>8}")
+    total_legacy = 0.0
+    total_incremental = 0.0
+    all_identical = True
+    for manifest_path in sorted(glob.glob(os.path.join(script_dir, "LCS", "*.csv"))):
+        with contextlib.redirect_stdout(io.StringIO()):
+            manifest_df = load_manifest(manifest_path, restricciones_df, args.tipo_carga)
+        for optimizacion in STRATEGIES:
+            with contextlib.redirect_stdout(io.StringIO()):
+                wb_engine.strategies.CGScorer = LegacyCGScorer
+                try:
+                    legacy_time, legacy_pos, legacy_unassigned = run_strategy(manifest_df, optimizacion, tail_data, params, args.tipo_carga)
+                finally:
+                    wb_engine.strategies.CGScorer = CGScorer
+                new_time, new_pos, new_unassigned = run_strategy(manifest_df, optimizacion, tail_data, params, args.tipo_carga)
+            identical = legacy_pos == new_pos and legacy_unassigned == new_unassigned
+            all_identical = all_identical and identical
+            total_legacy += legacy_time
+            total_incremental += new_time
+            print(f"{os.path.basename(manifest_path)[:50]:<50} {len(manifest_df):>4} {optimizacion:<8} {legacy_time:>12.3f} {new_time:>15.3f} {legacy_time / new_time:>10.1f}x {'Sí' if identical else 'NO':>8}")
+
+    print(f"{'Total':<50} {'':>4} {'':<8} {total_legacy:>12.3f} {total_incremental:>15.3f} {total_legacy / total_incremental:>10.1f}x {'Sí' if all_identical else 'NO':>8}")
+
+
+if __name__ == "__main__":
+    main()
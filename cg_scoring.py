@@ -0,0 +1,101 @@
+from restriction_index import get_restriction_index
+from exclusion_matrix import get_exclusion_matrix
+
+
+class CGScorer:
+    """
+    Evaluador incremental del centro de gravedad para las estrategias automáticas.
+
+    Mantiene los totales acumulados de peso y momento X de los pallets ya asignados,
+    de modo que cada posición candidata se evalúa como un delta O(1) sobre el %MAC
+    de ZFW y TOW, sin copiar el DataFrame del manifiesto. Solo la posición ganadora
+    se escribe en el DataFrame mediante `commit`.
+    """
+
+    def __init__(self, df, restricciones_df, tipo_carga, exclusiones_df, bow, bow_moment_x, fuel_kg, taxi_fuel, moment_x_fuel_tow, lemac, mac_length, target_mac=28.0):
+        """
+        Args:
+            df (pd.DataFrame): DataFrame con los datos del manifiesto.
+            restricciones_df (pd.DataFrame): DataFrame con las restricciones.
+            tipo_carga (str): Tipo de carga ("simétrico" o "asimétrico").
+            exclusiones_df (pd.DataFrame): DataFrame con las exclusiones.
+            bow (float): Basic Operating Weight.
+            bow_moment_x (float): Momento X del BOW.
+            fuel_kg (float): Combustible total (kg).
+            taxi_fuel (float): Combustible de taxi (kg).
+            moment_x_fuel_tow (float): Momento X del combustible en TOW.
+            lemac (float): Leading Edge of Mean Aerodynamic Chord.
+            mac_length (float): Longitud del MAC.
+            target_mac (float): Objetivo de %MAC para TOW CG y ZFW CG.
+        """
+        self.restricciones_df = restricciones_df
+        self.tipo_carga = tipo_carga
+        self.exclusiones_df = exclusiones_df
+        self.bow = bow
+        self.bow_moment_x = bow_moment_x
+        self.fuel_kg = fuel_kg
+        self.taxi_fuel = taxi_fuel
+        self.moment_x_fuel_tow = moment_x_fuel_tow
+        self.lemac = lemac
+        self.mac_length = mac_length
+        self.target_mac = target_mac
+        self.restriction_index = get_restriction_index(restricciones_df)
+        self.exclusion_matrix = get_exclusion_matrix(exclusiones_df)
+
+        asignados = df[df["Posición Asignada"] != ""]
+        self.peso_total = asignados["Weight (KGS)"].sum()
+        self.momento_x_total = asignados["Momento X"].sum()
+
+    def evaluate(self, position, weight, base_code, occupied_mask):
+        """
+        Calcula la desviación combinada de TOW CG y ZFW CG respecto al objetivo si el pallet
+        se ubicara en `position`, aplicando las mismas validaciones que `update_position_values`.
+        `occupied_mask` es la máscara de posiciones ocupadas de `ExclusionMatrix.occupied_mask`.
+
+        Returns:
+            float | None: Desviación combinada, o None si la posición no es válida.
+        """
+        restric = self.restriction_index.lookup(position, base_code)
+        if restric is None:
+            return None
+        x_arm = restric.x_arm
+        peso_max = restric.peso_maximo(self.tipo_carga)
+        if self.exclusion_matrix.conflicts(position, occupied_mask):
+            return None
+        if weight > peso_max:
+            return None
+
+        momento_x_total = self.momento_x_total + round(x_arm * weight, 3)
+        peso_total = self.peso_total + weight
+        # Calcular TOW CG
+        tow = self.bow + peso_total + self.fuel_kg - self.taxi_fuel
+        tow_momento_x = self.bow_moment_x + momento_x_total + self.moment_x_fuel_tow
+        tow_mac = ((tow_momento_x / tow - self.lemac) / self.mac_length) * 100 if tow != 0 else 0
+        # Calcular ZFW CG
+        zfw = self.bow + peso_total
+        zfw_momento_x = self.bow_moment_x + momento_x_total
+        zfw_mac = ((zfw_momento_x / zfw - self.lemac) / self.mac_length) * 100 if zfw != 0 else 0
+        # Combinar desviaciones (ponderadas igualmente)
+        return abs(tow_mac - self.target_mac) + abs(zfw_mac - self.target_mac)
+
+    def best_position(self, df, idx, candidates, posiciones_usadas):
+        """
+        Devuelve la posición candidata con menor desviación combinada (la primera en caso de empate)
+        para el pallet de la fila `idx`, o None si ninguna es válida.
+        """
+        weight = df.at[idx, "Weight (KGS)"]
+        base_code = df.at[idx, "Baseplate Code"]
+        best_position = None
+        best_combined_deviation = float('inf')
+        occupied_mask = self.exclusion_matrix.occupied_mask(posiciones_usadas)
+        for pos in candidates:
+            combined_deviation = self.evaluate(pos, weight, base_code, occupied_mask)
+            if combined_deviation is not None and combined_deviation < best_combined_deviation:
+                best_combined_deviation = combined_deviation
+                best_position = pos
+        return best_position
+
+    def commit(self, df, idx):
+        """Incorpora a los totales acumulados el pallet recién asignado en la fila `idx` del DataFrame."""
+        self.peso_total += df.at[idx, "Weight (KGS)"]
+        self.momento_x_total += df.at[idx, "Momento X"]
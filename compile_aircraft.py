@@ -0,0 +1,73 @@
+"""
+Compila los CSV de cada aeronave en un paquete binario (aircraft_bundle.npz) con arreglos
+tipados por columna y un manifiesto con checksums (aircraft_bundle.json).
+
+La aplicación carga las tablas desde el paquete y vuelve a leer un CSV solo si cambió desde
+la última compilación, de modo que no es obligatorio recompilar después de editar un archivo.
+
+Uso:
+    python compile_aircraft.py            # todas las aeronaves de General_aircraft_database.csv
+    python compile_aircraft.py N342AV N335QT
+    python compile_aircraft.py --check    # verifica que el paquete reproduzca los CSV
+"""
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+from wb_engine.bundle import compile_aircraft, load_bundle_tables, read_source_csv
+from wb_engine.engine import AIRCRAFT_FILES
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+aircraft_db_path = os.path.join(script_dir, "General_aircraft_database.csv")
+
+
+def default_tails():
+    aircraft_db = pd.read_csv(aircraft_db_path, sep=";", decimal=",")
+    return aircraft_db["Tail"].tolist()
+
+
+def check_bundle(aircraft_folder):
+    """Compara cada tabla del paquete con su CSV; devuelve la lista de tablas que difieren."""
+    bundled = load_bundle_tables(aircraft_folder)
+    differences = []
+    for attribute, filename, read_kwargs in AIRCRAFT_FILES:
+        path = os.path.join(aircraft_folder, filename)
+        if not os.path.exists(path):
+            continue
+        if attribute not in bundled:
+            differences.append(f"{filename} (no está en el paquete o cambió)")
+        elif not bundled[attribute].equals(read_source_csv(path, read_kwargs)):
+            differences.append(f"{filename} (contenido distinto)")
+    return differences
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compila los CSV de las aeronaves en paquetes binarios.")
+    parser.add_argument("tails", nargs="*", help="Matrículas a compilar (por defecto todas).")
+    parser.add_argument("--check", action="store_true", help="Solo verifica los paquetes existentes.")
+    args = parser.parse_args()
+
+    failed = False
+    for tail in args.tails or default_tails():
+        aircraft_folder = os.path.join(script_dir, tail)
+        if not os.path.isdir(aircraft_folder):
+            print(f"{tail}: la carpeta {aircraft_folder} no existe.")
+            failed = True
+            continue
+        if not args.check:
+            manifest = compile_aircraft(aircraft_folder, AIRCRAFT_FILES)
+            missing = [filename for attribute, filename, _ in AIRCRAFT_FILES if attribute not in manifest["tables"]]
+            print(f"{tail}: {len(manifest['tables'])} tablas compiladas" + (f" (faltan: {', '.join(missing)})" if missing else ""))
+        differences = check_bundle(aircraft_folder)
+        if differences:
+            failed = True
+            print(f"{tail}: el paquete no coincide con los CSV: {', '.join(differences)}")
+        elif args.check:
+            print(f"{tail}: paquete vigente.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
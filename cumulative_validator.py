@@ -0,0 +1,169 @@
+import numpy as np
+import pandas as pd
+
+# Posiciones que no participan en las restricciones acumulativas
+EXCLUDED_POSITIONS = {"FF", "FHR", "FHL", "FH", "G", "FJR", "FJG", "GG", "HJR", "HJL"}
+
+VALIDATION_COLUMNS = ["Posición Asignada", "Región", "Order", "Peso Acumulativo (kg)", "Máximo Permitido (kg)", "Cumple"]
+
+
+class _Region:
+    """Tabla acumulativa de una región (FWD o AFT) compilada por Order."""
+
+    def __init__(self, name, table, direction):
+        self.name = name
+        self.direction = direction
+        positions = table["Position"].tolist()
+        orders = table["Order"].tolist()
+        max_weights = table["Max_Weight"].tolist()
+
+        self.orders = np.array(sorted(set(orders)))
+        slot = {order: i for i, order in enumerate(self.orders)}
+        # Una posición repetida en la tabla aporta su peso una vez por fila (como el merge original);
+        # su Order y Max_Weight son los de la primera fila.
+        self.slots = {}
+        self.first = {}
+        for position, order, max_weight in zip(positions, orders, max_weights):
+            self.slots.setdefault(position, []).append(slot[order])
+            self.first.setdefault(position, (order, max_weight, slot[order]))
+        self.buckets = np.zeros(len(self.orders))
+
+    def cumulative(self, buckets=None):
+        """Peso acumulado en cada Order: hacia adelante (FWD) o hacia atrás (AFT)."""
+        buckets = self.buckets if buckets is None else buckets
+        if self.direction == "forward":
+            return np.cumsum(buckets)
+        return np.cumsum(buckets[::-1])[::-1]
+
+
+class CumulativeValidator:
+    """
+    Validador de pesos acumulativos FWD/AFT basado en sumas de prefijos.
+
+    Mantiene el peso asignado por cada valor de Order de las tablas acumulativas; el peso
+    acumulado de todas las posiciones se obtiene con un solo `numpy.cumsum` (hacia adelante
+    en FWD, hacia atrás en AFT). Permite agregar y quitar pallets de forma incremental para
+    que los optimizadores verifiquen los límites mientras asignan.
+    """
+
+    def __init__(self, cumulative_restrictions_fwd_df, cumulative_restrictions_aft_df):
+        """
+        Args:
+            cumulative_restrictions_fwd_df (pd.DataFrame): Tabla cummulative_restrictions_FWD.csv.
+            cumulative_restrictions_aft_df (pd.DataFrame): Tabla cummulative_restrictions_AFT.csv.
+        """
+        self.regions = [
+            _Region("FWD", cumulative_restrictions_fwd_df, "forward"),
+            _Region("AFT", cumulative_restrictions_aft_df, "backward")
+        ]
+        self.occupied = {}  # posición -> cantidad de pallets asignados
+
+    def region_of(self, position):
+        """Región (FWD primero) que contiene la posición, o None si no aplica o está excluida."""
+        if position in EXCLUDED_POSITIONS:
+            return None
+        for region in self.regions:
+            if position in region.first:
+                return region
+        return None
+
+    def _apply(self, position, weight):
+        if pd.isna(weight):
+            return
+        for region in self.regions:
+            if position in region.first and position not in EXCLUDED_POSITIONS:
+                for slot in region.slots[position]:
+                    region.buckets[slot] += weight
+
+    def add(self, position, weight):
+        """Agrega un pallet de `weight` kg en `position`."""
+        self._apply(position, weight)
+        self.occupied[position] = self.occupied.get(position, 0) + 1
+
+    def remove(self, position, weight):
+        """Quita un pallet de `weight` kg de `position`."""
+        self._apply(position, -weight)
+        self.occupied[position] -= 1
+        if self.occupied[position] == 0:
+            del self.occupied[position]
+
+    def _region_complies(self, region, buckets, extra_position=None):
+        cumulative = region.cumulative(buckets)
+        positions = [pos for pos in self.occupied if self.region_of(pos) is region]
+        if extra_position is not None and self.region_of(extra_position) is region:
+            positions.append(extra_position)
+        for pos in positions:
+            _, max_weight, slot = region.first[pos]
+            if not cumulative[slot] <= max_weight:
+                return False
+        return True
+
+    def fits(self, position, weight):
+        """True si al agregar el pallet todas las posiciones ocupadas siguen cumpliendo sus límites."""
+        for region in self.regions:
+            buckets = region.buckets
+            if position in region.first and position not in EXCLUDED_POSITIONS:
+                buckets = buckets.copy()
+                for slot in region.slots[position]:
+                    buckets[slot] += weight
+            if not self._region_complies(region, buckets, position):
+                return False
+        return True
+
+    def complies(self):
+        """True si todas las posiciones ocupadas cumplen sus límites acumulativos."""
+        return all(self._region_complies(region, region.buckets) for region in self.regions)
+
+    def validation_rows(self, positions):
+        """
+        Filas de validación (esquema VALIDATION_COLUMNS) para las posiciones dadas, en el mismo orden,
+        con el estado actual del validador.
+        """
+        cumulative = {region.name: region.cumulative() for region in self.regions}
+        validation_data = []
+        for position in positions:
+            region = self.region_of(position)
+            if region is None:
+                validation_data.append({
+                    "Posición Asignada": position,
+                    "Región": "Excluida" if position in EXCLUDED_POSITIONS else "No Aplicable",
+                    "Order": None,
+                    "Peso Acumulativo (kg)": None,
+                    "Máximo Permitido (kg)": None,
+                    "Cumple": "N/A"
+                })
+                continue
+            order, max_weight, slot = region.first[position]
+            cumulative_weight = cumulative[region.name][slot]
+            validation_data.append({
+                "Posición Asignada": position,
+                "Región": region.name,
+                "Order": order,
+                "Peso Acumulativo (kg)": round(cumulative_weight, 3),
+                "Máximo Permitido (kg)": round(max_weight, 3),
+                "Cumple": "Sí" if cumulative_weight <= max_weight else "No"
+            })
+        return validation_data
+
+    @classmethod
+    def from_assigned(cls, df_asignados, cumulative_restrictions_fwd_df, cumulative_restrictions_aft_df):
+        """Construye el validador con los pallets ya asignados de df_asignados."""
+        validator = cls(cumulative_restrictions_fwd_df, cumulative_restrictions_aft_df)
+        for position, weight in zip(df_asignados["Posición Asignada"], df_asignados["Weight (KGS)"]):
+            validator.add(position, weight)
+        return validator
+
+
+def validate_cumulative_weights(df_asignados, cumulative_restrictions_fwd_df, cumulative_restrictions_aft_df):
+    """
+    Valida los pesos acumulativos FWD/AFT de los pallets asignados.
+
+    Returns:
+        tuple: (cumple, validation_df) con validation_df en el esquema VALIDATION_COLUMNS,
+        una fila por pallet en el orden de df_asignados.
+    """
+    if df_asignados.empty:
+        return True, pd.DataFrame(columns=VALIDATION_COLUMNS)
+    validator = CumulativeValidator.from_assigned(df_asignados, cumulative_restrictions_fwd_df, cumulative_restrictions_aft_df)
+    validation_df = pd.DataFrame(validator.validation_rows(df_asignados["Posición Asignada"].tolist()))
+    return not (validation_df["Cumple"] == "No").any(), validation_df
@@ -0,0 +1,156 @@
+"""
+Gráficas de distribución de pallets en SVG, construidas directamente a partir de los brazos
+de cada posición (sin Matplotlib).
+
+Producen el mismo contenido que `visualizations.render_main_deck` / `render_lower_decks`
+(capa fija con la grilla y el contorno de las posiciones, y un rectángulo con textos por
+pallet), pero como texto SVG liviano para la vista de Streamlit y la página LIR. Con
+`tooltips=True` cada pallet muestra su detalle al pasar el cursor. La exportación a Excel
+sigue usando la imagen rasterizada.
+"""
+import textwrap
+from html import escape
+
+import pandas as pd
+from matplotlib.colors import to_hex
+
+from visualizations import DECK_SPECS, deck_pallets, deck_positions, get_global_color_map, pallet_size
+
+# Rango del gráfico en metros (igual al de Matplotlib) y escala en unidades SVG por metro
+X_RANGE = (14, 55)
+Y_RANGE = (-2.5, 2.5)
+X_SCALE = 40
+Y_SCALE = 80
+MARGIN_LEFT = 40
+MARGIN_TOP = 40
+MARGIN_BOTTOM = 25
+
+
+def _x(x):
+    return MARGIN_LEFT + (x - X_RANGE[0]) * X_SCALE
+
+
+def _y(y):
+    return MARGIN_TOP + (Y_RANGE[1] - y) * Y_SCALE
+
+
+def _text(x, y, value, size, color="black", bold=False, anchor="middle"):
+    weight = ' font-weight="bold"' if bold else ""
+    return (
+        f'<text x="{x:.1f}" y="{y:.1f}" font-size="{size}" fill="{color}"{weight} '
+        f'text-anchor="{anchor}" dominant-baseline="central">{escape(str(value))}</text>'
+    )
+
+
+def _background(restricciones_df, deck, width, height):
+    """Ejes, grilla, título y contorno de las posiciones de la bodega."""
+    plot_right = _x(X_RANGE[1])
+    plot_bottom = _y(Y_RANGE[0])
+    parts = [
+        f'<rect width="{width}" height="{height}" fill="white"/>',
+        _text(width / 2, MARGIN_TOP / 2, DECK_SPECS[deck]["title"], 18, bold=True)
+    ]
+    for x in range(X_RANGE[0] + 1, X_RANGE[1] + 1):
+        if x % 5 == 0:
+            parts.append(f'<line x1="{_x(x):.1f}" y1="{MARGIN_TOP}" x2="{_x(x):.1f}" y2="{plot_bottom:.1f}" stroke="#b0b0b0" stroke-width="0.8"/>')
+            parts.append(_text(_x(x), plot_bottom + 12, x, 10))
+    for i in range(11):
+        y = Y_RANGE[0] + 0.5 * i
+        parts.append(f'<line x1="{MARGIN_LEFT}" y1="{_y(y):.1f}" x2="{plot_right:.1f}" y2="{_y(y):.1f}" stroke="#b0b0b0" stroke-width="0.8"/>')
+        parts.append(_text(MARGIN_LEFT - 4, _y(y), f"{y:.1f}", 10, anchor="end"))
+    for pos, x, y in deck_positions(restricciones_df, deck):
+        w, h = pallet_size(deck, pos)
+        parts.append(
+            f'<rect x="{_x(x - w / 2):.1f}" y="{_y(y + h / 2):.1f}" width="{w * X_SCALE:.1f}" height="{h * Y_SCALE:.1f}" '
+            f'fill="none" stroke="lightgray" stroke-width="0.6" stroke-dasharray="4 3"/>'
+        )
+    parts.append(f'<rect x="{MARGIN_LEFT}" y="{MARGIN_TOP}" width="{plot_right - MARGIN_LEFT:.1f}" height="{plot_bottom - MARGIN_TOP:.1f}" fill="none" stroke="black" stroke-width="1"/>')
+    return parts
+
+
+def _pallet(row, color_map, deck, tooltips):
+    """Grupo SVG de un pallet (rectángulo y textos, como `visualizations.draw_pallet`)."""
+    spec = DECK_SPECS[deck]
+    try:
+        x = float(row["X-arm"])
+        y = float(row["Y-arm"])
+        peso = float(row["Weight (KGS)"])
+    except (ValueError, TypeError):
+        return ""
+    uld = str(row["Number ULD"])
+    pos = str(row["Posición Asignada"]).strip()
+    destino = str(row["ULD Final Destination"])
+    contorno = str(row["Contour"])
+    notas = str(row["Notes"]) if pd.notna(row["Notes"]) else "Sin notas"
+
+    width, height = pallet_size(deck, pos)
+    color = color_map.get(destino, (0.5, 0.5, 0.5, 0.6))
+    line_height = height / 12
+    fontsize = spec["fontsize"] + 1
+    notes_fontsize = spec["notes_fontsize"] + 1
+
+    parts = [f'<g class="pallet" data-position="{escape(pos)}">']
+    if tooltips:
+        parts.append(f"<title>{escape(f'{pos} - {uld}: {peso:,.1f} kg, {destino}, {contorno}. {notas}')}</title>")
+    parts.append(
+        f'<rect x="{_x(x - width / 2):.1f}" y="{_y(y + height / 2):.1f}" width="{width * X_SCALE:.1f}" height="{height * Y_SCALE:.1f}" '
+        f'fill="{to_hex(color)}" fill-opacity="{color[3]}" stroke="gray" stroke-width="1"/>'
+    )
+    parts.append(_text(_x(x), _y(y + 3 * line_height), pos, fontsize, color="red", bold=True))
+    parts.append(_text(_x(x), _y(y + 2 * line_height), uld, fontsize, bold=True))
+    parts.append(_text(_x(x), _y(y + line_height), f"{peso:,.1f} kg", fontsize, bold=True))
+    parts.append(_text(_x(x), _y(y), destino, fontsize))
+    parts.append(_text(_x(x), _y(y - line_height), contorno, fontsize))
+    wrapped_notas = textwrap.wrap(notas, width=int(width * 8), break_long_words=True)[:3]
+    notes_bottom = _y(y - height / 2 + line_height / 2)
+    for i, line in enumerate(reversed(wrapped_notas)):
+        parts.append(_text(_x(x), notes_bottom - (i + 0.5) * notes_fontsize * 1.2, line, notes_fontsize))
+    parts.append("</g>")
+    return "".join(parts)
+
+
+def _legend(color_map, width):
+    parts = []
+    for i, (destino, color) in enumerate(color_map.items()):
+        y = MARGIN_TOP + 8 + 14 * i
+        parts.append(f'<rect x="{width - 90}" y="{y}" width="18" height="10" fill="{to_hex(color)}" fill-opacity="{color[3]}"/>')
+        parts.append(_text(width - 66, y + 5, destino, 10, anchor="start"))
+    return parts
+
+
+def render_deck_svg(df, restricciones_df, deck, tooltips=True):
+    """
+    SVG de la distribución de una bodega.
+
+    Args:
+        df (pd.DataFrame): Pallets asignados.
+        restricciones_df (pd.DataFrame, optional): Restricciones de la aeronave.
+        deck (str): "main" o "lower".
+        tooltips (bool): Si cada pallet incluye su detalle como tooltip (<title>).
+
+    Returns:
+        str | None: Documento SVG, o None si no hay pallets para graficar.
+    """
+    df_deck = deck_pallets(df, restricciones_df, deck)
+    if df_deck is None:
+        return None
+    color_map = get_global_color_map(df)
+    width = _x(X_RANGE[1]) + 10
+    height = _y(Y_RANGE[0]) + MARGIN_BOTTOM
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width:.0f} {height:.0f}" '
+        f'width="100%" font-family="DejaVu Sans, Arial, sans-serif">'
+    ]
+    parts.extend(_background(restricciones_df, deck, width, height))
+    parts.extend(_pallet(row, color_map, deck, tooltips) for _, row in df_deck.iterrows())
+    parts.extend(_legend(color_map, width))
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+def render_main_deck_svg(df, restricciones_df=None, tooltips=True):
+    return render_deck_svg(df, restricciones_df, "main", tooltips)
+
+
+def render_lower_decks_svg(df, restricciones_df=None, tooltips=True):
+    return render_deck_svg(df, restricciones_df, "lower", tooltips)
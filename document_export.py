@@ -0,0 +1,74 @@
+"""
+Generación de los documentos del W&B (JSON, Excel a partir de `templates/template.xlsm` y PDF)
+fuera del script de Streamlit, para ejecutarse como trabajo de `export_jobs`.
+"""
+import os
+
+from openpyxl import load_workbook
+from openpyxl.drawing.image import Image as OpenpyxlImage
+
+from loadsheet_pdf import render_loadsheet_pdf
+from xlsm_template import get_xlsm_template
+
+
+def fill_template_openpyxl(template_path, excel_path, cells, images):
+    """Llena la plantilla abriéndola con openpyxl (para plantillas sin dibujo en la hoja)."""
+    wb = load_workbook(template_path, keep_vba=True)
+    ws = wb.active
+    for cell, value in cells.items():
+        ws[cell] = value
+    for anchor, rendered, width, height in images:
+        if rendered:
+            img = OpenpyxlImage(rendered.buffer())
+            img.width = width
+            img.height = height
+            ws.add_image(img, anchor)
+    wb.save(excel_path)
+
+
+def export_documents(report, json_bytes, json_path, excel_path, template_path, cells, images):
+    """
+    Guarda el JSON del cálculo, llena la plantilla Excel (precargada, ver `xlsm_template`) y
+    genera el loadsheet en PDF (`loadsheet_pdf`, con las mismas celdas e imágenes).
+
+    Args:
+        report (callable): `report(progress, message)` de `ExportQueue.submit`.
+        json_bytes (bytes): JSON del cálculo.
+        json_path (str): Ruta del JSON a generar.
+        excel_path (str): Ruta del .xlsm a generar.
+        template_path (str): Plantilla `template.xlsm`.
+        cells (dict): Celda -> valor a escribir en la hoja activa.
+        images (list): (celda, función que devuelve la RenderedFigure o None, ancho, alto) por imagen.
+
+    Returns:
+        dict: Rutas de los archivos generados ("json", "excel" y, si se pudo, "pdf").
+    """
+    report(0.1, "Guardando JSON")
+    with open(json_path, "wb") as f:
+        f.write(json_bytes)
+    files = {"json": json_path}
+
+    if not os.path.exists(template_path):
+        raise FileNotFoundError(f"No se encontró el archivo de plantilla en: {template_path}")
+
+    report(0.2, "Preparando gráficas")
+    rendered_images = [(anchor, get_image(), width, height) for anchor, get_image, width, height in images]
+
+    report(0.5, "Guardando Excel")
+    template = get_xlsm_template(template_path)
+    if template.supports_images:
+        template.save(excel_path, cells, rendered_images)
+    else:
+        fill_template_openpyxl(template_path, excel_path, cells, rendered_images)
+    files["excel"] = excel_path
+
+    report(0.8, "Generando PDF")
+    pdf_path = excel_path.replace(".xlsm", ".pdf")
+    try:
+        pdf_bytes = render_loadsheet_pdf(cells, {anchor: rendered for anchor, rendered, _, _ in rendered_images})
+        with open(pdf_path, "wb") as f:
+            f.write(pdf_bytes)
+        files["pdf"] = pdf_path
+    except Exception as e:
+        report.warning(f"No se pudo generar el PDF: {str(e)}")
+    return files
@@ -0,0 +1,88 @@
+import matplotlib.pyplot as plt
+import numpy as np
+
+from visualizations import plot_cg_trajectory
+
+PHASE_COLORS = {
+    "takeoff": '#FF8C00',
+    "cruise": '#1E90FF',
+    "landing": '#32CD32'
+}
+PHASE_LABELS = {"takeoff": "Takeoff", "cruise": "Cruise", "landing": "Landing"}
+
+
+def plot_cg_envelope(envelope, zfw_weight, zfw_mac, tow_weight, tow_mac, lw_weight, lw_mac, trajectory=None, title=None):
+    """
+    Genera el gráfico de la envolvente de CG con los puntos ZFW, TOW y LW a partir de la
+    envolvente de la aeronave (envelope.csv); la verificación de límites se hace aparte con
+    `Envelope.check`.
+
+    Args:
+        envelope (Envelope): Envolvente de la aeronave.
+        zfw_weight (float): Peso en Zero Fuel Weight (kg).
+        zfw_mac (float): %MAC en Zero Fuel Weight.
+        tow_weight (float): Peso en Takeoff Weight (kg).
+        tow_mac (float): %MAC en Takeoff Weight.
+        lw_weight (float): Peso en Landing Weight (kg).
+        lw_mac (float): %MAC en Landing Weight.
+        trajectory (pd.DataFrame, optional): Trayectoria de `simulate_fuel_burn` a superponer; si
+            tiene la columna "Fuera de crucero" (ver `flag_trajectory`) se marcan esos puntos.
+        title (str, optional): Título del gráfico.
+
+    Returns:
+        matplotlib.figure.Figure: Figura para mostrar en Streamlit o exportar.
+    """
+    projected = envelope.projection is not None
+    fig, ax = plt.subplots(figsize=(12, 9) if projected else (10, 6))
+
+    # Envolventes por fase, en las coordenadas del gráfico
+    for phase, limits in envelope.limits.items():
+        color = PHASE_COLORS.get(phase, 'gray')
+        fwd_w, fwd_mac = limits["fwd"]
+        aft_w, aft_mac = limits["aft"]
+        fwd_x = envelope.project(fwd_mac, fwd_w)
+        aft_x = envelope.project(aft_mac, aft_w)
+        ax.plot(fwd_x, fwd_w, color=color, linewidth=2)
+        ax.plot(aft_x, aft_w, color=color, linewidth=2)
+        low, high = envelope.weight_range(phase)
+        y_fill = np.linspace(low, high, 300)
+        ax.fill_betweenx(y_fill, np.interp(y_fill, fwd_w, fwd_x), np.interp(y_fill, aft_w, aft_x), color=color, alpha=0.15)
+
+    # Puntos CG
+    ax.plot(envelope.project(zfw_mac, zfw_weight), zfw_weight, 'bo', label='ZFW CG', markersize=10)
+    ax.plot(envelope.project(tow_mac, tow_weight), tow_weight, marker='o', color=PHASE_COLORS["takeoff"], label='TOW CG', markersize=10)
+    ax.plot(envelope.project(lw_mac, lw_weight), lw_weight, 'go', label='LW CG', markersize=10)
+
+    # Trayectoria de CG en vuelo
+    if trajectory is not None:
+        trajectory_weight = trajectory["Peso (kg)"].to_numpy()
+        trajectory_raw_mac = trajectory["%MAC"].to_numpy()
+        outside = trajectory["Fuera de crucero"].to_numpy() if "Fuera de crucero" in trajectory else np.zeros(len(trajectory), dtype=bool)
+        breaks = None
+        if projected:
+            # La proyección es discontinua en el pivote: no se unen los puntos a ambos lados
+            breaks = np.diff(np.sign(trajectory_raw_mac - envelope.projection[0])) != 0
+        plot_cg_trajectory(ax, envelope.project(trajectory_raw_mac, trajectory_weight), trajectory_weight, outside, breaks=breaks)
+
+    # Líneas de referencia
+    for label, weight in envelope.references:
+        ax.axhline(weight, color='gray', linestyle='--', linewidth=1.5)
+        ax.text(44, weight + 1000, label, fontsize=11, color='gray', weight='bold')
+
+    # Ejes y título
+    ax.set_ylabel("Peso (kg)", fontsize=12)
+    ax.set_xlabel("% MAC Proyectado" if projected else "% MAC", fontsize=12)
+    ax.set_title(title or "Envolvente de Centro de Gravedad vs Peso", fontsize=14, weight='bold')
+
+    # Leyenda personalizada por fase
+    for i, phase in enumerate(envelope.phases):
+        ax.text(43, 230000 - 8000 * i, PHASE_LABELS.get(phase, phase), fontsize=12, weight='bold',
+                bbox=dict(facecolor=PHASE_COLORS.get(phase, 'gray'), edgecolor='black', boxstyle='round,pad=0.3', alpha=0.8))
+
+    ax.legend(loc='upper left')
+    ax.minorticks_on()
+    ax.grid(True, which='major', linestyle='--', alpha=0.4)
+    ax.grid(True, which='minor', linestyle=':', alpha=0.3)
+
+    plt.tight_layout()
+    return fig
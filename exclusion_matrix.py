@@ -0,0 +1,121 @@
+import re
+import weakref
+import numpy as np
+import pandas as pd
+
+
+class ExclusionMatrix:
+    """
+    Matriz de exclusiones de exclusiones.csv compilada en máscaras de bits.
+
+    Cada posición que aparece como fila recibe un bit. Para cada posición de columna se guarda
+    la máscara de las filas con valor 0 (posiciones que, ocupadas, impiden usarla), de modo que
+    verificar un conflicto es un solo AND contra la máscara de posiciones ocupadas.
+    Conserva la semántica de `exclusiones_df.index[exclusiones_df[pos] == 0]`.
+    """
+
+    def __init__(self, exclusiones_df):
+        """
+        Args:
+            exclusiones_df (pd.DataFrame): DataFrame con las exclusiones, indexado por la primera columna.
+        """
+        row_labels = list(exclusiones_df.index)
+        self._bit = {}
+        for label in row_labels:
+            if label not in self._bit:
+                self._bit[label] = 1 << len(self._bit)
+
+        row_bits = np.array([self._bit[label] for label in row_labels], dtype=object)
+        zeros = exclusiones_df.apply(pd.to_numeric, errors="coerce").to_numpy() == 0
+
+        self._blockers = {}
+        self._excluded = {}
+        for j, column in enumerate(exclusiones_df.columns):
+            rows = np.flatnonzero(zeros[:, j])
+            mask = 0
+            for bit in row_bits[rows]:
+                mask |= bit
+            self._blockers[column] = mask
+            self._excluded[column] = [row_labels[i] for i in rows]
+
+        self.report = self._build_report(exclusiones_df, zeros)
+
+    def _build_report(self, exclusiones_df, zeros):
+        """Lista de advertencias sobre filas/columnas duplicadas y exclusiones no simétricas."""
+        report = []
+        row_labels = list(exclusiones_df.index)
+        columns = list(exclusiones_df.columns)
+
+        first_row = {}
+        for i, label in enumerate(row_labels):
+            if label in first_row:
+                same = np.array_equal(zeros[i], zeros[first_row[label]])
+                report.append(f"Fila duplicada para la posición {label}" + (" (idéntica a la primera)." if same else " con exclusiones distintas; se combinan ambas filas."))
+            else:
+                first_row[label] = i
+
+        # pandas renombra las columnas duplicadas como "12P.1", "12P.2", ...
+        first_col = {}
+        for j, column in enumerate(columns):
+            match = re.fullmatch(r"(.+)\.\d+", str(column))
+            if match and match.group(1) in columns:
+                original = columns.index(match.group(1))
+                same = np.array_equal(zeros[:, j], zeros[:, original])
+                report.append(f"Columna duplicada para la posición {match.group(1)}" + (" (idéntica a la primera)." if same else " con exclusiones distintas; se usa la primera."))
+            else:
+                first_col[column] = j
+
+        shared = [label for label in first_row if label in first_col]
+        for a_idx, a in enumerate(shared):
+            for b in shared[a_idx + 1:]:
+                a_blocks_b = zeros[first_row[a], first_col[b]]
+                b_blocks_a = zeros[first_row[b], first_col[a]]
+                if a_blocks_b != b_blocks_a:
+                    if a_blocks_b:
+                        report.append(f"Exclusión no simétrica: {a} excluye {b}, pero {b} no excluye {a}.")
+                    else:
+                        report.append(f"Exclusión no simétrica: {b} excluye {a}, pero {a} no excluye {b}.")
+        return report
+
+    def __contains__(self, position):
+        return position in self._blockers
+
+    def occupied_mask(self, posiciones_usadas):
+        """Máscara de bits de las posiciones ocupadas."""
+        mask = 0
+        for pos in posiciones_usadas:
+            mask |= self._bit.get(pos, 0)
+        return mask
+
+    def position_mask(self, position):
+        """Bit de la posición (0 si no aparece como fila de exclusiones.csv)."""
+        return self._bit.get(position, 0)
+
+    def blocking_mask(self, position):
+        """Máscara de las posiciones que, ocupadas, impiden usar `position`."""
+        return self._blockers.get(position, 0)
+
+    def conflicts(self, position, occupied_mask):
+        """True si alguna posición ocupada en `occupied_mask` excluye a `position`."""
+        return (self._blockers.get(position, 0) & occupied_mask) != 0
+
+    def excluded_positions(self, position):
+        """Posiciones que, si están ocupadas, impiden usar `position` (como en exclusiones.csv)."""
+        return self._excluded.get(position, [])
+
+
+_matrix_cache = {}
+
+
+def get_exclusion_matrix(exclusiones_df):
+    """
+    Devuelve la ExclusionMatrix compilada para `exclusiones_df`, compilándola una sola vez
+    por objeto DataFrame.
+    """
+    key = id(exclusiones_df)
+    cached = _matrix_cache.get(key)
+    if cached is not None and cached[0]() is exclusiones_df:
+        return cached[1]
+    matrix = ExclusionMatrix(exclusiones_df)
+    _matrix_cache[key] = (weakref.ref(exclusiones_df, lambda _, key=key: _matrix_cache.pop(key, None)), matrix)
+    return matrix
@@ -0,0 +1,149 @@
+"""
+Cola de exportaciones en segundo plano (JSON, Excel y PDF del W&B).
+
+El botón de exportar solo encola un trabajo y la página sigue respondiendo; un pool de hilos
+genera los documentos e informa el avance. Cada trabajo se identifica por la huella de la
+revisión del plan que exporta: exportar dos veces el mismo plan devuelve el trabajo existente
+en lugar de generar los documentos de nuevo. El estado de cada trabajo se guarda en
+`Output/jobs/<job_id>.json`, de modo que los resultados siguen disponibles tras reiniciar la app.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+
+EXPORT_WORKERS = 2
+JOB_PENDING = "pendiente"
+JOB_RUNNING = "en curso"
+JOB_DONE = "completado"
+JOB_FAILED = "error"
+
+
+def export_job_id(*parts):
+    """
+    Identificador del trabajo a partir de lo que se exporta (p. ej. el JSON del plan y las
+    celdas de la plantilla): la misma revisión del plan produce el mismo identificador.
+
+    Returns:
+        str: Primeros 16 caracteres del SHA-1.
+    """
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else repr(part).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+@dataclass
+class ExportJob:
+    """Estado de un trabajo de exportación."""
+    job_id: str
+    status: str = JOB_PENDING
+    progress: float = 0.0
+    message: str = "En cola"
+    files: dict = field(default_factory=dict)
+    warnings: list = field(default_factory=list)
+    error: str = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: float = None
+
+    @property
+    def finished(self):
+        return self.status in (JOB_DONE, JOB_FAILED)
+
+    def files_available(self):
+        """True si todos los archivos generados siguen en disco."""
+        return all(os.path.exists(path) for path in self.files.values())
+
+
+class ExportQueue:
+    """Pool de hilos que ejecuta los trabajos de exportación y persiste su estado."""
+
+    def __init__(self, jobs_dir, max_workers=EXPORT_WORKERS):
+        self.jobs_dir = jobs_dir
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="export")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def _job_path(self, job_id):
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _persist(self, job):
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        tmp_path = self._job_path(job.job_id) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(job), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self._job_path(job.job_id))
+
+    def get(self, job_id):
+        """
+        Trabajo por identificador, en memoria o guardado en disco.
+
+        Returns:
+            ExportJob | None
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        try:
+            with open(self._job_path(job_id), "r", encoding="utf-8") as f:
+                job = ExportJob(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+        if not job.finished:
+            # Quedó a medias en un proceso anterior
+            job.status, job.error = JOB_FAILED, "La exportación se interrumpió."
+        with self._lock:
+            self._jobs.setdefault(job_id, job)
+        return job
+
+    def submit(self, job_id, task):
+        """
+        Encola `task(report)` salvo que ya exista un trabajo igual en curso o completado con sus
+        archivos en disco. `report(progress, message)` actualiza el avance (0 a 1); la tarea
+        devuelve {tipo: ruta} de los archivos generados y puede agregar avisos con
+        `report.warning(mensaje)`.
+
+        Returns:
+            tuple: (ExportJob, True si se encoló un trabajo nuevo).
+        """
+        existing = self.get(job_id)
+        if existing is not None and (not existing.finished or (existing.status == JOB_DONE and existing.files_available())):
+            return existing, False
+        job = ExportJob(job_id)
+        with self._lock:
+            self._jobs[job_id] = job
+        self._persist(job)
+        self._executor.submit(self._run, job, task)
+        return job, True
+
+    def _run(self, job, task):
+        def report(progress, message):
+            job.status, job.progress, job.message = JOB_RUNNING, progress, message
+        report.warning = job.warnings.append
+
+        report(0.0, "Iniciando exportación")
+        self._persist(job)
+        try:
+            job.files = task(report) or {}
+            job.status, job.progress, job.message = JOB_DONE, 1.0, "Documentos generados"
+        except Exception as e:
+            job.status, job.error, job.message = JOB_FAILED, str(e), "Error al generar los documentos"
+        job.finished_at = time.time()
+        self._persist(job)
+
+
+_export_queue = None
+_export_queue_lock = threading.Lock()
+
+
+def get_export_queue(output_dir):
+    """Cola de exportación del proceso; guarda el estado de los trabajos en `output_dir/jobs`."""
+    global _export_queue
+    with _export_queue_lock:
+        if _export_queue is None:
+            _export_queue = ExportQueue(os.path.join(output_dir, "jobs"))
+        return _export_queue
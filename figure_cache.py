@@ -0,0 +1,144 @@
+"""
+Caché en memoria de las gráficas ya renderizadas (envelope, Main Deck y Lower Decks).
+
+Cada gráfica se guarda como bytes PNG/JPEG bajo una huella del plan de carga (posiciones,
+pesos y destinos asignados más la matrícula), de modo que los reruns de Streamlit, el envío
+al servidor LIR y la exportación a Excel reutilizan la misma imagen mientras el plan no cambie.
+La caché es por proceso y acotada (LRU).
+"""
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from io import BytesIO
+
+import matplotlib.pyplot as plt
+
+# Columnas del manifiesto que determinan cómo se dibuja el plan
+PLAN_COLUMNS = [
+    "Posición Asignada", "Number ULD", "Weight (KGS)", "ULD Final Destination", "Contour", "Notes",
+    "Bodega", "X-arm", "Y-arm"
+]
+FIGURE_CACHE_SIZE = 32
+
+
+def plan_hash(df_asignados, tail, *extra):
+    """
+    Huella del plan de carga para usar como clave de caché.
+
+    Args:
+        df_asignados (pd.DataFrame): Pallets con posición asignada.
+        tail (str): Matrícula de la aeronave.
+        *extra: Otros valores de los que depende la gráfica (p. ej. pesos y %MAC del envelope);
+            los `bytes` se agregan tal cual y el resto por su `repr`.
+
+    Returns:
+        str: SHA-1 en hexadecimal.
+    """
+    digest = hashlib.sha1(str(tail).encode("utf-8"))
+    columns = [col for col in PLAN_COLUMNS if col in df_asignados.columns]
+    digest.update(df_asignados[columns].to_csv(index=False).encode("utf-8"))
+    for value in extra:
+        digest.update(value if isinstance(value, bytes) else repr(value).encode("utf-8"))
+    return digest.hexdigest()
+
+
+@dataclass
+class RenderedFigure:
+    """Imagen renderizada de una gráfica."""
+    data: bytes
+    format: str
+    _base64: str = field(default=None, repr=False)
+
+    @property
+    def base64(self):
+        """Imagen en base64 (como la espera el servidor LIR); se codifica una sola vez."""
+        if self._base64 is None:
+            self._base64 = base64.b64encode(self.data).decode("utf-8")
+        return self._base64
+
+    def buffer(self):
+        """BytesIO nuevo con la imagen, p. ej. para `openpyxl.drawing.image.Image`."""
+        return BytesIO(self.data)
+
+
+class FigureCache:
+    """LRU de imágenes renderizadas, compartida por las sesiones del proceso."""
+
+    def __init__(self, maxsize=FIGURE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            rendered = self._entries.get(key)
+            if rendered is not None:
+                self._entries.move_to_end(key)
+            return rendered
+
+    def put(self, key, rendered):
+        with self._lock:
+            self._entries[key] = rendered
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def render(self, key, build, format="png", dpi=100, size=None):
+        """
+        Devuelve la imagen de `key`; si no está en caché, genera la figura con `build()`,
+        la guarda en `format` y la cierra.
+
+        Args:
+            key (tuple): Clave de la gráfica, p. ej. ("envelope", plan_hash(...)).
+            build (callable): Función sin argumentos que devuelve la figura o None.
+            format (str): "png" o "jpeg".
+            dpi (int): Resolución de la imagen.
+            size (tuple, optional): Tamaño (ancho, alto) en pulgadas a aplicar antes de guardar.
+
+        Returns:
+            RenderedFigure | None: La imagen, o None si `build` no generó figura (no se guarda en caché).
+        """
+        def build_image():
+            fig = build()
+            if fig is None:
+                return None
+            try:
+                if size is not None:
+                    fig.set_size_inches(*size)
+                buffer = BytesIO()
+                fig.savefig(buffer, format=format, bbox_inches="tight", dpi=dpi)
+            finally:
+                plt.close(fig)
+            return buffer.getvalue()
+
+        return self.render_image((*key, dpi, size), build_image, format)
+
+    def render_image(self, key, build, format="png"):
+        """
+        Como `render`, pero `build()` devuelve directamente los bytes de la imagen en `format`
+        (o None), p. ej. `visualizations.render_main_deck`.
+        """
+        key = (*key, format)
+        rendered = self.get(key)
+        if rendered is not None:
+            return rendered
+        data = build()
+        if data is None:
+            return None
+        rendered = RenderedFigure(data, format)
+        self.put(key, rendered)
+        return rendered
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_figure_cache = FigureCache()
+
+
+def get_figure_cache():
+    """Caché de imágenes del proceso."""
+    return _figure_cache
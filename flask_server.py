@@ -1,40 +1,285 @@
-from flask import Flask, render_template_string, request
-from threading import Lock
+import base64
+import binascii
+import hashlib
+import json
+import math
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime
+from html import escape
+from threading import Condition, Lock
+from xml.etree import ElementTree
+
+from flask import Flask, Response, redirect, render_template_string, request, stream_with_context
 
 app = Flask(__name__)
 
-# Almacenar las imágenes y datos con un bloqueo para acceso concurrente
-data = {
-    "main_deck_base64": None,
-    "lower_decks_base64": None,
-    "total_carga": 0.0,
-    "tow_cg": 0.0,
-    "lateral_imbalance": 0.0,
-    "pallets_imbalance": 0.0,
-    "zfw_cg": 0.0,
-    "lw_cg": 0.0
+# Tiempo máximo (s) entre mensajes del stream de eventos; se envía un comentario para mantener la conexión
+SSE_KEEPALIVE_SECONDS = 15
+SUMMARY_FIELDS = ["total_carga", "tow_cg", "lateral_imbalance", "pallets_imbalance", "zfw_cg", "lw_cg"]
+DECKS = {"main_deck": "Main Deck", "lower_decks": "Lower Decks"}
+
+# Vuelos publicados en memoria; al superar MAX_FLIGHTS se descarta el usado hace más tiempo
+MAX_FLIGHTS = 20
+DEFAULT_FLIGHT = "default"
+# Se usa con fullmatch: con match, "$" aceptaría un salto de línea final
+FLIGHT_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,80}")
+
+# Vocabulario de las gráficas de deck_svg.py: cualquier SVG recibido se reconstruye solo con estos
+# elementos y atributos antes de guardarlo, ya que la página LIR lo inserta en línea
+SVG_NAMESPACE = "http://www.w3.org/2000/svg"
+SVG_ELEMENTS = {"svg", "g", "rect", "line", "text", "title"}
+SVG_ATTRIBUTES = {
+    "viewBox", "width", "height", "x", "y", "x1", "y1", "x2", "y2", "fill", "fill-opacity", "stroke",
+    "stroke-width", "stroke-dasharray", "font-family", "font-size", "font-weight", "text-anchor",
+    "dominant-baseline", "class", "data-position"
 }
-data_lock = Lock()
+SVG_UNSAFE_VALUE = re.compile(r"javascript:|url\(|expression\(", re.IGNORECASE)
+# Las respuestas de /deck no ejecutan scripts aunque se abran directamente en el navegador
+DECK_SECURITY_HEADERS = {
+    "Content-Security-Policy": "default-src 'none'; style-src 'unsafe-inline'; img-src data:; script-src 'none'",
+    "X-Content-Type-Options": "nosniff"
+}
+
+
+class FlightChannel:
+    """
+    Estado publicado de un vuelo. Cada vuelo tiene su propio bloqueo, de modo que los visores y
+    las actualizaciones de un vuelo no compiten con los de los demás. `version` (revisión del plan)
+    sube solo cuando cambia el contenido; las gráficas se guardan ya decodificadas como
+    (bytes, mimetype, etag) para servirlas por URL.
+    """
+
+    def __init__(self, flight_id):
+        self.flight_id = flight_id
+        self.data = {
+            "version": 0,
+            "main_deck": None,
+            "lower_decks": None,
+            **{field: 0.0 for field in SUMMARY_FIELDS}
+        }
+        self.updated_at = None
+        self.lock = Lock()
+        self.changed = Condition(self.lock)
+
+    def snapshot(self):
+        """Estado publicado (versión, resumen y URL versionada de cada gráfica); llamar con `lock` tomado."""
+        decks = {}
+        for name in DECKS:
+            deck = self.data[name]
+            decks[name] = {"url": f"/deck/{self.flight_id}/{name}?v={deck[2]}", "svg": deck[1] == "image/svg+xml"} if deck else None
+        return {
+            "version": self.data["version"],
+            "summary": {field: self.data[field] for field in SUMMARY_FIELDS},
+            "decks": decks
+        }
+
+    def update(self, decks, summary):
+        """
+        Publica una nueva revisión si el contenido cambió.
+
+        Returns:
+            tuple: (si cambió, versión actual).
+        """
+        with self.changed:
+            changed = any(self.data[name] != deck for name, deck in decks.items()) or any(
+                self.data[field] != value for field, value in summary.items()
+            )
+            if changed:
+                self.data.update(decks)
+                self.data.update(summary)
+                self.data["version"] += 1
+                self.updated_at = time.time()
+                self.changed.notify_all()
+            return changed, self.data["version"]
+
+
+flights = OrderedDict()
+flights_lock = Lock()
+
+
+def get_channel(flight_id, create=False):
+    """
+    Canal del vuelo (LRU); el bloqueo global solo se toma para buscarlo en el mapa.
+
+    Args:
+        flight_id (str): Identificador del vuelo (matrícula, vuelo y fecha).
+        create (bool): Si se crea el canal cuando no existe.
+
+    Returns:
+        FlightChannel | None
+    """
+    with flights_lock:
+        channel = flights.get(flight_id)
+        if channel is None:
+            if not create:
+                return None
+            channel = flights[flight_id] = FlightChannel(flight_id)
+            while len(flights) > MAX_FLIGHTS:
+                flights.popitem(last=False)
+        flights.move_to_end(flight_id)
+        return channel
+
+
+class InvalidUpdate(ValueError):
+    """Publicación de /update_images con datos inválidos (se responde 400)."""
+
+
+class InvalidDeck(InvalidUpdate):
+    """Gráfica recibida que no es PNG, JPEG ni un SVG con el formato de deck_svg.py."""
+
+
+def sanitize_svg(content):
+    """
+    Reconstruye un SVG de deck_svg.py conservando solo SVG_ELEMENTS y SVG_ATTRIBUTES (sin
+    scripts, manejadores de eventos, enlaces ni estilos), con textos y valores escapados.
+
+    Args:
+        content (bytes): SVG recibido.
+
+    Returns:
+        bytes: SVG reconstruido.
+
+    Raises:
+        InvalidDeck: Si no es un SVG válido o contiene elementos fuera del vocabulario.
+    """
+    if b"<!DOCTYPE" in content.upper() or b"<!ENTITY" in content.upper():
+        raise InvalidDeck("El SVG no puede declarar DOCTYPE ni entidades")
+    try:
+        root = ElementTree.fromstring(content)
+    except ElementTree.ParseError as e:
+        raise InvalidDeck(f"SVG inválido: {e}")
+
+    def build(element):
+        namespace, _, tag = element.tag[1:].partition("}") if element.tag.startswith("{") else ("", "", element.tag)
+        if namespace != SVG_NAMESPACE or tag not in SVG_ELEMENTS:
+            raise InvalidDeck(f"Elemento no permitido en el SVG: {element.tag}")
+        attributes = []
+        for name, value in element.attrib.items():
+            if name not in SVG_ATTRIBUTES or SVG_UNSAFE_VALUE.search(value):
+                raise InvalidDeck(f"Atributo no permitido en el SVG: {name}")
+            attributes.append(f' {name}="{escape(value, quote=True)}"')
+        if tag == "svg":
+            attributes.insert(0, f' xmlns="{SVG_NAMESPACE}"')
+        children = "".join(build(child) + escape(child.tail or "", quote=False) for child in element)
+        return f"<{tag}{''.join(attributes)}>{escape(element.text or '', quote=False)}{children}</{tag}>"
+
+    if root.tag != f"{{{SVG_NAMESPACE}}}svg":
+        raise InvalidDeck("El documento no es un SVG")
+    return build(root).encode("utf-8")
+
+
+def deck_content(content):
+    """
+    Gráfica recibida como (bytes, mimetype, etag). El tipo se determina por el contenido y no por
+    lo que declara el cliente: PNG, JPEG o SVG (reconstruido con `sanitize_svg`).
+
+    Raises:
+        InvalidDeck: Si el contenido no es de ninguno de esos tipos.
+    """
+    if content.startswith(b"\x89PNG\r\n\x1a\n"):
+        mimetype = "image/png"
+    elif content.startswith(b"\xff\xd8\xff"):
+        mimetype = "image/jpeg"
+    else:
+        content, mimetype = sanitize_svg(content), "image/svg+xml"
+    return content, mimetype, hashlib.sha1(content).hexdigest()
+
+
+def summary_values(source):
+    """
+    Valores del resumen (SUMMARY_FIELDS) como números; los que faltan quedan en 0.
+
+    Raises:
+        InvalidUpdate: Si algún valor no es un número finito.
+    """
+    summary = {}
+    for field in SUMMARY_FIELDS:
+        value = source.get(field, 0.0)
+        try:
+            summary[field] = float(value)
+        except (TypeError, ValueError):
+            raise InvalidUpdate(f"Valor inválido para {field}: {value!r}")
+        if not math.isfinite(summary[field]):
+            raise InvalidUpdate(f"Valor inválido para {field}: {value!r}")
+    return summary
+
+
+def decode_deck(svg, image_base64):
+    """Gráfica recibida en JSON como (bytes, mimetype, etag): el SVG si se envió, si no la imagen en base64."""
+    if any(value is not None and not isinstance(value, str) for value in (svg, image_base64)):
+        raise InvalidDeck("La gráfica debe enviarse como texto")
+    if svg:
+        return deck_content(svg.encode("utf-8"))
+    if image_base64:
+        try:
+            return deck_content(base64.b64decode(image_base64))
+        except binascii.Error as e:
+            raise InvalidDeck(f"Imagen en base64 inválida: {e}")
+    return None
+
+
+@app.route('/', methods=['GET'])
+def index():
+    """Vuelos activos con su revisión y hora de la última actualización."""
+    with flights_lock:
+        channels = list(flights.values())
+    rows = []
+    for channel in sorted(channels, key=lambda c: c.updated_at or 0, reverse=True):
+        updated_at = datetime.fromtimestamp(channel.updated_at).strftime("%d/%m/%Y %H:%M:%S") if channel.updated_at else "-"
+        rows.append(
+            f"<tr><td><a href='/pallet_distribution/{escape(channel.flight_id)}'>{escape(channel.flight_id)}</a></td>"
+            f"<td>{channel.data['version']}</td><td>{updated_at}</td></tr>"
+        )
+    return f"""
+    <!DOCTYPE html>
+    <html lang="en">
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>Vuelos Activos - LIR</title>
+        <style>
+            body {{ font-family: Arial, sans-serif; margin: 20px; background-color: #f4f4f4; }}
+            table {{ border-collapse: collapse; background-color: white; }}
+            th, td {{ padding: 8px 16px; border-bottom: 1px solid #ddd; text-align: left; }}
+        </style>
+    </head>
+    <body>
+        <h1>Vuelos Activos</h1>
+        {"<table><tr><th>Vuelo</th><th>Revisión</th><th>Última actualización</th></tr>" + "".join(rows) + "</table>" if rows else "<p>No hay vuelos publicados.</p>"}
+    </body>
+    </html>
+    """
+
 
 @app.route('/pallet_distribution', methods=['GET'])
-def pallet_distribution():
-    with data_lock:
-        main_deck_base64 = data["main_deck_base64"]
-        lower_decks_base64 = data["lower_decks_base64"]
-        total_carga = data["total_carga"]
-        tow_cg = data["tow_cg"]
-        lateral_imbalance = data["lateral_imbalance"]
-        pallets_imbalance = data["pallets_imbalance"]
-        zfw_cg = data["zfw_cg"]
-        lw_cg = data["lw_cg"]
-    
+def latest_pallet_distribution():
+    """Compatibilidad con el enlace anterior: redirige al vuelo actualizado más recientemente."""
+    with flights_lock:
+        channels = [channel for channel in flights.values() if channel.updated_at]
+    if not channels:
+        return redirect('/')
+    latest = max(channels, key=lambda c: c.updated_at)
+    return redirect(f'/pallet_distribution/{latest.flight_id}')
+
+
+@app.route('/pallet_distribution/<flight_id>', methods=['GET'])
+def pallet_distribution(flight_id):
+    channel = get_channel(flight_id)
+    if channel is None:
+        return f"<p>El vuelo {escape(flight_id)} no está publicado. <a href='/'>Ver vuelos activos</a></p>", 404
+    with channel.lock:
+        state = channel.snapshot()
+    summary = state["summary"]
+
     html_content = f"""
     <!DOCTYPE html>
     <html lang="en">
     <head>
         <meta charset="UTF-8">
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Distribución de Pallets</title>
+        <title>Distribución de Pallets - {escape(flight_id)}</title>
         <style>
             body {{
                 font-family: Arial, sans-serif;
@@ -66,7 +311,7 @@ def pallet_distribution():
                 box-shadow: 0 2px 4px rgba(0,0,0,0.1);
                 text-align: center;
             }}
-            .deck img {{
+            .deck img, .deck svg {{
                 max-width: 100%;
                 height: auto;
             }}
@@ -74,53 +319,177 @@ def pallet_distribution():
                 color: #333;
                 margin-bottom: 10px;
             }}
+            #status {{
+                color: #777;
+            }}
         </style>
-        <script>
-            // Recargar la página cada 10 segundos
-            setInterval(function() {{
-                location.reload();
-            }}, 10000);
-        </script>
     </head>
     <body>
-        <h1>Distribución de Pallets</h1>
-        <p>Esta página se actualiza automáticamente cada 10 segundos.</p>
+        <h1>Distribución de Pallets - {escape(flight_id)}</h1>
+        <p><a href="/">Vuelos activos</a></p>
+        <p id="status">Esta página se actualiza automáticamente cuando cambia el plan de carga.</p>
         <div class="header">
-            <p><strong>Peso Total Carga Asignada:</strong> {total_carga:,.1f} kg</p>
-            <p><strong>TOW CG:</strong> {tow_cg:,.1f}% MAC</p>
-            <p><strong>Desbalance Lateral:</strong> {lateral_imbalance:,.1f} kg.m</p>
-            <p><strong>Desbalance de Pallets (MD, LDA, LDF):</strong> {pallets_imbalance:,.1f} kg</p>
-            <p><strong>ZFW CG:</strong> {zfw_cg:,.1f}% MAC</p>
-            <p><strong>LW CG:</strong> {lw_cg:,.1f}% MAC</p>
+            <p><strong>Peso Total Carga Asignada:</strong> <span data-field="total_carga">{summary["total_carga"]:,.1f}</span> kg</p>
+            <p><strong>TOW CG:</strong> <span data-field="tow_cg">{summary["tow_cg"]:,.1f}</span>% MAC</p>
+            <p><strong>Desbalance Lateral:</strong> <span data-field="lateral_imbalance">{summary["lateral_imbalance"]:,.1f}</span> kg.m</p>
+            <p><strong>Desbalance de Pallets (MD, LDA, LDF):</strong> <span data-field="pallets_imbalance">{summary["pallets_imbalance"]:,.1f}</span> kg</p>
+            <p><strong>ZFW CG:</strong> <span data-field="zfw_cg">{summary["zfw_cg"]:,.1f}</span>% MAC</p>
+            <p><strong>LW CG:</strong> <span data-field="lw_cg">{summary["lw_cg"]:,.1f}</span>% MAC</p>
         </div>
         <div class="container">
             <div class="deck">
                 <h2>Main Deck (MD)</h2>
-                {"<img src='data:image/png;base64," + main_deck_base64 + "' alt='Main Deck'>" if main_deck_base64 else "<p>No disponible</p>"}
+                <div id="main_deck"><p>No disponible</p></div>
             </div>
             <div class="deck">
                 <h2>Lower Decks (LDF/LDA)</h2>
-                {"<img src='data:image/png;base64," + lower_decks_base64 + "' alt='Lower Decks'>" if lower_decks_base64 else "<p>No disponible</p>"}
+                <div id="lower_decks"><p>No disponible</p></div>
             </div>
         </div>
+        <script>
+            // Las gráficas se cargan una vez por URL versionada (el navegador las revalida con ETag);
+            // el servidor avisa por Server-Sent Events solo cuando cambia la versión del plan.
+            const deckUrls = {{}};
+            const format = value => Number(value).toLocaleString("en-US", {{minimumFractionDigits: 1, maximumFractionDigits: 1}});
+
+            function showDeck(name, deck) {{
+                const container = document.getElementById(name);
+                if (!deck) {{
+                    deckUrls[name] = null;
+                    container.innerHTML = "<p>No disponible</p>";
+                    return;
+                }}
+                if (deckUrls[name] === deck.url) return;
+                deckUrls[name] = deck.url;
+                if (deck.svg) {{
+                    // En línea para conservar el detalle de cada pallet al pasar el cursor; el servidor
+                    // solo guarda SVG reconstruido con sanitize_svg (sin scripts ni manejadores)
+                    fetch(deck.url).then(response => response.text()).then(svg => {{
+                        if (deckUrls[name] === deck.url) container.innerHTML = svg;
+                    }});
+                }} else {{
+                    container.innerHTML = "<img src='" + deck.url + "' alt='" + name + "'>";
+                }}
+            }}
+
+            function applyUpdate(update) {{
+                for (const [field, value] of Object.entries(update.summary || {{}})) {{
+                    const element = document.querySelector("[data-field='" + field + "']");
+                    if (element) element.textContent = format(value);
+                }}
+                for (const [name, deck] of Object.entries(update.decks || {{}})) {{
+                    showDeck(name, deck);
+                }}
+            }}
+
+            applyUpdate({json.dumps(state)});
+            const source = new EventSource("/events/{flight_id}?since={state["version"]}");
+            source.addEventListener("update", event => applyUpdate(JSON.parse(event.data)));
+            source.onerror = () => {{ document.getElementById("status").textContent = "Reconectando con el servidor..."; }};
+            source.onopen = () => {{ document.getElementById("status").textContent = "Esta página se actualiza automáticamente cuando cambia el plan de carga."; }};
+        </script>
     </body>
     </html>
     """
     return html_content
 
+
+@app.route('/deck/<flight_id>/<name>', methods=['GET'])
+def deck_image(flight_id, name):
+    """Gráfica de una bodega con ETag; con `?v=` (URL versionada) el navegador puede guardarla en caché."""
+    channel = get_channel(flight_id)
+    if channel is None or name not in DECKS:
+        return {"status": "error", "message": "Vuelo o bodega desconocidos"}, 404
+    with channel.lock:
+        deck = channel.data[name]
+    if deck is None:
+        return {"status": "error", "message": "No disponible"}, 404
+    content, mimetype, etag = deck
+    response = Response(content, mimetype=mimetype, headers=DECK_SECURITY_HEADERS)
+    response.set_etag(etag)
+    if request.args.get("v") == etag:
+        response.cache_control.public = True
+        response.cache_control.max_age = 86400
+    else:
+        response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+@app.route('/events/<flight_id>', methods=['GET'])
+def events(flight_id):
+    """
+    Stream de Server-Sent Events del vuelo: un evento `update` por cada versión nueva del plan,
+    con solo los valores del resumen que cambiaron y las URL de las gráficas.
+    """
+    channel = get_channel(flight_id)
+    if channel is None:
+        return {"status": "error", "message": "Vuelo desconocido"}, 404
+    since = request.headers.get("Last-Event-ID") or request.args.get("since", "")
+    try:
+        last_version = int(since)
+    except ValueError:
+        last_version = -1
+
+    def stream():
+        nonlocal last_version
+        with channel.lock:
+            last_summary = channel.snapshot()["summary"] if last_version == channel.data["version"] else {}
+        while True:
+            with channel.changed:
+                changed = channel.changed.wait_for(lambda: channel.data["version"] != last_version, timeout=SSE_KEEPALIVE_SECONDS)
+                state = channel.snapshot() if changed else None
+            if state is None:
+                yield ": keep-alive\n\n"
+                continue
+            summary = state["summary"]
+            state["summary"] = {field: value for field, value in summary.items() if last_summary.get(field) != value}
+            last_version, last_summary = state["version"], summary
+            yield f"id: {last_version}\nevent: update\ndata: {json.dumps(state)}\n\n"
+
+    return Response(
+        stream_with_context(stream()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def uploaded_deck(name):
+    """Gráfica subida como archivo del multipart, como (bytes, mimetype, etag)."""
+    uploaded = request.files.get(name)
+    if uploaded is None:
+        return None
+    return deck_content(uploaded.read())
+
+
 @app.route('/update_images', methods=['POST'])
 def update_images():
-    received_data = request.get_json()
-    with data_lock:
-        data["main_deck_base64"] = received_data.get("main_deck_base64")
-        data["lower_decks_base64"] = received_data.get("lower_decks_base64")
-        data["total_carga"] = received_data.get("total_carga", 0.0)
-        data["tow_cg"] = received_data.get("tow_cg", 0.0)
-        data["lateral_imbalance"] = received_data.get("lateral_imbalance", 0.0)
-        data["pallets_imbalance"] = received_data.get("pallets_imbalance", 0.0)
-        data["zfw_cg"] = received_data.get("zfw_cg", 0.0)
-        data["lw_cg"] = received_data.get("lw_cg", 0.0)
-    return {"status": "success"}, 200
+    try:
+        return publish_update()
+    except InvalidUpdate as e:
+        return {"status": "error", "message": str(e)}, 400
+
+
+def publish_update():
+    if request.mimetype in ("multipart/form-data", "application/x-www-form-urlencoded"):
+        # Publicador en segundo plano (lir_publisher.py): bytes de cada gráfica y resumen como campos
+        flight_id = request.form.get("flight_id") or DEFAULT_FLIGHT
+        decks = {name: uploaded_deck(name) for name in DECKS}
+        summary = summary_values(request.form)
+    else:
+        received_data = request.get_json()
+        if not isinstance(received_data, dict):
+            raise InvalidUpdate("El cuerpo JSON debe ser un objeto")
+        flight_id = received_data.get("flight_id") or DEFAULT_FLIGHT
+        decks = {
+            name: decode_deck(received_data.get(f"{name}_svg"), received_data.get(f"{name}_base64"))
+            for name in DECKS
+        }
+        summary = summary_values(received_data)
+    if not isinstance(flight_id, str) or not FLIGHT_ID_PATTERN.fullmatch(flight_id):
+        return {"status": "error", "message": "Identificador de vuelo inválido"}, 400
+    changed, version = get_channel(flight_id, create=True).update(decks, summary)
+    return {"status": "success", "flight_id": flight_id, "version": version, "changed": changed}, 200
+
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000, debug=False)
\ No newline at end of file
+    app.run(host="0.0.0.0", port=5000, debug=False, threaded=True)
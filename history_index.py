@@ -0,0 +1,407 @@
+"""
+Índice SQLite del historial de cálculos (JSON exportados en `Output/`).
+
+Cada exportación agrega su fila al índice y una carga inicial (`backfill`) incorpora los
+archivos existentes, de modo que la página de historial se arma con una consulta en lugar de
+abrir todos los JSON. El índice guarda los datos de la tabla (matrícula, vuelo, fecha, ruta,
+usuario, pesos, %MAC, underload, alertas de límites) y las rutas de los archivos; la página
+consulta solo la página de filas visible (`query`) y el JSON completo solo se lee al
+previsualizar un cálculo.
+"""
+import bisect
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+
+import pandas as pd
+
+from wb_engine.diagnostics import Diagnostics
+from wb_engine.envelope import load_envelope, resolve_envelope_path
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+HISTORY_DB_PATH = os.path.join(APP_DIR, "history.db")
+HISTORY_PAGE_SIZE = 50
+
+# Columna SQL -> nombre en la tabla de historial
+HISTORY_COLUMNS = {
+    "matricula": "Matrícula",
+    "numero_vuelo": "Número de Vuelo",
+    "fecha": "Fecha",
+    "ruta": "Ruta",
+    "total_carga": "Peso Total de Carga (kg)",
+    "bow": "BOW (kg)",
+    "takeoff_fuel": "TakeOff Fuel (kg)",
+    "mzfw": "MZFWD (kg)",
+    "trip_fuel": "Trip Fuel (kg)",
+    "tow_mac": "TOW CG (% MAC)",
+    "zfw_mac": "ZFW CG (% MAC)",
+    "zfw": "ZFW (kg)",
+    "tow": "TOW (kg)",
+    "underload": "Underload (kg)",
+    "posiciones": "Posiciones Asignadas",
+    "usuario": "Usuario",
+    "licencia": "Licencia",
+    "fuera_limites": "Fuera de Límites",
+    "alertas": "Alertas",
+    "json_path": "JSON File",
+    "excel_path": "Excel File"
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS calculations (
+    json_path TEXT PRIMARY KEY,
+    json_mtime REAL,
+    matricula TEXT,
+    numero_vuelo TEXT,
+    fecha TEXT,
+    fecha_iso TEXT,
+    ruta TEXT,
+    revision TEXT,
+    usuario TEXT,
+    licencia TEXT,
+    total_carga REAL,
+    bow REAL,
+    takeoff_fuel REAL,
+    mzfw REAL,
+    trip_fuel REAL,
+    tow_mac REAL,
+    zfw_mac REAL,
+    lw_mac REAL,
+    zfw REAL,
+    tow REAL,
+    underload REAL,
+    posiciones INTEGER,
+    fuera_limites INTEGER,
+    alertas TEXT,
+    excel_path TEXT,
+    pdf_path TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_calculations_matricula ON calculations (matricula);
+CREATE INDEX IF NOT EXISTS idx_calculations_numero_vuelo ON calculations (numero_vuelo);
+CREATE INDEX IF NOT EXISTS idx_calculations_fecha ON calculations (fecha_iso);
+CREATE INDEX IF NOT EXISTS idx_calculations_ruta ON calculations (ruta);
+CREATE INDEX IF NOT EXISTS idx_calculations_usuario ON calculations (usuario);
+CREATE INDEX IF NOT EXISTS idx_calculations_tow_mac ON calculations (tow_mac);
+CREATE INDEX IF NOT EXISTS idx_calculations_zfw_mac ON calculations (zfw_mac);
+CREATE INDEX IF NOT EXISTS idx_calculations_underload ON calculations (underload);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+# Índices de columnas agregadas después de la primera versión del esquema (ver `_migrate`)
+LATE_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_calculations_fuera_limites ON calculations (fuera_limites, fecha_iso);
+"""
+
+RECORD_FIELDS = [
+    "json_path", "json_mtime", "matricula", "numero_vuelo", "fecha", "fecha_iso", "ruta", "revision",
+    "usuario", "licencia", "total_carga", "bow", "takeoff_fuel", "mzfw", "trip_fuel", "tow_mac",
+    "zfw_mac", "lw_mac", "zfw", "tow", "underload", "posiciones", "fuera_limites", "alertas",
+    "excel_path", "pdf_path"
+]
+# Columnas por las que se puede ordenar la tabla (la fecha se ordena por su valor ISO)
+SORT_COLUMNS = {
+    "fecha": "fecha_iso", "matricula": "matricula", "numero_vuelo": "numero_vuelo", "ruta": "ruta",
+    "usuario": "usuario", "total_carga": "total_carga", "tow_mac": "tow_mac", "zfw_mac": "zfw_mac",
+    "underload": "underload"
+}
+
+
+def user_from_filename(json_file):
+    """
+    Usuario y licencia a partir del nombre del JSON ("..._W&B_<usuario>_<licencia>.json").
+
+    Returns:
+        tuple: (usuario, licencia).
+    """
+    filename_parts = os.path.basename(json_file).split("_W&B_")
+    if len(filename_parts) > 1:
+        user_license = filename_parts[1].replace(".json", "")
+        user_parts = user_license.rsplit("_", 1)
+        if len(user_parts) > 1:
+            return user_parts[0], user_parts[1]
+    return "Desconocido", "Sin Licencia"
+
+
+def date_iso(fecha):
+    """Fecha "DD/MM/YYYY" en formato ISO para ordenar y filtrar por rango (None si no se reconoce)."""
+    try:
+        return datetime.strptime(str(fecha).strip(), "%d/%m/%Y").date().isoformat()
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=32)
+def _tail_envelope(aircraft_folder, envelope_path, mtime):
+    return load_envelope(aircraft_folder, Diagnostics())
+
+
+def tail_envelope(matricula):
+    """
+    Envolvente de la aeronave (carpeta con el nombre de la matrícula; si no tiene envelope.csv,
+    la de su modelo), o None si la matrícula no tiene carpeta o no hay envolvente.
+    """
+    aircraft_folder = os.path.join(APP_DIR, str(matricula))
+    if not matricula or not os.path.isdir(aircraft_folder):
+        return None
+    envelope_path, _ = resolve_envelope_path(aircraft_folder)
+    if not os.path.exists(envelope_path):
+        return None
+    return _tail_envelope(aircraft_folder, envelope_path, os.path.getmtime(envelope_path))
+
+
+def limit_alerts(matricula, calculated_values):
+    """
+    Alertas de límites del cálculo: sobrepeso (underload negativo) y ZFW/TOW/LW fuera de la
+    envolvente de su fase, si hay envolvente para la aeronave o su modelo.
+
+    Returns:
+        list: Textos de las alertas.
+    """
+    def value(key):
+        try:
+            return float(calculated_values.get(key, 0.0) or 0.0)
+        except (TypeError, ValueError):
+            return 0.0
+
+    alerts = []
+    if value("underload") < 0:
+        alerts.append("Sobrepeso")
+    envelope = tail_envelope(matricula)
+    points = (("ZFW", "zfw_peso", "zfw_mac", "cruise"), ("TOW", "tow", "tow_mac", "takeoff"), ("LW", "lw", "lw_mac", "landing"))
+    if envelope is not None and all(value(weight) > 0 for _, weight, _, _ in points):
+        check = envelope.check(
+            [value(weight) for _, weight, _, _ in points],
+            [value(mac) for _, _, mac, _ in points],
+            tuple(phase for _, _, _, phase in points)
+        )
+        alerts.extend(f"{name} fuera de envolvente" for i, (name, _, _, _) in enumerate(points) if not check.inside[i, i])
+    return alerts
+
+
+def calculation_record(json_path, data, excel_path=None, pdf_path=None):
+    """
+    Fila del índice para un cálculo exportado.
+
+    Args:
+        json_path (str): Ruta del JSON.
+        data (dict): Contenido del JSON.
+        excel_path (str, optional): Ruta del .xlsm correspondiente.
+        pdf_path (str, optional): Ruta del PDF correspondiente.
+
+    Returns:
+        dict: Valores de las columnas de `calculations`.
+    """
+    flight_info = data.get("flight_info", {})
+    calculated_values = data.get("calculated_values", {})
+    manifest_df = pd.DataFrame(data.get("manifest_data", []))
+    usuario, licencia = user_from_filename(json_path)
+    alerts = limit_alerts(flight_info.get("matricula", ""), calculated_values)
+
+    def value(key):
+        try:
+            return float(calculated_values.get(key, 0.0) or 0.0)
+        except (TypeError, ValueError):
+            return 0.0
+
+    return {
+        "json_path": os.path.abspath(json_path),
+        "json_mtime": os.path.getmtime(json_path) if os.path.exists(json_path) else None,
+        "matricula": flight_info.get("matricula", "N/A"),
+        "numero_vuelo": flight_info.get("numero_vuelo", "N/A"),
+        "fecha": flight_info.get("fecha_vuelo", "N/A"),
+        "fecha_iso": date_iso(flight_info.get("fecha_vuelo", "")),
+        "ruta": flight_info.get("ruta_vuelo", "N/A"),
+        "revision": str(flight_info.get("revision", "")),
+        "usuario": usuario,
+        "licencia": licencia,
+        "total_carga": float(manifest_df["Weight (KGS)"].sum()) if "Weight (KGS)" in manifest_df else 0.0,
+        "bow": value("bow"),
+        "takeoff_fuel": value("fuel_kg") - value("taxi_fuel"),
+        "mzfw": value("mzfw_dynamic"),
+        "trip_fuel": value("trip_fuel"),
+        "tow_mac": value("tow_mac"),
+        "zfw_mac": value("zfw_mac"),
+        "lw_mac": value("lw_mac"),
+        "zfw": value("zfw_peso"),
+        "tow": value("tow"),
+        "underload": value("underload"),
+        "posiciones": int((manifest_df["Posición Asignada"] != "").sum()) if "Posición Asignada" in manifest_df else 0,
+        "fuera_limites": int(bool(alerts)),
+        "alertas": "; ".join(alerts),
+        "excel_path": os.path.abspath(excel_path) if excel_path else None,
+        "pdf_path": os.path.abspath(pdf_path) if pdf_path else None
+    }
+
+
+class HistoryIndex:
+    """Índice del historial en SQLite; abre una conexión por operación (seguro entre hilos)."""
+
+    def __init__(self, db_path=HISTORY_DB_PATH):
+        self.db_path = db_path
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            self._migrate(conn)
+            conn.executescript(LATE_INDEXES)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _migrate(self, conn):
+        """Agrega las columnas nuevas a una base existente y fuerza a reindexar sus filas."""
+        existing = {row["name"] for row in conn.execute("PRAGMA table_info(calculations)")}
+        added = [field for field in RECORD_FIELDS if field not in existing]
+        for field in added:
+            column_type = "INTEGER" if field == "fuera_limites" else "TEXT"
+            conn.execute(f"ALTER TABLE calculations ADD COLUMN {field} {column_type}")
+        if added:
+            conn.execute("UPDATE calculations SET json_mtime = NULL")
+            conn.execute("DELETE FROM meta WHERE key = 'backfill'")
+
+    def upsert(self, records):
+        """Agrega o reemplaza filas (ver `calculation_record`)."""
+        rows = [tuple(record.get(field) for field in RECORD_FIELDS) for record in records]
+        with self._connect() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO calculations ({', '.join(RECORD_FIELDS)}) "
+                f"VALUES ({', '.join('?' for _ in RECORD_FIELDS)})",
+                rows
+            )
+
+    def add_export(self, json_path, data, excel_path=None, pdf_path=None):
+        """Registra un cálculo recién exportado."""
+        self.upsert([calculation_record(json_path, data, excel_path, pdf_path)])
+
+    def is_backfilled(self):
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'backfill'").fetchone()
+        return row is not None
+
+    def backfill(self, output_dir):
+        """
+        Indexa los JSON de `output_dir` que faltan o cambiaron desde la última carga, y quita
+        las filas cuyos archivos ya no existen.
+
+        Args:
+            output_dir (str): Carpeta Output.
+
+        Returns:
+            tuple: (filas agregadas o actualizadas, lista de (archivo, error) no indexados).
+        """
+        files = sorted(os.listdir(output_dir)) if os.path.isdir(output_dir) else []
+        excel_files = [f for f in files if f.endswith(".xlsm")]
+        with self._connect() as conn:
+            indexed = {row["json_path"]: row["json_mtime"] for row in conn.execute("SELECT json_path, json_mtime FROM calculations")}
+
+        records, errors, present = [], [], set()
+        for json_file in (f for f in files if f.endswith(".json")):
+            json_path = os.path.abspath(os.path.join(output_dir, json_file))
+            present.add(json_path)
+            if indexed.get(json_path) == os.path.getmtime(json_path):
+                continue
+            # Excel correspondiente: el primero cuyo nombre empieza con la parte anterior a "_W&B_"
+            filename_parts = json_file.split("_W&B_")
+            json_base = filename_parts[0] if len(filename_parts) > 1 else os.path.splitext(json_file)[0]
+            position = bisect.bisect_left(excel_files, json_base)
+            excel_path = None
+            if position < len(excel_files) and excel_files[position].startswith(json_base):
+                excel_path = os.path.join(output_dir, excel_files[position])
+            pdf_path = excel_path.replace(".xlsm", ".pdf") if excel_path else None
+            try:
+                with open(json_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                records.append(calculation_record(json_path, data, excel_path, pdf_path if pdf_path and os.path.exists(pdf_path) else None))
+            except Exception as e:
+                errors.append((json_file, str(e)))
+
+        self.upsert(records)
+        removed = [path for path in indexed if path not in present and path.startswith(os.path.abspath(output_dir))]
+        with self._connect() as conn:
+            conn.executemany("DELETE FROM calculations WHERE json_path = ?", [(path,) for path in removed])
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('backfill', ?)", (datetime.now().isoformat(),))
+        return len(records), errors
+
+    def distinct(self, column):
+        """Valores distintos de una columna indexada (para las opciones de los filtros)."""
+        if column not in ("matricula", "ruta", "usuario"):
+            raise ValueError(f"Columna no filtrable: {column}")
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute(
+                f"SELECT DISTINCT {column} FROM calculations WHERE {column} IS NOT NULL AND {column} != '' ORDER BY {column}"
+            )]
+
+    def query(self, matriculas=None, date_from=None, date_to=None, ruta=None, usuario=None,
+              fuera_limites=False, sort_by="fecha", descending=True, page=1, page_size=HISTORY_PAGE_SIZE):
+        """
+        Una página del historial filtrada y ordenada en SQLite.
+
+        Args:
+            matriculas (list, optional): Matrículas a incluir.
+            date_from (date | str, optional): Fecha de vuelo inicial (incluida).
+            date_to (date | str, optional): Fecha de vuelo final (incluida).
+            ruta (str, optional): Ruta exacta.
+            usuario (str, optional): Usuario exacto.
+            fuera_limites (bool): Solo cálculos con alertas de límites.
+            sort_by (str): Clave de SORT_COLUMNS.
+            descending (bool): Orden descendente.
+            page (int): Página (desde 1).
+            page_size (int): Filas por página.
+
+        Returns:
+            tuple: (pd.DataFrame con las columnas de HISTORY_COLUMNS, total de filas que cumplen los filtros).
+        """
+        conditions, params = [], []
+        if matriculas:
+            conditions.append(f"matricula IN ({', '.join('?' for _ in matriculas)})")
+            params.extend(matriculas)
+        if date_from:
+            conditions.append("fecha_iso >= ?")
+            params.append(str(date_from))
+        if date_to:
+            conditions.append("fecha_iso <= ?")
+            params.append(str(date_to))
+        if ruta:
+            conditions.append("ruta = ?")
+            params.append(ruta)
+        if usuario:
+            conditions.append("usuario = ?")
+            params.append(usuario)
+        if fuera_limites:
+            conditions.append("fuera_limites = 1")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        direction = "DESC" if descending else "ASC"
+        order = f"{SORT_COLUMNS.get(sort_by, 'fecha_iso')} {direction}, rowid {direction}"
+
+        with self._connect() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM calculations {where}", params).fetchone()[0]
+            # La página se ubica recorriendo solo el índice (rowid); luego se leen sus filas completas
+            history_df = pd.read_sql_query(
+                f"SELECT {', '.join(HISTORY_COLUMNS)} FROM calculations WHERE rowid IN ("
+                f"SELECT rowid FROM calculations {where} ORDER BY {order} LIMIT ? OFFSET ?"
+                f") ORDER BY {order}",
+                conn, params=params + [int(page_size), (max(int(page), 1) - 1) * int(page_size)]
+            )
+        history_df["fuera_limites"] = history_df["fuera_limites"].fillna(0).astype(bool)
+        return history_df.rename(columns=HISTORY_COLUMNS), total
+
+
+_history_index = None
+_history_index_lock = threading.Lock()
+
+
+def get_history_index():
+    """Índice del historial del proceso (crea la base de datos si no existe)."""
+    global _history_index
+    with _history_index_lock:
+        if _history_index is None:
+            _history_index = HistoryIndex()
+        return _history_index
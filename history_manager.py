@@ -5,6 +5,8 @@ import pandas as pd
 from io import BytesIO
 import base64
 
+from history_index import HISTORY_PAGE_SIZE, get_history_index
+
 def manage_calculation_history():
     st.title("Historial de Cálculos")
     st.write("Lista de cálculos de peso y balance almacenados en la carpeta Output.")
@@ -17,89 +19,68 @@ def manage_calculation_history():
         st.error(f"No se encontró la carpeta Output en: {output_dir}. Asegúrate de que exista y contenga archivos JSON.")
         return
 
-    # Obtener lista de archivos JSON
-    json_files = [f for f in os.listdir(output_dir) if f.endswith(".json")]
-    if not json_files:
-        st.info("No hay cálculos almacenados en la carpeta Output.")
+    # Historial desde el índice SQLite; la primera vez se indexan los JSON existentes en Output
+    history_index = get_history_index()
+    reindex = st.button("Reindexar carpeta Output", help="Incorpora al historial los archivos copiados manualmente a Output.")
+    if reindex or not history_index.is_backfilled():
+        with st.spinner("Indexando cálculos de la carpeta Output..."):
+            _, errors = history_index.backfill(output_dir)
+        for json_file, error in errors:
+            st.warning(f"Error al leer {json_file}: {error}")
+
+    # Filtros, orden y paginación se resuelven en SQLite; solo se carga la página visible
+    st.write("### Filtros")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        matriculas = st.multiselect("Matrícula", history_index.distinct("matricula"))
+        date_range = st.date_input("Rango de fechas", value=(), format="DD/MM/YYYY")
+    with col2:
+        ruta = st.selectbox("Ruta", [""] + history_index.distinct("ruta"), format_func=lambda x: x or "Todas")
+        usuario = st.selectbox("Usuario", [""] + history_index.distinct("usuario"), format_func=lambda x: x or "Todos")
+    with col3:
+        sort_options = {
+            "fecha": "Fecha", "matricula": "Matrícula", "numero_vuelo": "Número de Vuelo", "ruta": "Ruta",
+            "usuario": "Usuario", "total_carga": "Peso Total de Carga", "tow_mac": "TOW CG", "zfw_mac": "ZFW CG",
+            "underload": "Underload"
+        }
+        sort_by = st.selectbox("Ordenar por", list(sort_options), format_func=sort_options.get)
+        descending = st.checkbox("Orden descendente", value=True)
+        fuera_limites = st.checkbox("Solo fuera de límites", help="Sobrepeso o ZFW/TOW/LW fuera de la envolvente.")
+
+    date_from = date_range[0] if len(date_range) > 0 else None
+    date_to = date_range[1] if len(date_range) > 1 else date_from
+    filters = dict(
+        matriculas=matriculas, date_from=date_from, date_to=date_to, ruta=ruta or None,
+        usuario=usuario or None, fuera_limites=fuera_limites, sort_by=sort_by, descending=descending
+    )
+    # Volver a la primera página cuando cambian los filtros
+    if st.session_state.get("history_filters") != filters:
+        st.session_state.history_filters = filters
+        st.session_state.history_page = 1
+
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        page_size = st.selectbox("Filas por página", [25, HISTORY_PAGE_SIZE, 100], index=1)
+    history_df, total = history_index.query(page=st.session_state.history_page, page_size=page_size, **filters)
+    if total == 0:
+        st.info("No hay cálculos que cumplan los filtros." if any(filters[key] for key in ("matriculas", "date_from", "ruta", "usuario", "fuera_limites")) else "No hay cálculos almacenados en la carpeta Output.")
         return
-
-    # Preparar datos para la tabla
-    history_data = []
-    for json_file in json_files:
-        json_path = os.path.join(output_dir, json_file)
-        try:
-            with open(json_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-
-            flight_info = data.get("flight_info", {})
-            calculated_values = data.get("calculated_values", {})
-            manifest_data = data.get("manifest_data", [])
-
-            # Calcular peso total de carga y posiciones asignadas
-            manifest_df = pd.DataFrame(manifest_data)
-            total_carga = manifest_df["Weight (KGS)"].sum() if not manifest_df.empty else 0.0
-            posiciones_asignadas = len(manifest_df[manifest_df["Posición Asignada"] != ""]) if not manifest_df.empty else 0
-
-            # Extraer usuario y licencia del nombre del archivo
-            filename_parts = json_file.split("_W&B_")
-            if len(filename_parts) > 1:
-                user_license = filename_parts[1].replace(".json", "")
-                user_parts = user_license.rsplit("_", 1)
-                usuario = user_parts[0] if len(user_parts) > 1 else "Desconocido"
-                licencia = user_parts[1] if len(user_parts) > 1 else "Sin Licencia"
-            else:
-                usuario = "Desconocido"
-                licencia = "Sin Licencia"
-
-            # Calcular TakeOff Fuel
-            takeoff_fuel = calculated_values.get("fuel_kg", 0.0) - calculated_values.get("taxi_fuel", 0.0)
-
-            # Buscar archivo Excel correspondiente
-            # Extraer la parte del nombre antes de "_W&B_" (sin usuario ni licencia)
-            json_base = filename_parts[0] if len(filename_parts) > 1 else os.path.splitext(json_file)[0]
-            excel_path = None
-            for f in os.listdir(output_dir):
-                if f.endswith(".xlsm") and f.startswith(json_base):
-                    excel_path = os.path.join(output_dir, f)
-                    break
-
-            history_data.append({
-                "Matrícula": flight_info.get("matricula", "N/A"),
-                "Número de Vuelo": flight_info.get("numero_vuelo", "N/A"),
-                "Fecha": flight_info.get("fecha_vuelo", "N/A"),
-                "Ruta": flight_info.get("ruta_vuelo", "N/A"),
-                "Peso Total de Carga (kg)": total_carga,
-                "BOW (kg)": calculated_values.get("bow", 0.0),
-                "TakeOff Fuel (kg)": takeoff_fuel,
-                "MZFWD (kg)": calculated_values.get("mzfw_dynamic", 0.0),
-                "Trip Fuel (kg)": calculated_values.get("trip_fuel", 0.0),
-                "TOW CG (% MAC)": calculated_values.get("tow_mac", 0.0),
-                "ZFW CG (% MAC)": calculated_values.get("zfw_mac", 0.0),
-                "ZFW (kg)": calculated_values.get("zfw_peso", 0.0),
-                "TOW (kg)": calculated_values.get("tow", 0.0),
-                "Underload (kg)": calculated_values.get("underload", 0.0),
-                "Posiciones Asignadas": posiciones_asignadas,
-                "Usuario": usuario,
-                "Licencia": licencia,
-                "JSON File": json_path,
-                "Excel File": excel_path  # Puede ser None si no se encuentra
-            })
-
-        except Exception as e:
-            st.warning(f"Error al leer {json_file}: {str(e)}")
-            continue
-
-    # Crear DataFrame para la tabla
-    history_df = pd.DataFrame(history_data)
+    page_count = (total + page_size - 1) // page_size
+    with col2:
+        page = st.number_input("Página", min_value=1, max_value=page_count, value=min(st.session_state.history_page, page_count), step=1)
+    if page != st.session_state.history_page:
+        st.session_state.history_page = page
+        history_df, total = history_index.query(page=page, page_size=page_size, **filters)
 
     # Mostrar tabla
     st.write("### Lista de Cálculos")
+    st.caption(f"{total} cálculos · página {page} de {page_count}")
     st.dataframe(
         history_df[[
             "Matrícula", "Número de Vuelo", "Fecha", "Ruta", "Peso Total de Carga (kg)",
             "BOW (kg)", "TakeOff Fuel (kg)", "MZFWD (kg)", "Trip Fuel (kg)",
             "TOW CG (% MAC)", "ZFW CG (% MAC)", "ZFW (kg)", "TOW (kg)",
-            "Underload (kg)", "Posiciones Asignadas", "Usuario", "Licencia"
+            "Underload (kg)", "Posiciones Asignadas", "Usuario", "Licencia", "Fuera de Límites", "Alertas"
         ]],
         column_config={
             "Matrícula": st.column_config.TextColumn("Matrícula"),
@@ -118,8 +99,11 @@ def manage_calculation_history():
             "Underload (kg)": st.column_config.NumberColumn("Underload (kg)", format="%.1f"),
             "Posiciones Asignadas": st.column_config.NumberColumn("Posiciones Asignadas"),
             "Usuario": st.column_config.TextColumn("Usuario"),
-            "Licencia": st.column_config.TextColumn("Licencia")
+            "Licencia": st.column_config.TextColumn("Licencia"),
+            "Fuera de Límites": st.column_config.CheckboxColumn("Fuera de Límites"),
+            "Alertas": st.column_config.TextColumn("Alertas")
         },
+        hide_index=True,
         use_container_width=True
     )
 
@@ -128,7 +112,7 @@ def manage_calculation_history():
     selected_file = st.selectbox(
         "Seleccione un cálculo para previsualizar",
         history_df.index,
-        format_func=lambda x: f"{history_df.loc[x, 'Número de Vuelo']} - {history_df.loc[x, 'Fecha']}"
+        format_func=lambda x: f"{history_df.loc[x, 'Matrícula']} {history_df.loc[x, 'Número de Vuelo']} - {history_df.loc[x, 'Fecha']}"
     )
 
     if selected_file is not None:
@@ -194,4 +178,5 @@ def manage_calculation_history():
                     )
             else:
                 st.error("El archivo Excel no está disponible. Asegúrate de que el archivo .xlsm correspondiente esté en la carpeta Output.")
+                json_base = os.path.basename(json_path).split("_W&B_")[0]
                 st.write(f"**Nombre base del archivo JSON (sin usuario ni licencia):** {json_base}")
\ No newline at end of file
@@ -0,0 +1,146 @@
+"""
+Publicación del plan de carga en el servidor LIR (flask_server.py) desde un hilo en segundo plano.
+
+El script de Streamlit solo deja el último estado de cada vuelo (gráficas de las bodegas y resumen)
+y sigue; un hilo del proceso lo sube como multipart con los bytes de cada imagen, reutilizando las
+conexiones de un `requests.Session`. Si el contenido de un vuelo no cambió desde su última
+publicación no se envía nada, y si el servidor va atrasado solo se descartan los estados
+intermedios de ese mismo vuelo.
+"""
+import hashlib
+import json
+import re
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+LIR_SERVER_URL = "http://localhost:5000"
+# (conexión, lectura) en segundos
+PUBLISH_TIMEOUT = (3, 15)
+MIMETYPES = {"svg": "image/svg+xml", "jpeg": "image/jpeg", "png": "image/png"}
+
+
+def lir_flight_id(tail, numero_vuelo, fecha_vuelo):
+    """
+    Identificador del vuelo en el servidor LIR (cada vuelo tiene su propia página).
+
+    Args:
+        tail (str): Matrícula de la aeronave.
+        numero_vuelo (str): Número de vuelo.
+        fecha_vuelo (str): Fecha del vuelo (DD/MM/YYYY).
+
+    Returns:
+        str: Identificador apto para URL, p. ej. "N342AV-TPA4002-07_04_2025".
+    """
+    parts = [re.sub(r"[^A-Za-z0-9_]+", "_", str(part)).strip("_") for part in (tail, numero_vuelo, fecha_vuelo)]
+    return "-".join(part for part in parts if part)[:80] or "default"
+
+
+def lir_flight_url(flight_id, base_url=LIR_SERVER_URL):
+    """URL de la LIR paralela del vuelo."""
+    return f"{base_url}/pallet_distribution/{flight_id}"
+
+
+def content_hash(decks, summary):
+    """
+    Huella de lo que se publica.
+
+    Args:
+        decks (dict): Nombre de la bodega -> RenderedFigure (o None).
+        summary (dict): Valores del resumen.
+
+    Returns:
+        str: SHA-1 en hexadecimal.
+    """
+    digest = hashlib.sha1(json.dumps(summary, sort_keys=True).encode("utf-8"))
+    for name in sorted(decks):
+        deck = decks[name]
+        digest.update(name.encode("utf-8"))
+        if deck is not None:
+            digest.update(deck.format.encode("utf-8"))
+            digest.update(deck.data)
+    return digest.hexdigest()
+
+
+class LirPublisher:
+    """Último estado pendiente por vuelo e hilo que lo sube al servidor LIR."""
+
+    def __init__(self, base_url=LIR_SERVER_URL, timeout=PUBLISH_TIMEOUT):
+        self.url = f"{base_url}/update_images"
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=2, max_retries=1))
+        self._lock = threading.Lock()
+        self._pending_ready = threading.Condition(self._lock)
+        # Por flight_id: último estado sin enviar, huellas encolada/publicada y último error
+        self._pending = {}
+        self._queued_hash = {}
+        self._published_hash = {}
+        self._errors = {}
+        self._thread = threading.Thread(target=self._run, name="lir-publisher", daemon=True)
+        self._thread.start()
+
+    def publish(self, decks, summary, flight_id="default"):
+        """
+        Deja el estado como pendiente de publicar para su vuelo, salvo que sea igual al último
+        encolado de ese vuelo; un estado pendiente anterior del mismo vuelo se reemplaza.
+
+        Args:
+            decks (dict): Nombre de la bodega ("main_deck", "lower_decks") -> RenderedFigure o None.
+            summary (dict): Resumen para el encabezado (total_carga, tow_cg, ...).
+            flight_id (str): Vuelo al que pertenece el plan (ver `lir_flight_id`).
+
+        Returns:
+            str or None: Mensaje de error si falló el último envío de este vuelo, None si no.
+        """
+        summary = {field: float(value) for field, value in summary.items()}
+        form = {**summary, "flight_id": flight_id}
+        state_hash = content_hash(decks, form)
+        with self._pending_ready:
+            if state_hash != self._queued_hash.get(flight_id):
+                self._queued_hash[flight_id] = state_hash
+                self._pending[flight_id] = (state_hash, dict(decks), form)
+                self._pending_ready.notify()
+            return self._errors.get(flight_id)
+
+    def _run(self):
+        while True:
+            with self._pending_ready:
+                while not self._pending:
+                    self._pending_ready.wait()
+                # El vuelo que lleva más tiempo esperando
+                flight_id = next(iter(self._pending))
+                state_hash, decks, form = self._pending.pop(flight_id)
+                if state_hash == self._published_hash.get(flight_id):
+                    continue
+            files = {
+                name: (f"{name}.{deck.format}", deck.data, MIMETYPES.get(deck.format, "application/octet-stream"))
+                for name, deck in decks.items() if deck is not None
+            }
+            try:
+                response = self.session.post(self.url, data=form, files=files or None, timeout=self.timeout)
+                response.raise_for_status()
+            except requests.RequestException as e:
+                with self._lock:
+                    self._errors[flight_id] = f"Error al enviar la distribución al servidor LIR: {str(e)}"
+                    # Se reintenta en la próxima publicación aunque el contenido no cambie
+                    if self._queued_hash.get(flight_id) == state_hash:
+                        del self._queued_hash[flight_id]
+                continue
+            with self._lock:
+                self._published_hash[flight_id] = state_hash
+                self._errors.pop(flight_id, None)
+
+
+_publisher = None
+_publisher_lock = threading.Lock()
+
+
+def get_lir_publisher():
+    """Publicador del proceso (se crea al primer uso)."""
+    global _publisher
+    with _publisher_lock:
+        if _publisher is None:
+            _publisher = LirPublisher()
+        return _publisher
@@ -0,0 +1,213 @@
+"""
+Loadsheet del W&B en PDF generado con reportlab, sin Excel.
+
+Reproduce el área de impresión de `templates/template.xlsm` a partir de las mismas celdas que
+se escriben en la plantilla (ver `document_export.export_documents`): encabezado del vuelo,
+pesos y %MAC, combustible, carga por bodega, tripulación, condiciones de despegue, envelope,
+distribución de las bodegas y firmas. Las fórmulas de la plantilla (máximos TOW y LW
+permitidos) se calculan aquí.
+"""
+from io import BytesIO
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import landscape, letter
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Image, PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table
+
+PAGE_SIZE = landscape(letter)
+PAGE_MARGIN = 24
+
+# (etiqueta, celda) como en la plantilla
+HEADER_FIELDS = [
+    ("Operator", "A3"), ("Flight", "C3"), ("Date", "D3"), ("Registration", "E3"),
+    ("Origin - Destination", "F3"), ("Manifest Revision", "H3")
+]
+# (etiqueta, celda del peso, celda del %MAC); None deja una fila en blanco
+WEIGHT_ROWS = [
+    ("OEW", "B4", None), ("Trapped Fuel", "B5", None), ("Add/Removed Stuff", "B6", None),
+    ("BOW", "B7", None), ("Total Payload", "B8", None), ("MZFW", "B9", None),
+    ("Takeoff fuel", "B10", None), ("Maximum allowed TOW", "B11", None), ("Taxi fuel", "B12", None),
+    ("Trip Fuel", "B13", None), ("Maximum allowed LW", "B14", None), ("Underload", "B15", None),
+    ("Ramp Weight", "B16", None),
+    None,
+    ("ZFW / CG", "B18", "C18"), ("TOW / CG", "B19", "C19"), ("LW / CG", "B20", "C20"),
+    ("STAB TRIM", "B21", None),
+    None,
+    ("Crew", "B23", None), ("Passengers", "B24", None), ("Cargo MD", "B25", None),
+    ("Cargo LDF", "B26", None), ("Cargo LDA", "B27", None), ("Cargo Bulk", "B28", None),
+    ("Lateral Inbalance", "B29", None)
+]
+PERFORMANCE_ROWS = [
+    ("Runway", "E7"), ("Conf.", "E8"), ("Anti Ice.", "E9"), ("A/C.", "E10"), ("Wind.", "E11"),
+    ("Temp.", "E12"), ("Pressure Alt.", "E13")
+]
+# Celdas con formato numérico en la plantilla; el resto se muestra tal cual
+NUMBER_FORMATS = {
+    **{f"B{row}": "{:.0f}" for row in range(4, 21)},
+    **{f"C{row}": "{:.2f}" for row in (18, 19, 20)},
+    "B21": "{:.1f}", "B25": "{:.0f}", "B26": "{:.0f}", "B27": "{:.0f}", "B28": "{:.0f}", "B29": "{:.1f}"
+}
+ENVELOPE_ANCHOR = "G6"
+DECK_ANCHORS = [("Main Deck", "M6"), ("Lower Decks", "M21")]
+
+_styles = getSampleStyleSheet()
+GRID_STYLE = [
+    ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+    ("FONTSIZE", (0, 0), (-1, -1), 8),
+    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+    ("TOPPADDING", (0, 0), (-1, -1), 1.5),
+    ("BOTTOMPADDING", (0, 0), (-1, -1), 1.5)
+]
+
+
+def loadsheet_values(cells):
+    """
+    Celdas de la plantilla con las fórmulas resueltas.
+
+    Args:
+        cells (dict): Celda -> valor, como se escriben en `template.xlsm`.
+
+    Returns:
+        dict: Copia de `cells` con B11 (=MIN(B36:B38), B38 = B19 + B15), B14 (=MIN(B40:B41))
+        y E11 ("Calm").
+    """
+    values = dict(cells)
+
+    def number(cell):
+        try:
+            return float(values.get(cell))
+        except (TypeError, ValueError):
+            return None
+
+    tow_limits = [number("B36"), number("B37")]
+    if number("B19") is not None and number("B15") is not None:
+        tow_limits.append(number("B19") + number("B15"))
+    tow_limits = [value for value in tow_limits if value is not None]
+    lw_limits = [value for value in (number("B40"), number("B41")) if value is not None]
+    values.setdefault("B11", min(tow_limits) if tow_limits else None)
+    values.setdefault("B14", min(lw_limits) if lw_limits else None)
+    values.setdefault("E11", "Calm")
+    return values
+
+
+def _format(values, cell):
+    value = values.get(cell)
+    if value is None:
+        return ""
+    fmt = NUMBER_FORMATS.get(cell)
+    if fmt:
+        try:
+            return fmt.format(float(value))
+        except (TypeError, ValueError):
+            pass
+    return str(value)
+
+
+def _image(rendered, width, height):
+    if not rendered:
+        return Paragraph("No disponible", _styles["Normal"])
+    return Image(BytesIO(rendered.data), width=width, height=height)
+
+
+def loadsheet_story(cells, images):
+    """
+    Flowables de la página de un vuelo.
+
+    Args:
+        cells (dict): Celda -> valor, como se escriben en `template.xlsm`.
+        images (dict): Celda de anclaje -> RenderedFigure (o None): envelope en G6,
+            Main Deck en M6 y Lower Decks en M21.
+
+    Returns:
+        list: Flowables de reportlab.
+    """
+    values = loadsheet_values(cells)
+    width = PAGE_SIZE[0] - 2 * PAGE_MARGIN
+
+    title = Table(
+        [["ALL WEIGHTS IN KILOGRAMS", "OUTPUT"]],
+        colWidths=[width / 2, width / 2],
+        style=[("FONTNAME", (0, 0), (-1, -1), "Helvetica-Bold"), ("ALIGN", (1, 0), (1, 0), "RIGHT")]
+    )
+    header = Table(
+        [[label for label, _ in HEADER_FIELDS], [_format(values, cell) for _, cell in HEADER_FIELDS]],
+        colWidths=[width / len(HEADER_FIELDS)] * len(HEADER_FIELDS),
+        style=GRID_STYLE + [("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"), ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey)]
+    )
+
+    weight_rows = []
+    for row in WEIGHT_ROWS:
+        if row is None:
+            weight_rows.append(["", "", ""])
+            continue
+        label, weight_cell, mac_cell = row
+        weight_rows.append([label, _format(values, weight_cell), f"{_format(values, mac_cell)} %" if mac_cell else ""])
+    weights = Table(
+        weight_rows, colWidths=[105, 60, 45],
+        style=GRID_STYLE + [("ALIGN", (1, 0), (-1, -1), "RIGHT"), ("FONTNAME", (0, 0), (0, -1), "Helvetica-Bold")]
+    )
+
+    performance = Table(
+        [["Performance Data", ""]] + [[label, _format(values, cell)] for label, cell in PERFORMANCE_ROWS],
+        colWidths=[90, 140],
+        style=GRID_STYLE + [
+            ("SPAN", (0, 0), (1, 0)), ("BACKGROUND", (0, 0), (1, 0), colors.lightgrey),
+            ("FONTNAME", (0, 0), (0, -1), "Helvetica-Bold")
+        ]
+    )
+    envelope = _image(images.get(ENVELOPE_ANCHOR), 230, 230)
+    decks_width = width - 210 - 230 - 20
+    deck_rows = []
+    for label, anchor in DECK_ANCHORS:
+        deck_rows.append([Paragraph(f"<b>{label}</b>", _styles["Normal"])])
+        deck_rows.append([_image(images.get(anchor), decks_width, decks_width / 4)])
+    decks = Table(deck_rows, colWidths=[decks_width])
+    body = Table(
+        [[weights, [performance, Spacer(1, 8), envelope], decks]],
+        colWidths=[210 + 10, 230 + 10, decks_width],
+        style=[("VALIGN", (0, 0), (-1, -1), "TOP"), ("LEFTPADDING", (0, 0), (-1, -1), 0)]
+    )
+
+    signatures = Table(
+        [
+            ["Prepared by:", _format(values, "C31"), "Captain Signature:", ""],
+            ["Approved by:", _format(values, "C32"), "", ""]
+        ],
+        colWidths=[80, width / 2 - 80, 100, width / 2 - 100],
+        style=[
+            ("FONTSIZE", (0, 0), (-1, -1), 8),
+            ("FONTNAME", (0, 0), (0, -1), "Helvetica-Bold"),
+            ("FONTNAME", (2, 0), (2, -1), "Helvetica-Bold"),
+            ("LINEBELOW", (3, 0), (3, 0), 0.5, colors.black)
+        ]
+    )
+    return [title, header, Spacer(1, 6), body, Spacer(1, 8), signatures]
+
+
+def render_loadsheets_pdf(loadsheets):
+    """
+    PDF con un loadsheet por página, p. ej. para generar varios vuelos en lote.
+
+    Args:
+        loadsheets (list): (cells, images) por vuelo, como en `loadsheet_story`.
+
+    Returns:
+        bytes: Documento PDF.
+    """
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer, pagesize=PAGE_SIZE, leftMargin=PAGE_MARGIN, rightMargin=PAGE_MARGIN,
+        topMargin=PAGE_MARGIN, bottomMargin=PAGE_MARGIN, title="Weight & Balance Loadsheet"
+    )
+    story = []
+    for i, (cells, images) in enumerate(loadsheets):
+        if i:
+            story.append(PageBreak())
+        story.extend(loadsheet_story(cells, images))
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def render_loadsheet_pdf(cells, images):
+    """PDF del loadsheet de un vuelo (ver `loadsheet_story`)."""
+    return render_loadsheets_pdf([(cells, images)])
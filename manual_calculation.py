@@ -1,6 +1,8 @@
 import streamlit as st
 import pandas as pd
-from utils import calculate_peso_maximo_efectivo
+from utils import render_diagnostics
+from wb_engine.diagnostics import Diagnostics
+from wb_engine.positions import update_position_values as engine_update_position_values
 
 def update_position_values(df, idx, new_position, restricciones_df, tipo_carga, posiciones_usadas, exclusiones_df):
     """
@@ -18,48 +20,12 @@ def update_position_values(df, idx, new_position, restricciones_df, tipo_carga,
     Returns:
         bool: True si la asignación fue exitosa, False si falló.
     """
-    new_position_clean = new_position.split(" (")[0] if " (" in new_position else new_position
-    
-    row = df.loc[idx]
-    restric = restricciones_df[
-        (restricciones_df["Position"] == new_position_clean) &
-        (restricciones_df["Pallet_Base_size_Allowed"] == row["Baseplate Code"])
-    ]
-    if restric.empty:
-        restric = restricciones_df[restricciones_df["Position"] == new_position_clean]
-    if restric.empty:
-        st.error(f"Posición {new_position_clean} inválida.")
-        return False
-    
-    peso_max = calculate_peso_maximo_efectivo(restric.iloc[0], tipo_carga)
-    
-    print(f"Validando {new_position_clean} para {row['Number ULD']}, peso={row['Weight (KGS)']:.1f}, peso_max={peso_max:.1f}, base_code={row['Baseplate Code']}, tipo_carga={tipo_carga}")
-    
-    if new_position_clean in exclusiones_df.columns:
-        excluded_positions = exclusiones_df.index[exclusiones_df[new_position_clean] == 0].tolist()
-        if any(pos in posiciones_usadas for pos in excluded_positions):
-            st.error(f"La posición {new_position_clean} está excluida por posiciones ya asignadas: {excluded_positions}")
-            return False
-    
-    if row["Weight (KGS)"] > peso_max:
-        st.error(f"El peso {row['Weight (KGS)']:.1f} kg excede el máximo permitido de {peso_max:.1f} kg para la posición {new_position_clean}.")
-        return False
-        
-    x_arm = restric["Average_X-Arm_(m)"].values[0]
-    y_arm = restric["Average_Y-Arm_(m)"].values[0]
-    
-    df.at[idx, "X-arm"] = x_arm
-    df.at[idx, "Y-arm"] = y_arm
-    df.at[idx, "Momento X"] = round(x_arm * row["Weight (KGS)"], 3)
-    df.at[idx, "Momento Y"] = round(y_arm * row["Weight (KGS)"], 3)
-    df.at[idx, "Posición Asignada"] = new_position_clean
-    df.at[idx, "Bodega"] = restric["Bodega"].values[0]
-    
-    for i in df.index:
-        if i != idx and isinstance(df.at[i, "Posiciones Sugeridas"], list):
-            df.at[i, "Posiciones Sugeridas"] = [pos for pos in df.at[i, "Posiciones Sugeridas"] if pos.split(" (")[0] != new_position_clean]
-    
-    return True
+    diagnostics = Diagnostics()
+    asignada = engine_update_position_values(
+        df, idx, new_position, restricciones_df, tipo_carga, posiciones_usadas, exclusiones_df, diagnostics, prune_labels=True
+    )
+    render_diagnostics(diagnostics)
+    return asignada
 
 def manual_assignment(df, restricciones_df, tipo_carga, exclusiones_df, posiciones_usadas, rotaciones, tab_prefix=""):
     """
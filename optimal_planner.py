@@ -0,0 +1,360 @@
+import time
+from dataclasses import dataclass, field
+import pandas as pd
+
+from restriction_index import get_restriction_index
+from exclusion_matrix import get_exclusion_matrix
+from cumulative_validator import CumulativeValidator
+
+
+@dataclass
+class PlanResult:
+    assignments: list = field(default_factory=list)  # [(idx, posición)] en el orden en que deben aplicarse
+    deviation: float = float("inf")  # Desviación combinada de TOW CG y ZFW CG respecto al objetivo (o margen de envolvente negativo)
+    optimal: bool = False  # True si la búsqueda terminó dentro del tiempo (plan óptimo demostrado)
+    elapsed: float = 0.0  # Segundos de búsqueda
+    nodes: int = 0  # Nodos explorados
+
+    @property
+    def assigned_count(self):
+        return len(self.assignments)
+
+
+class _TimeBudgetExceeded(Exception):
+    pass
+
+
+class _Candidate:
+    __slots__ = ("position", "x_arm", "bodega", "bit", "blockers")
+
+    def __init__(self, position, x_arm, bodega, bit, blockers):
+        self.position = position
+        self.x_arm = x_arm
+        self.bodega = bodega
+        self.bit = bit
+        self.blockers = blockers
+
+
+class OptimalPlanner:
+    """
+    Planificador exacto de asignación pallet→posición por ramificación y acotamiento (branch-and-bound).
+
+    Respeta el peso máximo efectivo de cada posición, las exclusiones, los límites acumulativos
+    FWD/AFT y los límites de bodega LDF/LDA. Maximiza la cantidad de pallets asignados y, a igual
+    cantidad, minimiza la desviación combinada de TOW CG y ZFW CG respecto a target_mac (el mismo
+    criterio de las estrategias por CG) o, si se indica `objective`, maximiza el margen mínimo a la
+    envolvente en ZFW, TOW y LW. La búsqueda parte de una solución voraz y, si se agota el
+    presupuesto de tiempo, devuelve el mejor plan encontrado.
+    """
+
+    def __init__(self, restricciones_df, tipo_carga, exclusiones_df, cumulative_restrictions_fwd_df, cumulative_restrictions_aft_df,
+                 bow, bow_moment_x, fuel_kg, taxi_fuel, moment_x_fuel_tow, lemac, mac_length,
+                 ldf_limit=None, lda_limit=None, target_mac=28.0, time_budget=10.0, objective=None):
+        """
+        Args:
+            restricciones_df (pd.DataFrame): DataFrame con las restricciones.
+            tipo_carga (str): Tipo de carga ("simétrico" o "asimétrico").
+            exclusiones_df (pd.DataFrame): DataFrame con las exclusiones.
+            cumulative_restrictions_fwd_df (pd.DataFrame): Restricciones acumulativas FWD.
+            cumulative_restrictions_aft_df (pd.DataFrame): Restricciones acumulativas AFT.
+            bow (float): Basic Operating Weight.
+            bow_moment_x (float): Momento X del BOW.
+            fuel_kg (float): Combustible total (kg).
+            taxi_fuel (float): Combustible de taxi (kg).
+            moment_x_fuel_tow (float): Momento X del combustible en TOW.
+            lemac (float): Leading Edge of Mean Aerodynamic Chord.
+            mac_length (float): Longitud del MAC.
+            ldf_limit (float, optional): Peso máximo en LDF (kg).
+            lda_limit (float, optional): Peso máximo en LDA (kg).
+            target_mac (float): Objetivo de %MAC para TOW CG y ZFW CG.
+            time_budget (float): Tiempo máximo de búsqueda en segundos.
+            objective (EnvelopeMarginEvaluator, optional): Si se indica, el criterio a igual cantidad de
+                pallets es maximizar su margen mínimo a la envolvente en lugar de acercarse a target_mac.
+        """
+        self.restriction_index = get_restriction_index(restricciones_df)
+        self.exclusion_matrix = get_exclusion_matrix(exclusiones_df)
+        self.tipo_carga = tipo_carga
+        self.cumulative_restrictions_fwd_df = cumulative_restrictions_fwd_df
+        self.cumulative_restrictions_aft_df = cumulative_restrictions_aft_df
+        self.bow = bow
+        self.bow_moment_x = bow_moment_x
+        self.fuel_kg = fuel_kg
+        self.taxi_fuel = taxi_fuel
+        self.moment_x_fuel_tow = moment_x_fuel_tow
+        self.lemac = lemac
+        self.mac_length = mac_length
+        self.hold_limits = {
+            bodega: limit for bodega, limit in (("LDF", ldf_limit), ("LDA", lda_limit))
+            if limit is not None and pd.notna(limit)
+        }
+        self.target_mac = target_mac
+        self.time_budget = time_budget
+        self.objective = objective
+
+    def _mac(self, peso_total, momento_x_total):
+        """
+        (%MAC TOW, %MAC ZFW) para los totales de carga dados, con la misma fórmula que
+        `calculate_final_values` (el MAC_length de basic_data ya expresa el resultado en %).
+        """
+        tow = self.bow + peso_total + self.fuel_kg - self.taxi_fuel
+        tow_mac = ((self.bow_moment_x + momento_x_total + self.moment_x_fuel_tow) / tow - self.lemac) / self.mac_length if tow != 0 else 0
+        zfw = self.bow + peso_total
+        zfw_mac = ((self.bow_moment_x + momento_x_total) / zfw - self.lemac) / self.mac_length if zfw != 0 else 0
+        return tow_mac, zfw_mac
+
+    def _deviation(self, peso_total, momento_x_total):
+        tow_mac, zfw_mac = self._mac(peso_total, momento_x_total)
+        return abs(tow_mac - self.target_mac) + abs(zfw_mac - self.target_mac)
+
+    def _deviation_bound(self, peso_total, momento_min, momento_max):
+        """Cota inferior de la desviación si el momento final queda en [momento_min, momento_max]."""
+        bound = 0.0
+        for low, high in zip(self._mac(peso_total, momento_min), self._mac(peso_total, momento_max)):
+            low, high = min(low, high), max(low, high)
+            if self.target_mac < low:
+                bound += low - self.target_mac
+            elif self.target_mac > high:
+                bound += self.target_mac - high
+        return bound
+
+    def _cost(self, peso_total, momento_x_total):
+        """Valor a minimizar del plan: desviación respecto al objetivo o margen de envolvente negativo."""
+        if self.objective is None:
+            return self._deviation(peso_total, momento_x_total)
+        return -float(self.objective.margins(peso_total, momento_x_total)[0])
+
+    def _costs(self, peso_total, momentos):
+        """`_cost` para varios momentos con el mismo peso; el margen se evalúa en una sola llamada vectorizada."""
+        if self.objective is None:
+            return [self._deviation(peso_total, momento) for momento in momentos]
+        return (-self.objective.margins(peso_total, momentos)).tolist()
+
+    def _cost_bound(self, peso_total, momento_min, momento_max):
+        """Cota inferior de `_cost` si el momento final queda en [momento_min, momento_max]."""
+        if self.objective is None:
+            return self._deviation_bound(peso_total, momento_min, momento_max)
+        return -self.objective.margin_bound(peso_total, momento_min, momento_max)
+
+    def _candidates(self, row, posiciones_usadas, occupied, forbidden, cumulative, hold_weights):
+        """Posiciones candidatas del pallet que superan las validaciones frente a la carga ya fija."""
+        weight = row["Weight (KGS)"]
+        if pd.isna(weight) or not isinstance(row["Posiciones Sugeridas"], list):
+            return []
+        candidates = []
+        seen = set()
+        for sugerida in row["Posiciones Sugeridas"]:
+            position = sugerida.split(" (")[0]
+            if position in posiciones_usadas or position in seen:
+                continue
+            seen.add(position)
+            entry = self.restriction_index.lookup(position, row["Baseplate Code"])
+            if entry is None or weight > entry.peso_maximo(self.tipo_carga):
+                continue
+            candidate = _Candidate(
+                position, entry.x_arm, entry.bodega,
+                self.exclusion_matrix.position_mask(position), self.exclusion_matrix.blocking_mask(position)
+            )
+            if candidate.blockers & occupied or candidate.bit & forbidden:
+                continue
+            if entry.bodega in self.hold_limits and hold_weights.get(entry.bodega, 0.0) + weight > self.hold_limits[entry.bodega]:
+                continue
+            if not cumulative.fits(position, weight):
+                continue
+            candidates.append(candidate)
+        return candidates
+
+    def solve(self, df, posiciones_usadas, initial_plan=None):
+        """
+        Busca la mejor asignación para los pallets sin posición de `df`, sin modificarlo.
+
+        Args:
+            df (pd.DataFrame): DataFrame con los datos del manifiesto.
+            posiciones_usadas (set): Conjunto de posiciones ya asignadas.
+            initial_plan (list, optional): Plan [(idx, posición)] con el que iniciar la búsqueda.
+
+        Returns:
+            PlanResult: Mejor plan encontrado.
+        """
+        start = time.perf_counter()
+        deadline = start + self.time_budget
+
+        asignados = df[df["Posición Asignada"] != ""]
+        peso_fijo = asignados["Weight (KGS)"].sum()
+        momento_fijo = asignados["Momento X"].sum()
+        cumulative = CumulativeValidator.from_assigned(asignados, self.cumulative_restrictions_fwd_df, self.cumulative_restrictions_aft_df)
+        occupied = self.exclusion_matrix.occupied_mask(posiciones_usadas)
+        forbidden = 0
+        for position in posiciones_usadas:
+            forbidden |= self.exclusion_matrix.blocking_mask(position)
+        hold_weights = asignados.groupby("Bodega")["Weight (KGS)"].sum().to_dict()
+
+        pallets = []
+        for idx, row in df[df["Posición Asignada"] == ""].iterrows():
+            candidates = self._candidates(row, posiciones_usadas, occupied, forbidden, cumulative, hold_weights)
+            if candidates:
+                pallets.append((idx, row["Weight (KGS)"], candidates))
+        # Pallets con menos alternativas primero y, a igual cantidad, los más pesados
+        pallets.sort(key=lambda p: (len(p[2]), -p[1]))
+
+        n = len(pallets)
+        suffix_weight = [0.0] * (n + 1)
+        suffix_min = [0.0] * (n + 1)
+        suffix_max = [0.0] * (n + 1)
+        for i in range(n - 1, -1, -1):
+            _, weight, candidates = pallets[i]
+            arms = [c.x_arm for c in candidates]
+            suffix_weight[i] = suffix_weight[i + 1] + weight
+            suffix_min[i] = suffix_min[i + 1] + round(min(arms) * weight, 3)
+            suffix_max[i] = suffix_max[i + 1] + round(max(arms) * weight, 3)
+
+        best = PlanResult()
+        state = {"nodes": 0}
+        plan = []
+        used = set(posiciones_usadas)
+
+        def record(peso, momento):
+            deviation = self._cost(peso, momento)
+            if len(plan) > best.assigned_count or (len(plan) == best.assigned_count and deviation < best.deviation):
+                best.assignments = list(plan)
+                best.deviation = deviation
+
+        def feasible(i, occupied, forbidden):
+            _, weight, candidates = pallets[i]
+            options = []
+            for c in candidates:
+                if c.position in used or c.blockers & occupied or c.bit & forbidden:
+                    continue
+                if c.bodega in self.hold_limits and hold_weights.get(c.bodega, 0.0) + weight > self.hold_limits[c.bodega]:
+                    continue
+                if not cumulative.fits(c.position, weight):
+                    continue
+                options.append(c)
+            return options
+
+        # Posiciones candidatas de todos los pallets, para la cota por emparejamiento máximo
+        slots = {}
+        for _, _, candidates in pallets:
+            for c in candidates:
+                slots.setdefault(c.position, (1 << len(slots), c))
+        pallet_slots = [sum(slots[c.position][0] for c in candidates) for _, _, candidates in pallets]
+
+        def matching_bound(i, occupied, forbidden):
+            """
+            Cantidad máxima de pallets restantes que pueden recibir una posición libre distinta
+            (emparejamiento bipartito, sin exclusiones entre los restantes ni límites acumulativos).
+            Es una cota superior de los pallets que aún pueden asignarse.
+            """
+            available = 0
+            for position, (slot, c) in slots.items():
+                if position not in used and not c.blockers & occupied and not c.bit & forbidden:
+                    available |= slot
+            owner = {}
+
+            def augment(j, seen):
+                options = pallet_slots[j] & available & ~seen[0]
+                while options:
+                    slot = options & -options
+                    options ^= slot
+                    seen[0] |= slot
+                    if slot not in owner or augment(owner[slot], seen):
+                        owner[slot] = j
+                        return True
+                return False
+
+            return sum(1 for j in range(i, n) if augment(j, [0]))
+
+        def assign(i, c):
+            _, weight, _ = pallets[i]
+            plan.append((pallets[i][0], c.position))
+            used.add(c.position)
+            cumulative.add(c.position, weight)
+            hold_weights[c.bodega] = hold_weights.get(c.bodega, 0.0) + weight
+
+        def unassign(i, c):
+            _, weight, _ = pallets[i]
+            plan.pop()
+            used.discard(c.position)
+            cumulative.remove(c.position, weight)
+            hold_weights[c.bodega] -= weight
+
+        def search(i, peso, momento, occupied, forbidden):
+            state["nodes"] += 1
+            if time.perf_counter() > deadline:
+                raise _TimeBudgetExceeded()
+            if i == n:
+                record(peso, momento)
+                return
+            alive = matching_bound(i, occupied, forbidden)
+            max_count = len(plan) + alive
+            if max_count < best.assigned_count:
+                return
+            if max_count == best.assigned_count and alive == n - i:
+                bound = self._cost_bound(peso + suffix_weight[i], momento + suffix_min[i], momento + suffix_max[i])
+                if bound >= best.deviation:
+                    return
+
+            _, weight, _ = pallets[i]
+            options = feasible(i, occupied, forbidden)
+            # Explorar primero las posiciones que dejan el CG parcial más cerca del objetivo
+            costs = self._costs(peso + weight, [momento + round(c.x_arm * weight, 3) for c in options])
+            options = [options[k] for k in sorted(range(len(options)), key=costs.__getitem__)]
+            for c in options:
+                assign(i, c)
+                try:
+                    search(i + 1, peso + weight, momento + round(c.x_arm * weight, 3), occupied | c.bit, forbidden | c.blockers)
+                finally:
+                    unassign(i, c)
+            # Dejar el pallet sin asignar solo puede mejorar si, sin él, aún es posible igualar la mejor
+            # cantidad (el emparejamiento máximo puede no necesitar este pallet)
+            if len(plan) + matching_bound(i + 1, occupied, forbidden) >= best.assigned_count:
+                search(i + 1, peso, momento, occupied, forbidden)
+
+        def replay(order, choose):
+            """Registra una solución construida sin retroceso; `choose` elige entre las opciones válidas de cada pallet."""
+            replay_occupied, replay_forbidden = occupied, forbidden
+            peso, momento = peso_fijo, momento_fijo
+            done = []
+            for i in order:
+                _, weight, _ = pallets[i]
+                c = choose(i, feasible(i, replay_occupied, replay_forbidden), peso, momento)
+                if c is None:
+                    continue
+                assign(i, c)
+                done.append((i, c))
+                replay_occupied |= c.bit
+                replay_forbidden |= c.blockers
+                peso += weight
+                momento += round(c.x_arm * weight, 3)
+            record(peso, momento)
+            for i, c in reversed(done):
+                unassign(i, c)
+
+        # Soluciones iniciales voraces por CG: orden de búsqueda, orden del manifiesto y más pesados primero
+        def closest_to_target(i, options, peso, momento):
+            if not options:
+                return None
+            weight = pallets[i][1]
+            costs = self._costs(peso + weight, [momento + round(c.x_arm * weight, 3) for c in options])
+            return options[min(range(len(options)), key=costs.__getitem__)]
+
+        manifest_order = sorted(range(n), key=lambda i: df.index.get_loc(pallets[i][0]))
+        for order in (range(n), manifest_order, sorted(range(n), key=lambda i: -pallets[i][1])):
+            replay(order, closest_to_target)
+        # Plan inicial provisto (p. ej. el de una estrategia heurística), si es válido para el planificador
+        if initial_plan:
+            pallet_by_idx = {idx: i for i, (idx, _, _) in enumerate(pallets)}
+            initial_positions = dict(initial_plan)
+            replay(
+                [pallet_by_idx[idx] for idx, _ in initial_plan if idx in pallet_by_idx],
+                lambda i, options, peso, momento: next((c for c in options if c.position == initial_positions[pallets[i][0]]), None)
+            )
+
+        try:
+            search(0, peso_fijo, momento_fijo, occupied, forbidden)
+            best.optimal = True
+        except _TimeBudgetExceeded:
+            best.optimal = False
+
+        best.elapsed = time.perf_counter() - start
+        best.nodes = state["nodes"]
+        return best
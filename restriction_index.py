@@ -0,0 +1,121 @@
+import weakref
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class RestrictionEntry:
+    position: str
+    x_arm: float
+    y_arm: float
+    bodega: str
+    max_weight_symmetric: float  # Peso máximo efectivo simétrico (restricción temporal si existe)
+    max_weight_asymmetric: float  # Peso máximo efectivo asimétrico (restricción temporal si existe)
+
+    def peso_maximo(self, tipo_carga):
+        """
+        Devuelve el Peso Máximo Efectivo según tipo_carga, con la misma semántica que
+        utils.calculate_peso_maximo_efectivo.
+        """
+        if tipo_carga.lower() == "simétrico":
+            return self.max_weight_symmetric
+        elif tipo_carga.lower() == "asimétrico":
+            return self.max_weight_asymmetric
+        else:
+            print(f"Error: Tipo de carga no reconocido: {tipo_carga}")
+            return 0.0
+
+
+class RestrictionIndex:
+    """
+    Índice compilado de MD_LD_BULK_restrictions.csv para una aeronave.
+
+    Reemplaza los filtros `restricciones_df[(Position == pos) & (Pallet_Base_size_Allowed == code)]`
+    por búsquedas en diccionario. Conserva la semántica de esos filtros: se usa la primera fila
+    que coincide con (posición, código de base) y, si no hay ninguna, la primera fila de la posición.
+    """
+
+    def __init__(self, restricciones_df):
+        """
+        Args:
+            restricciones_df (pd.DataFrame): DataFrame con las restricciones (columnas ya normalizadas con "_").
+        """
+        self._by_position_code = {}
+        self._by_position = {}
+
+        numeric = {}
+        for col in [
+            "Symmetric_Max_Weight_(kg)_5%", "Asymmetric_Max_Weight_(kg)_5%",
+            "Temp_Restriction_Symmetric", "Temp_Restriction_Asymmetric"
+        ]:
+            numeric[col] = pd.to_numeric(restricciones_df[col], errors="coerce").fillna(0).tolist()
+
+        positions = restricciones_df["Position"].tolist()
+        base_codes = restricciones_df["Pallet_Base_size_Allowed"].tolist()
+        x_arms = restricciones_df["Average_X-Arm_(m)"].tolist()
+        y_arms = restricciones_df["Average_Y-Arm_(m)"].tolist()
+        bodegas = restricciones_df["Bodega"].tolist()
+
+        for i, position in enumerate(positions):
+            if pd.isna(position):
+                continue
+            temp_sym = numeric["Temp_Restriction_Symmetric"][i]
+            temp_asym = numeric["Temp_Restriction_Asymmetric"][i]
+            entry = RestrictionEntry(
+                position=position,
+                x_arm=x_arms[i],
+                y_arm=y_arms[i],
+                bodega=bodegas[i],
+                max_weight_symmetric=temp_sym if temp_sym != 0 else numeric["Symmetric_Max_Weight_(kg)_5%"][i],
+                max_weight_asymmetric=temp_asym if temp_asym != 0 else numeric["Asymmetric_Max_Weight_(kg)_5%"][i]
+            )
+            if pd.notna(base_codes[i]):
+                self._by_position_code.setdefault((position, base_codes[i]), entry)
+            self._by_position.setdefault(position, entry)
+
+    def __contains__(self, position):
+        return position in self._by_position
+
+    def positions(self):
+        """Posiciones definidas para la aeronave, en el orden del archivo de restricciones."""
+        return list(self._by_position)
+
+    def lookup(self, position, base_code=None):
+        """
+        Devuelve la RestrictionEntry de la posición para el código de base dado, con respaldo
+        a la primera entrada de la posición; None si la posición no existe.
+        """
+        entry = self._by_position_code.get((position, base_code))
+        if entry is None:
+            entry = self._by_position.get(position)
+        return entry
+
+    def max_weights(self, positions, base_code, tipo_carga):
+        """
+        Devuelve un arreglo con el Peso Máximo Efectivo de cada posición para el código de base,
+        con NaN en las posiciones que no existen en la aeronave.
+        """
+        pesos = np.full(len(positions), np.nan)
+        for i, position in enumerate(positions):
+            entry = self.lookup(position, base_code)
+            if entry is not None:
+                pesos[i] = entry.peso_maximo(tipo_carga)
+        return pesos
+
+
+_index_cache = {}
+
+
+def get_restriction_index(restricciones_df):
+    """
+    Devuelve el RestrictionIndex compilado para `restricciones_df`, compilándolo una sola vez
+    por objeto DataFrame (cada recarga del archivo de restricciones genera un índice nuevo).
+    """
+    key = id(restricciones_df)
+    cached = _index_cache.get(key)
+    if cached is not None and cached[0]() is restricciones_df:
+        return cached[1]
+    index = RestrictionIndex(restricciones_df)
+    _index_cache[key] = (weakref.ref(restricciones_df, lambda _, key=key: _index_cache.pop(key, None)), index)
+    return index
@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 import os
+from wb_engine.profile import invalidate_aircraft_profile
 
 # Directorio base
 script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -45,4 +46,5 @@ def manage_temporary_restrictions():
 
     if st.button("Guardar Restricciones Temporales"):
         restricciones_df.to_csv(restrictions_path, sep=";", decimal=",", index=False)
+        invalidate_aircraft_profile(aircraft_folder)
         st.success(f"Restricciones temporales guardadas para la aeronave {tail}.")
\ No newline at end of file
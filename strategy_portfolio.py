@@ -0,0 +1,195 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from cumulative_validator import validate_cumulative_weights
+from wb_engine.diagnostics import Diagnostics
+from wb_engine.strategies import assign_single_position_pallets, try_all_strategies
+
+# Estrategias que se comparan en el modo "Comparar todas" (clave interna, etiqueta)
+PORTFOLIO_STRATEGIES = [
+    ("cg", "CG"),
+    ("aft_cg", "AFT CG"),
+    ("destino", "Destino"),
+    ("ambos", "Ambos"),
+    ("optimo", "Óptimo"),
+    ("margen", "Margen de envolvente")
+]
+
+
+@dataclass
+class StrategyOutcome:
+    key: str
+    label: str
+    df: pd.DataFrame
+    posiciones_usadas: set
+    rotaciones: dict
+    wall_time: float
+    assigned: int = 0
+    unassigned: int = 0
+    tow_mac: float = 0.0
+    zfw_mac: float = 0.0
+    deviation: float = 0.0
+    envelope_margin: float = None
+    cumulative_ok: bool = True
+    holds_ok: bool = True
+    lateral_imbalance: float = 0.0
+    error: str = ""
+    diagnostics: list = field(default_factory=list)
+
+    @property
+    def rank_key(self):
+        """
+        Orden de la comparación: plan válido, más pallets asignados y, si hay envolvente, mayor
+        margen (los planes fuera de la envolvente tienen margen negativo); luego menor desviación
+        respecto al objetivo y menor desbalance.
+        """
+        valid = not self.error and self.cumulative_ok and self.holds_ok
+        margin = -self.envelope_margin if self.envelope_margin is not None else 0.0
+        return (not valid, -self.assigned, margin, self.deviation, self.lateral_imbalance, self.wall_time)
+
+
+def _run_strategy(job):
+    """
+    Ejecuta una estrategia sobre una copia independiente del manifiesto (proceso de trabajo).
+
+    Returns:
+        tuple: (key, df, posiciones_usadas, rotaciones, wall_time, error, mensajes), donde
+            mensajes son los textos de los diagnósticos de la estrategia.
+    """
+    df = job["df"]
+    posiciones_usadas = set(job["posiciones_usadas"])
+    diagnostics = Diagnostics()
+    start = time.perf_counter()
+    try:
+        assign_single_position_pallets(df, job["restricciones_df"], job["tipo_carga"], job["exclusiones_df"], posiciones_usadas, diagnostics=diagnostics)
+        posiciones_usadas, rotaciones, _ = try_all_strategies(
+            df, job["restricciones_df"], job["tipo_carga"], job["exclusiones_df"], posiciones_usadas,
+            job["destino_inicial"], job["key"], *job["params"],
+            job["cumulative_restrictions_fwd_df"], job["cumulative_restrictions_aft_df"],
+            ldf_limit=job["ldf_limit"], lda_limit=job["lda_limit"], time_budget=job["time_budget"],
+            diagnostics=diagnostics, envelope_margin=job["envelope_margin"]
+        )
+        error = ""
+    except Exception as e:
+        rotaciones = {}
+        error = str(e)
+    return job["key"], df, posiciones_usadas, rotaciones, time.perf_counter() - start, error, [d.message for d in diagnostics]
+
+
+def score_outcome(outcome, bow, bow_moment_x, fuel_kg, taxi_fuel, moment_x_fuel_tow, lemac, mac_length,
+                  cumulative_restrictions_fwd_df, cumulative_restrictions_aft_df, ldf_limit=None, lda_limit=None, target_mac=28.0,
+                  envelope_margin=None):
+    """
+    Calcula las métricas de comparación de un resultado a partir de su DataFrame final; el %MAC
+    se calcula con la misma fórmula que `calculate_final_values`.
+    """
+    df_asignados = outcome.df[outcome.df["Posición Asignada"] != ""]
+    outcome.assigned = len(df_asignados)
+    outcome.unassigned = len(outcome.df) - outcome.assigned
+
+    peso_total = df_asignados["Weight (KGS)"].sum()
+    momento_x_total = df_asignados["Momento X"].sum()
+    tow = bow + peso_total + fuel_kg - taxi_fuel
+    outcome.tow_mac = ((bow_moment_x + momento_x_total + moment_x_fuel_tow) / tow - lemac) / mac_length if tow != 0 else 0
+    zfw = bow + peso_total
+    outcome.zfw_mac = ((bow_moment_x + momento_x_total) / zfw - lemac) / mac_length if zfw != 0 else 0
+    outcome.deviation = abs(outcome.tow_mac - target_mac) + abs(outcome.zfw_mac - target_mac)
+    if envelope_margin is not None:
+        outcome.envelope_margin = float(envelope_margin.margins(peso_total, momento_x_total)[0])
+
+    outcome.cumulative_ok, validation_df = validate_cumulative_weights(df_asignados, cumulative_restrictions_fwd_df, cumulative_restrictions_aft_df)
+    if not outcome.cumulative_ok:
+        outcome.diagnostics.append("Restricciones acumulativas no cumplidas en: " + ", ".join(validation_df[validation_df["Cumple"] == "No"]["Posición Asignada"]))
+
+    outcome.holds_ok = True
+    for bodega, limit in (("LDF", ldf_limit), ("LDA", lda_limit)):
+        hold_weight = df_asignados[df_asignados["Bodega"] == bodega]["Weight (KGS)"].sum()
+        if limit is not None and hold_weight > limit:
+            outcome.holds_ok = False
+            outcome.diagnostics.append(f"Peso en {bodega} ({hold_weight:.1f} kg) excede el límite ({limit:.1f} kg).")
+
+    relevant_pallets = df_asignados[(df_asignados["Bodega"].isin(["MD", "LDA", "LDF"])) & (df_asignados["Y-arm"] != 0)]
+    left_weight = relevant_pallets[relevant_pallets["Y-arm"] < 0]["Weight (KGS)"].sum()
+    right_weight = relevant_pallets[relevant_pallets["Y-arm"] > 0]["Weight (KGS)"].sum()
+    outcome.lateral_imbalance = abs(left_weight - right_weight)
+    return outcome
+
+
+def run_portfolio(df, restricciones_df, tipo_carga, exclusiones_df, posiciones_usadas, destino_inicial, bow, bow_moment_x, bow_moment_y, fuel_kg, taxi_fuel, moment_x_fuel_tow, moment_y_fuel_tow, lemac, mac_length, cumulative_restrictions_fwd_df, cumulative_restrictions_aft_df, ldf_limit=None, lda_limit=None, time_budget=10.0, max_workers=None, envelope_margin=None):
+    """
+    Ejecuta todas las estrategias en paralelo (un proceso por estrategia) sobre copias del manifiesto
+    y devuelve los resultados ordenados del mejor al peor. "Margen de envolvente" solo se compara si
+    se indica `envelope_margin` (EnvelopeMarginEvaluator), que también se usa para informar el margen
+    de cada plan y ordenarlos por él.
+
+    Returns:
+        list[StrategyOutcome]: Resultados ordenados por `StrategyOutcome.rank_key`.
+    """
+    params = (bow, bow_moment_x, bow_moment_y, fuel_kg, taxi_fuel, moment_x_fuel_tow, moment_y_fuel_tow, lemac, mac_length)
+    jobs = []
+    for key, _ in PORTFOLIO_STRATEGIES:
+        if key == "margen" and envelope_margin is None:
+            continue
+        df_copy = df.copy()
+        df_copy["Posiciones Sugeridas"] = [list(pos) if isinstance(pos, list) else pos for pos in df["Posiciones Sugeridas"]]
+        jobs.append({
+            "key": key,
+            "df": df_copy,
+            "posiciones_usadas": set(posiciones_usadas),
+            "restricciones_df": restricciones_df,
+            "tipo_carga": tipo_carga,
+            "exclusiones_df": exclusiones_df,
+            "destino_inicial": destino_inicial,
+            "params": params,
+            "cumulative_restrictions_fwd_df": cumulative_restrictions_fwd_df,
+            "cumulative_restrictions_aft_df": cumulative_restrictions_aft_df,
+            "ldf_limit": ldf_limit,
+            "lda_limit": lda_limit,
+            "time_budget": time_budget,
+            "envelope_margin": envelope_margin
+        })
+
+    max_workers = max_workers or min(len(jobs), os.cpu_count() or 1)
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_run_strategy, jobs))
+    except (BrokenProcessPool, OSError) as e:
+        # Sin procesos disponibles (p. ej. entornos restringidos): ejecutar en serie
+        print(f"Advertencia: no se pudo usar el pool de procesos ({e}); se ejecuta en serie.")
+        results = [_run_strategy(job) for job in jobs]
+
+    labels = dict(PORTFOLIO_STRATEGIES)
+    outcomes = []
+    for key, df_result, posiciones_result, rotaciones_result, wall_time, error, mensajes in results:
+        outcome = StrategyOutcome(key, labels[key], df_result, posiciones_result, rotaciones_result, wall_time, error=error, diagnostics=mensajes)
+        outcomes.append(score_outcome(
+            outcome, bow, bow_moment_x, fuel_kg, taxi_fuel, moment_x_fuel_tow, lemac, mac_length,
+            cumulative_restrictions_fwd_df, cumulative_restrictions_aft_df, ldf_limit, lda_limit,
+            envelope_margin=envelope_margin
+        ))
+    outcomes.sort(key=lambda outcome: outcome.rank_key)
+    return outcomes
+
+
+def portfolio_table(outcomes):
+    """Tabla de comparación (una fila por estrategia, en orden de ranking)."""
+    return pd.DataFrame([{
+        "Ranking": rank,
+        "Estrategia": outcome.label,
+        "Asignados": outcome.assigned,
+        "Sin asignar": outcome.unassigned,
+        "TOW CG (%MAC)": round(outcome.tow_mac, 2),
+        "ZFW CG (%MAC)": round(outcome.zfw_mac, 2),
+        "Desviación (%MAC)": round(outcome.deviation, 2),
+        "Margen envolvente (%MAC)": None if outcome.envelope_margin is None else round(outcome.envelope_margin, 2),
+        "Cumple acumulativos": "Sí" if outcome.cumulative_ok else "No",
+        "Cumple LDF/LDA": "Sí" if outcome.holds_ok else "No",
+        "Desbalance lateral (kg)": round(outcome.lateral_imbalance, 1),
+        "Tiempo (s)": round(outcome.wall_time, 2),
+        "Observaciones": outcome.error or "; ".join(outcome.diagnostics)
+    } for rank, outcome in enumerate(outcomes, start=1)])
@@ -0,0 +1,88 @@
+"""
+Servidor LIR: las gráficas de deck_svg.py pasan por `sanitize_svg` sin cambios, cualquier SVG con
+contenido activo se rechaza en /update_images y /deck responde con las cabeceras de seguridad.
+"""
+import contextlib
+import io
+import os
+from xml.etree import ElementTree
+
+import pytest
+
+from benchmark_automatic import load_manifest, load_tail_data
+from deck_svg import render_lower_decks_svg, render_main_deck_svg
+from flask_server import DECK_SECURITY_HEADERS, app, sanitize_svg
+from wb_engine.strategies import assign_single_position_pallets
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TAIL = "N334QT"
+TIPO_CARGA = "simétrico"
+MANIFEST = os.path.join(ROOT, "LCS", "LCS-4073-MIA-SJO.csv")
+FLIGHT_ID = "TEST-flask_server"
+SVG_OPEN = '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 10 10">'
+
+
+@pytest.fixture(scope="module")
+def assigned():
+    """Pallets de posición única asignados, con una nota que parece marcado (para el tooltip)."""
+    restricciones_df, exclusiones_df, _, _, _, _ = load_tail_data(TAIL)
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = load_manifest(MANIFEST, restricciones_df, TIPO_CARGA)
+        assign_single_position_pallets(df, restricciones_df, TIPO_CARGA, exclusiones_df, set())
+    df = df[df["Posición Asignada"] != ""].copy()
+    df.iloc[0, df.columns.get_loc("Notes")] = '<script>alert("x")</script> & <b>'
+    return df, restricciones_df
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+def svg_tree(content):
+    """(tag, atributos, texto, cola) de cada elemento, para comparar documentos sin depender del formato."""
+    return [
+        (element.tag, element.attrib, (element.text or "").strip(), (element.tail or "").strip())
+        for element in ElementTree.fromstring(content).iter()
+    ]
+
+
+@pytest.mark.parametrize("render", [render_main_deck_svg, render_lower_decks_svg])
+def test_deck_svg_round_trips_through_sanitizer(assigned, render):
+    df, restricciones_df = assigned
+    svg = render(df, restricciones_df).encode("utf-8")
+    sanitized = sanitize_svg(svg)
+    assert svg_tree(sanitized) == svg_tree(svg)
+    assert sanitize_svg(sanitized) == sanitized
+
+
+def test_deck_svg_payload_is_accepted(assigned, client):
+    df, restricciones_df = assigned
+    response = client.post("/update_images", json={"flight_id": FLIGHT_ID, "main_deck_svg": render_main_deck_svg(df, restricciones_df)})
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("svg", [
+    SVG_OPEN + '<rect width="10" height="10" onclick="alert(1)"/></svg>',
+    SVG_OPEN + "<script>alert(1)</script></svg>",
+    SVG_OPEN + '<foreignObject><div xmlns="http://www.w3.org/1999/xhtml">x</div></foreignObject></svg>',
+    SVG_OPEN + '<a href="javascript:alert(1)"><text>x</text></a></svg>',
+    SVG_OPEN + '<rect width="10" height="10" fill="url(javascript:alert(1))"/></svg>',
+    '<!DOCTYPE svg>' + SVG_OPEN + "</svg>",
+    '<!DOCTYPE svg [<!ENTITY x "y">]>' + SVG_OPEN + "<text>&x;</text></svg>",
+    "<svg><text>sin espacio de nombres</text></svg>"
+], ids=["onclick", "script", "foreignObject", "href", "url", "doctype", "entity", "namespace"])
+def test_update_images_rejects_active_svg(client, svg):
+    response = client.post("/update_images", json={"flight_id": FLIGHT_ID, "main_deck_svg": svg})
+    assert response.status_code == 400
+    assert response.get_json()["status"] == "error"
+
+
+def test_deck_response_has_security_headers(assigned, client):
+    df, restricciones_df = assigned
+    client.post("/update_images", json={"flight_id": FLIGHT_ID, "main_deck_svg": render_main_deck_svg(df, restricciones_df)})
+    response = client.get(f"/deck/{FLIGHT_ID}/main_deck")
+    assert response.status_code == 200
+    assert response.mimetype == "image/svg+xml"
+    assert response.headers["Content-Security-Policy"] == DECK_SECURITY_HEADERS["Content-Security-Policy"]
+    assert response.headers["X-Content-Type-Options"] == "nosniff"
@@ -0,0 +1,116 @@
+"""
+Regresión del planificador "Óptimo": en manifiestos pequeños, el resultado marcado como óptimo
+debe coincidir con la búsqueda exhaustiva de todas las asignaciones posibles.
+"""
+import contextlib
+import io
+import itertools
+import os
+import random
+
+import pytest
+
+from benchmark_automatic import load_manifest, load_tail_data
+from cumulative_validator import CumulativeValidator
+from exclusion_matrix import get_exclusion_matrix
+from optimal_planner import OptimalPlanner
+from restriction_index import get_restriction_index
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TAIL = "N334QT"
+TIPO_CARGA = "simétrico"
+MANIFEST = os.path.join(ROOT, "LCS", "LCS-4073-MIA-SJO.csv")
+FUEL_KG = 40000.0
+TAXI_FUEL = 500.0
+TARGET_MAC = 28.0
+
+
+@pytest.fixture(scope="module")
+def tail():
+    restricciones_df, exclusiones_df, fwd_df, aft_df, basic_data, fuel_table = load_tail_data(TAIL)
+    fuel_row = fuel_table.iloc[(fuel_table["Fuel_kg"] - (FUEL_KG - TAXI_FUEL)).abs().argsort()[0]]
+    with contextlib.redirect_stdout(io.StringIO()):
+        manifest_df = load_manifest(MANIFEST, restricciones_df, TIPO_CARGA)
+    params = {
+        "bow": basic_data["OEW"].values[0],
+        "bow_moment_x": basic_data["Moment_Aircraft"].values[0],
+        "fuel_kg": FUEL_KG,
+        "taxi_fuel": TAXI_FUEL,
+        "moment_x_fuel_tow": fuel_row["MOMENT-X"],
+        "lemac": basic_data["LEMAC"].values[0],
+        "mac_length": basic_data["MAC_length"].values[0],
+        "ldf_limit": basic_data["LDF_LIMIT"].values[0],
+        "lda_limit": basic_data["LDA_LIMIT"].values[0]
+    }
+    return restricciones_df, exclusiones_df, fwd_df, aft_df, manifest_df, params
+
+
+def small_manifest(manifest_df, seed):
+    """Entre 2 y 5 pallets que compiten por pocas posiciones (subconjunto de sus sugerencias)."""
+    rng = random.Random(seed)
+    candidates = manifest_df[manifest_df["Posiciones Sugeridas"].map(len) > 0]
+    df = candidates.loc[rng.sample(list(candidates.index), rng.randint(2, 5))].copy()
+    pool = sorted({sugerida.split(" (")[0] for sugeridas in df["Posiciones Sugeridas"] for sugerida in sugeridas})
+    pool = rng.sample(pool, min(len(pool), rng.randint(2, 4)))
+    df["Posiciones Sugeridas"] = [
+        [sugerida for sugerida in sugeridas if sugerida.split(" (")[0] in pool] for sugeridas in df["Posiciones Sugeridas"]
+    ]
+    return df
+
+
+def brute_force(df, restricciones_df, exclusiones_df, fwd_df, aft_df, params):
+    """(cantidad máxima de pallets, menor desviación a esa cantidad) probando todas las asignaciones."""
+    restriction_index = get_restriction_index(restricciones_df)
+    exclusion_matrix = get_exclusion_matrix(exclusiones_df)
+    options = []
+    for _, row in df.iterrows():
+        positions = {sugerida.split(" (")[0] for sugerida in row["Posiciones Sugeridas"]}
+        options.append([None] + sorted(positions))
+
+    best = (0, 0.0)
+    for plan in itertools.product(*options):
+        assigned = [(row, position) for (_, row), position in zip(df.iterrows(), plan) if position is not None]
+        positions = [position for _, position in assigned]
+        if len(set(positions)) != len(positions):
+            continue
+        entries = [restriction_index.lookup(position, row["Baseplate Code"]) for row, position in assigned]
+        if any(entry is None or row["Weight (KGS)"] > entry.peso_maximo(TIPO_CARGA) for entry, (row, _) in zip(entries, assigned)):
+            continue
+        if any(exclusion_matrix.conflicts(position, exclusion_matrix.occupied_mask(set(positions) - {position})) for position in positions):
+            continue
+        holds = {}
+        for entry, (row, _) in zip(entries, assigned):
+            holds[entry.bodega] = holds.get(entry.bodega, 0.0) + row["Weight (KGS)"]
+        if holds.get("LDF", 0.0) > params["ldf_limit"] or holds.get("LDA", 0.0) > params["lda_limit"]:
+            continue
+        validator = CumulativeValidator(fwd_df, aft_df)
+        for row, position in assigned:
+            validator.add(position, row["Weight (KGS)"])
+        if not validator.complies():
+            continue
+
+        peso = sum(row["Weight (KGS)"] for row, _ in assigned)
+        momento = sum(round(entry.x_arm * row["Weight (KGS)"], 3) for entry, (row, _) in zip(entries, assigned))
+        # Misma fórmula de %MAC que calculate_final_values
+        tow = params["bow"] + peso + params["fuel_kg"] - params["taxi_fuel"]
+        tow_mac = ((params["bow_moment_x"] + momento + params["moment_x_fuel_tow"]) / tow - params["lemac"]) / params["mac_length"]
+        zfw = params["bow"] + peso
+        zfw_mac = ((params["bow_moment_x"] + momento) / zfw - params["lemac"]) / params["mac_length"]
+        deviation = abs(tow_mac - TARGET_MAC) + abs(zfw_mac - TARGET_MAC)
+        if len(assigned) > best[0] or (len(assigned) == best[0] and (not best[0] or deviation < best[1])):
+            best = (len(assigned), deviation)
+    return best
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_optimal_plan_matches_brute_force(tail, seed):
+    restricciones_df, exclusiones_df, fwd_df, aft_df, manifest_df, params = tail
+    df = small_manifest(manifest_df, seed)
+    planner = OptimalPlanner(restricciones_df, TIPO_CARGA, exclusiones_df, fwd_df, aft_df, target_mac=TARGET_MAC, time_budget=30.0, **params)
+    result = planner.solve(df, set())
+
+    assigned, deviation = brute_force(df, restricciones_df, exclusiones_df, fwd_df, aft_df, params)
+    assert result.optimal
+    assert result.assigned_count == assigned
+    if assigned:
+        assert result.deviation == pytest.approx(deviation, abs=1e-6)
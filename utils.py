@@ -2,6 +2,7 @@
 import pandas as pd
 import os
 import streamlit as st
+from wb_engine.positions import clasificar_base_refinada
 
 def load_csv_with_fallback(uploaded_file, default_path, title):
     if uploaded_file is not None:
@@ -12,21 +13,11 @@ def load_csv_with_fallback(uploaded_file, default_path, title):
         st.error(f"No se encontró el archivo en: {default_path}. Sube el archivo manualmente.")
         return None
 
-def clasificar_base_refinada(uld_code):
-    code = str(uld_code).strip().upper()
-    prefix = code[:3]
-    if prefix in ["PMC", "PMQ", "PMH"]:
-        return "96x125", "M"
-    elif prefix in ["PAJ", "PLA"]:
-        return "88x125", "A"
-    elif prefix == "PAG":
-        return "88x125", "G"
-    elif prefix == "AKE":
-        return "60.4x61.5", "D"
-    elif "FLIGHT" in code or "FAK" in code:
-        return "FAK", "FAK"
-    else:
-        return "Desconocido", "?"
+def render_diagnostics(diagnostics):
+    """Muestra en la página los diagnósticos del motor de cálculo (st.error / st.warning / st.info)."""
+    for diagnostic in diagnostics:
+        getattr(st, diagnostic.level)(diagnostic.message)
+
 def calculate_peso_maximo_efectivo(restric_row, tipo_carga):
     """
     Calcula el Peso Máximo Efectivo para una posición según tipo_carga.
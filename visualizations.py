@@ -3,8 +3,14 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.colors import to_rgba
+from matplotlib.figure import Figure
+from PIL import Image
+from collections import OrderedDict
+from io import BytesIO
 import textwrap
+import threading
 
 def print_final_summary(
     df_asignados, operador, numero_vuelo, matricula, fecha_vuelo, hora_vuelo, ruta_vuelo, revision,
@@ -219,197 +225,300 @@ def get_global_color_map(df):
     color_map = {dest: to_rgba(colors[i], alpha=0.6) for i, dest in enumerate(destinos)}
     return color_map
 
-def plot_main_deck(df, restricciones_df=None):
-    df_md = df[df["Bodega"] == "MD"].copy()
-    if df_md.empty:
-        st.warning("No hay pallets asignados en Main Deck.")
+# Bodegas de cada gráfica de distribución
+DECK_SPECS = {
+    "main": {
+        "bodegas": ["MD"],
+        "title": "ULD Distribution Main Deck",
+        "fontsize": 10,
+        "notes_fontsize": 9,
+        "empty_message": "No hay pallets asignados en Main Deck.",
+        "invalid_message": "No hay datos válidos para graficar en Main Deck."
+    },
+    "lower": {
+        "bodegas": ["LDF", "LDA", "BULK"],
+        "title": "ULD Distribution Lower Deck",
+        "fontsize": 9,
+        "notes_fontsize": 8,
+        "empty_message": "No hay pallets asignados en LDF, LDA o Bulk.",
+        "invalid_message": "No hay datos válidos para graficar en LDF, LDA o Bulk."
+    }
+}
+DECK_FIGSIZE = (18, 5)
+DECK_DPI = 100
+DECK_BACKGROUND_CACHE_SIZE = 16
+
+def pallet_size(deck, pos):
+    """Ancho y alto (m) del rectángulo de una posición en la gráfica de la bodega."""
+    if deck == "lower":
+        return 1.5, 1.5
+    if pos in ["CFR", "FJR", "JLR", "LPR"]:
+        return 2, 4
+    if pos in ["CFG", "FJG", "JLG"]:
+        return 2, 6
+    return 2, 2
+
+def deck_pallets(df, restricciones_df, deck):
+    """
+    Pallets asignados a la bodega con datos válidos para graficar.
+
+    Args:
+        df (pd.DataFrame): Pallets asignados.
+        restricciones_df (pd.DataFrame, optional): Restricciones; si se indica, solo se grafican
+            las posiciones de la bodega que existen en la aeronave.
+        deck (str): "main" o "lower".
+
+    Returns:
+        pd.DataFrame | None: Pallets a graficar, o None (con la advertencia correspondiente) si no hay.
+    """
+    spec = DECK_SPECS[deck]
+    df_deck = df[df["Bodega"].isin(spec["bodegas"])].copy()
+    if df_deck.empty:
+        st.warning(spec["empty_message"])
         return None
 
-    required_columns = ["X-arm", "Y-arm", "Number ULD", "Posición Asignada", "Weight (KGS)", "ULD Final Destination", "Contour", "Notes"]
-    missing_columns = [col for col in required_columns if col not in df_md.columns]
+    required_columns = ["X-arm", "Y-arm", "Number ULD", "Posición Asignada", "Weight (KGS)", "ULD Final Destination", "Contour", "Bodega", "Notes"]
+    missing_columns = [col for col in required_columns if col not in df_deck.columns]
     if missing_columns:
         st.error(f"Faltan columnas en el DataFrame: {', '.join(missing_columns)}")
         return None
 
-    df_md = df_md.dropna(subset=["X-arm", "Y-arm", "Posición Asignada", "Weight (KGS)"])
-    df_md = df_md[pd.to_numeric(df_md["X-arm"], errors='coerce').notnull()]
-    df_md = df_md[pd.to_numeric(df_md["Y-arm"], errors='coerce').notnull()]
-    df_md = df_md[pd.to_numeric(df_md["Weight (KGS)"], errors='coerce').notnull()]
-    
-    if df_md.empty:
-        st.warning("No hay datos válidos para graficar en Main Deck.")
-        return None
-
-    color_map = get_global_color_map(df)
+    df_deck = df_deck.dropna(subset=["X-arm", "Y-arm", "Posición Asignada", "Weight (KGS)", "Bodega"])
+    df_deck = df_deck[pd.to_numeric(df_deck["X-arm"], errors='coerce').notnull()]
+    df_deck = df_deck[pd.to_numeric(df_deck["Y-arm"], errors='coerce').notnull()]
+    df_deck = df_deck[pd.to_numeric(df_deck["Weight (KGS)"], errors='coerce').notnull()]
 
-    fig, ax = plt.subplots(figsize=(22, 6))
+    if df_deck.empty:
+        st.warning(spec["invalid_message"])
+        return None
 
     if restricciones_df is not None:
-        valid_positions = restricciones_df[restricciones_df["Bodega"] == "MD"]["Position"].tolist()
-        df_md = df_md[df_md["Posición Asignada"].isin(valid_positions)]
-
-    for _, row in df_md.iterrows():
-        try:
-            x = float(row["X-arm"])
-            y = float(row["Y-arm"])
-            uld = str(row["Number ULD"])
-            pos = str(row["Posición Asignada"]).strip()
-            peso = float(row["Weight (KGS)"])
-            destino = str(row["ULD Final Destination"])
-            contorno = str(row["Contour"])
-            notas = str(row["Notes"]) if pd.notna(row["Notes"]) else "Sin notas"
-
-            max_weight = None
-            if restricciones_df is not None:
-                restr = restricciones_df[restricciones_df["Position"] == pos]
-                if not restr.empty:
-                    max_weight = restr["Symmetric_Max_Weight_(kg)_5%"].iloc[0] if row.get("tipo_carga", "").lower() == "simétrico" else restr["Asymmetric_Max_Weight_(kg)_5%"].iloc[0]
-
-            if pos in ["CFR", "FJR", "JLR", "LPR"]:
-                width = 2
-                height = 4
-            elif pos in ["CFG", "FJG", "JLG"]:
-                width = 2
-                height = 6
-            else:
-                width = 2
-                height = 2
-
-            rect = patches.Rectangle(
-                (x - width / 2, y - height / 2),
-                width,
-                height,
-                linewidth=1,
-                edgecolor='gray',
-                facecolor=color_map.get(destino, to_rgba('gray', alpha=0.6)),
-                label=destino
-            )
-            ax.add_patch(rect)
-
-            max_text_width = int(width * 8)
-            wrapped_notas = textwrap.wrap(notas, width=max_text_width, break_long_words=True)[:3]
-            wrapped_notas = '\n'.join(wrapped_notas)
-
-            line_height = height / 12
-            fontsize = 10
-            notes_fontsize = 9
-
-            ax.text(x, y + 3 * line_height, pos, ha='center', va='center', fontsize=fontsize, color='red', fontweight='bold', wrap=True, clip_on=True)
-            ax.text(x, y + 2 * line_height, uld, ha='center', va='center', fontsize=fontsize, color='black', fontweight='bold', wrap=True, clip_on=True)
-            ax.text(x, y + line_height, f"{peso:,.1f} kg", ha='center', va='center', fontsize=fontsize, color='black', fontweight='bold', wrap=True, clip_on=True)
-            ax.text(x, y, destino, ha='center', va='center', fontsize=fontsize, color='black', wrap=True, clip_on=True)
-            ax.text(x, y - line_height, contorno, ha='center', va='center', fontsize=fontsize, color='black', wrap=True, clip_on=True)
-            ax.text(x, y - height / 2 + line_height / 2, f"{wrapped_notas}", ha='center', va='bottom', fontsize=notes_fontsize, color='black', wrap=True, bbox=dict(facecolor='white', alpha=0.8, edgecolor='none', boxstyle='round,pad=0.3'), clip_on=True)
-        except (ValueError, TypeError) as e:
-            st.warning(f"Error al procesar pallet {uld}: {str(e)}")
-            continue
-
+        valid_positions = restricciones_df[restricciones_df["Bodega"].isin(spec["bodegas"])]["Position"].tolist()
+        df_deck = df_deck[df_deck["Posición Asignada"].isin(valid_positions)]
+    return df_deck
+
+def draw_pallet(ax, row, color_map, deck):
+    """
+    Agrega a los ejes el rectángulo y los textos de un pallet.
+
+    Returns:
+        list: Artistas agregados (vacía si el pallet no tiene datos válidos).
+    """
+    spec = DECK_SPECS[deck]
+    uld = str(row["Number ULD"])
+    try:
+        x = float(row["X-arm"])
+        y = float(row["Y-arm"])
+        pos = str(row["Posición Asignada"]).strip()
+        peso = float(row["Weight (KGS)"])
+        destino = str(row["ULD Final Destination"])
+        contorno = str(row["Contour"])
+        notas = str(row["Notes"]) if pd.notna(row["Notes"]) else "Sin notas"
+    except (ValueError, TypeError) as e:
+        st.warning(f"Error al procesar pallet {uld}: {str(e)}")
+        return []
+
+    width, height = pallet_size(deck, pos)
+    rect = patches.Rectangle(
+        (x - width / 2, y - height / 2),
+        width,
+        height,
+        linewidth=1,
+        edgecolor='gray',
+        facecolor=color_map.get(destino, to_rgba('gray', alpha=0.6)),
+        label=destino
+    )
+    ax.add_patch(rect)
+
+    max_text_width = int(width * 8)
+    wrapped_notas = textwrap.wrap(notas, width=max_text_width, break_long_words=True)[:3]
+    wrapped_notas = '\n'.join(wrapped_notas)
+
+    line_height = height / 12
+    fontsize = spec["fontsize"]
+    notes_fontsize = spec["notes_fontsize"]
+
+    return [
+        rect,
+        ax.text(x, y + 3 * line_height, pos, ha='center', va='center', fontsize=fontsize, color='red', fontweight='bold', wrap=True, clip_on=True),
+        ax.text(x, y + 2 * line_height, uld, ha='center', va='center', fontsize=fontsize, color='black', fontweight='bold', wrap=True, clip_on=True),
+        ax.text(x, y + line_height, f"{peso:,.1f} kg", ha='center', va='center', fontsize=fontsize, color='black', fontweight='bold', wrap=True, clip_on=True),
+        ax.text(x, y, destino, ha='center', va='center', fontsize=fontsize, color='black', wrap=True, clip_on=True),
+        ax.text(x, y - line_height, contorno, ha='center', va='center', fontsize=fontsize, color='black', wrap=True, clip_on=True),
+        ax.text(x, y - height / 2 + line_height / 2, f"{wrapped_notas}", ha='center', va='bottom', fontsize=notes_fontsize, color='black', wrap=True, bbox=dict(facecolor='white', alpha=0.8, edgecolor='none', boxstyle='round,pad=0.3'), clip_on=True)
+    ]
+
+def format_deck_axes(ax, deck):
+    """Límites, grilla y título comunes de las gráficas de distribución."""
     ax.set_xlim(14, 55)
     ax.set_ylim(-2.5, 2.5)
     ax.set_yticks(np.arange(-2.5, 3.0, 0.5))
     ax.set_xlabel("")
     ax.set_ylabel("")
-    ax.set_title("ULD Distribution Main Deck", fontsize=18, fontweight='bold')
+    ax.set_title(DECK_SPECS[deck]["title"], fontsize=18, fontweight='bold')
     ax.grid(True)
 
+def deck_legend(ax, color_map):
     handles = [patches.Patch(color=color, label=destino, alpha=0.6) for destino, color in color_map.items()]
-    ax.legend(handles=handles, loc='upper right', fontsize=8)
+    return ax.legend(handles=handles, loc='upper right', fontsize=8)
 
-    plt.tight_layout()
-    return fig
-
-def plot_lower_decks(df, restricciones_df=None):
-    df_lower = df[df["Bodega"].isin(["LDF", "LDA", "BULK"])].copy()
-    if df_lower.empty:
-        st.warning("No hay pallets asignados en LDF, LDA o Bulk.")
-        return None
-
-    required_columns = ["X-arm", "Y-arm", "Number ULD", "Posición Asignada", "Weight (KGS)", "ULD Final Destination", "Contour", "Bodega", "Notes"]
-    missing_columns = [col for col in required_columns if col not in df_lower.columns]
-    if missing_columns:
-        st.error(f"Faltan columnas en el DataFrame: {', '.join(missing_columns)}")
-        return None
-
-    df_lower = df_lower.dropna(subset=["X-arm", "Y-arm", "Posición Asignada", "Weight (KGS)", "Bodega"])
-    df_lower = df_lower[pd.to_numeric(df_lower["X-arm"], errors='coerce').notnull()]
-    df_lower = df_lower[pd.to_numeric(df_lower["Y-arm"], errors='coerce').notnull()]
-    df_lower = df_lower[pd.to_numeric(df_lower["Weight (KGS)"], errors='coerce').notnull()]
-    
-    if df_lower.empty:
-        st.warning("No hay datos válidos para graficar en LDF, LDA o Bulk.")
+def plot_deck(df, restricciones_df, deck):
+    df_deck = deck_pallets(df, restricciones_df, deck)
+    if df_deck is None:
         return None
 
     color_map = get_global_color_map(df)
-
     fig, ax = plt.subplots(figsize=(22, 6))
+    for _, row in df_deck.iterrows():
+        draw_pallet(ax, row, color_map, deck)
+    format_deck_axes(ax, deck)
+    deck_legend(ax, color_map)
 
-    if restricciones_df is not None:
-        valid_positions = restricciones_df[restricciones_df["Bodega"].isin(["LDF", "LDA", "BULK"])]["Position"].tolist()
-        df_lower = df_lower[df_lower["Posición Asignada"].isin(valid_positions)]
-
-    for _, row in df_lower.iterrows():
-        try:
-            x = float(row["X-arm"])
-            y = float(row["Y-arm"])
-            uld = str(row["Number ULD"])
-            pos = str(row["Posición Asignada"]).strip()
-            peso = float(row["Weight (KGS)"])
-            destino = str(row["ULD Final Destination"])
-            contorno = str(row["Contour"])
-            bodega = str(row["Bodega"])
-            notas = str(row["Notes"]) if pd.notna(row["Notes"]) else "Sin notas"
-
-            max_weight = None
-            if restricciones_df is not None:
-                restr = restricciones_df[restricciones_df["Position"] == pos]
-                if not restr.empty:
-                    max_weight = restr["Symmetric_Max_Weight_(kg)_5%"].iloc[0] if row.get("tipo_carga", "").lower() == "simétrico" else restr["Asymmetric_Max_Weight_(kg)_5%"].iloc[0]
-
-            width = 1.5
-            height = 1.5
-
-            rect = patches.Rectangle(
-                (x - width / 2, y - height / 2),
-                width,
-                height,
-                linewidth=1,
-                edgecolor='gray',
-                facecolor=color_map.get(destino, to_rgba('gray', alpha=0.6)),
-                label=destino
-            )
-            ax.add_patch(rect)
-
-            max_text_width = int(width * 8)
-            wrapped_notas = textwrap.wrap(notas, width=max_text_width, break_long_words=True)[:3]
-            wrapped_notas = '\n'.join(wrapped_notas)
-
-            line_height = height / 12
-            fontsize = 9
-            notes_fontsize = 8
-
-            ax.text(x, y + 3 * line_height, pos, ha='center', va='center', fontsize=fontsize, color='red', fontweight='bold', wrap=True, clip_on=True)
-            ax.text(x, y + 2 * line_height, uld, ha='center', va='center', fontsize=fontsize, color='black', fontweight='bold', wrap=True, clip_on=True)
-            ax.text(x, y + line_height, f"{peso:,.1f} kg", ha='center', va='center', fontsize=fontsize, color='black', fontweight='bold', wrap=True, clip_on=True)
-            ax.text(x, y, destino, ha='center', va='center', fontsize=fontsize, color='black', wrap=True, clip_on=True)
-            ax.text(x, y - line_height, contorno, ha='center', va='center', fontsize=fontsize, color='black', wrap=True, clip_on=True)
-            ax.text(x, y - height / 2 + line_height / 2, f"{wrapped_notas}", ha='center', va='bottom', fontsize=notes_fontsize, color='black', wrap=True, bbox=dict(facecolor='white', alpha=0.8, edgecolor='none', boxstyle='round,pad=0.3'), clip_on=True)
-        except (ValueError, TypeError) as e:
-            st.warning(f"Error al procesar pallet {uld}: {str(e)}")
-            continue
+    plt.tight_layout()
+    return fig
 
-    ax.set_xlim(14, 55)
-    ax.set_ylim(-2.5, 2.5)
-    ax.set_yticks(np.arange(-2.5, 3.0, 0.5))
-    ax.set_xlabel("")
-    ax.set_ylabel("")
-    ax.set_title("ULD Distribution Lower Deck", fontsize=18, fontweight='bold')
-    ax.grid(True)
+def plot_main_deck(df, restricciones_df=None):
+    return plot_deck(df, restricciones_df, "main")
 
-    handles = [patches.Patch(color=color, label=destino, alpha=0.6) for destino, color in color_map.items()]
-    ax.legend(handles=handles, loc='upper right', fontsize=8)
+def plot_lower_decks(df, restricciones_df=None):
+    return plot_deck(df, restricciones_df, "lower")
+
+def deck_positions(restricciones_df, deck):
+    """Posiciones (nombre, X-arm, Y-arm) de la bodega según las restricciones de la aeronave."""
+    if restricciones_df is None:
+        return []
+    positions = restricciones_df[restricciones_df["Bodega"].isin(DECK_SPECS[deck]["bodegas"])]
+    return list(zip(
+        positions["Position"].astype(str).str.strip(),
+        positions["Average_X-Arm_(m)"].astype(float),
+        positions["Average_Y-Arm_(m)"].astype(float)
+    ))
+
+class DeckBackground:
+    """
+    Capa fija de la gráfica de una bodega para una aeronave: ejes, grilla, título y el contorno
+    de cada posición de MD_LD_BULK_restrictions.csv, dibujados una sola vez.
+
+    `compose` restaura esa capa y dibuja encima solo los pallets asignados y la leyenda, sin
+    volver a generar la figura.
+    """
+
+    def __init__(self, deck, restricciones_df=None):
+        self.deck = deck
+        self.fig = Figure(figsize=DECK_FIGSIZE, dpi=DECK_DPI)
+        FigureCanvasAgg(self.fig)
+        self.ax = self.fig.add_subplot()
+        format_deck_axes(self.ax, deck)
+        for pos, x, y in deck_positions(restricciones_df, deck):
+            width, height = pallet_size(deck, pos)
+            self.ax.add_patch(patches.Rectangle(
+                (x - width / 2, y - height / 2), width, height,
+                fill=False, edgecolor='lightgray', linestyle='--', linewidth=0.6
+            ))
+        self.fig.tight_layout()
+        self.fig.canvas.draw()
+        self.background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        self.lock = threading.Lock()
+
+    def compose(self, df_deck, color_map, format="jpeg"):
+        """
+        Imagen de la bodega con los pallets de `df_deck` sobre la capa fija.
 
-    plt.tight_layout()
-    return fig
+        Args:
+            df_deck (pd.DataFrame): Pallets a dibujar (ver `deck_pallets`).
+            color_map (dict): Color por destino (ver `get_global_color_map`).
+            format (str): "jpeg" o "png".
+
+        Returns:
+            bytes: Imagen codificada.
+        """
+        with self.lock:
+            canvas = self.fig.canvas
+            canvas.restore_region(self.background)
+            artists = []
+            try:
+                for _, row in df_deck.iterrows():
+                    artists.extend(draw_pallet(self.ax, row, color_map, self.deck))
+                artists.append(deck_legend(self.ax, color_map))
+                for artist in artists:
+                    self.ax.draw_artist(artist)
+                image = Image.frombuffer("RGBA", canvas.get_width_height(), canvas.buffer_rgba(), "raw", "RGBA", 0, 1)
+                output = BytesIO()
+                if format == "png":
+                    image.save(output, format="PNG")
+                else:
+                    image.convert("RGB").save(output, format="JPEG")
+                return output.getvalue()
+            finally:
+                for artist in artists:
+                    artist.remove()
+
+_deck_backgrounds = OrderedDict()
+_deck_backgrounds_lock = threading.Lock()
+
+def get_deck_background(tail, deck, restricciones_df=None):
+    """
+    Capa fija de la bodega para la aeronave, creada la primera vez y reutilizada mientras sus
+    posiciones no cambien (p. ej. tras editar las restricciones).
+    """
+    key = (tail, deck, hash(tuple(deck_positions(restricciones_df, deck))))
+    with _deck_backgrounds_lock:
+        background = _deck_backgrounds.get(key)
+        if background is None:
+            background = DeckBackground(deck, restricciones_df)
+            _deck_backgrounds[key] = background
+            while len(_deck_backgrounds) > DECK_BACKGROUND_CACHE_SIZE:
+                _deck_backgrounds.popitem(last=False)
+        _deck_backgrounds.move_to_end(key)
+        return background
+
+def render_deck(df, restricciones_df, tail, deck, format="jpeg"):
+    """
+    Imagen de la distribución de una bodega: capa fija de la aeronave más los pallets asignados.
+
+    Args:
+        df (pd.DataFrame): Pallets asignados.
+        restricciones_df (pd.DataFrame, optional): Restricciones de la aeronave.
+        tail (str): Matrícula de la aeronave.
+        deck (str): "main" o "lower".
+        format (str): "jpeg" o "png".
+
+    Returns:
+        bytes | None: Imagen codificada, o None si no hay pallets para graficar.
+    """
+    df_deck = deck_pallets(df, restricciones_df, deck)
+    if df_deck is None:
+        return None
+    return get_deck_background(tail, deck, restricciones_df).compose(df_deck, get_global_color_map(df), format)
+
+def render_main_deck(df, restricciones_df, tail, format="jpeg"):
+    return render_deck(df, restricciones_df, tail, "main", format)
+
+def render_lower_decks(df, restricciones_df, tail, format="jpeg"):
+    return render_deck(df, restricciones_df, tail, "lower", format)
+
+def plot_cg_trajectory(ax, mac, weight, outside, breaks=None):
+    """
+    Superpone en la envolvente la trayectoria de CG en vuelo y marca los puntos fuera de crucero.
+
+    Args:
+        ax (matplotlib.axes.Axes): Ejes de la envolvente.
+        mac (np.ndarray): %MAC de cada punto, en las coordenadas del gráfico.
+        weight (np.ndarray): Peso de cada punto (kg).
+        outside (np.ndarray): True para los puntos fuera de la envolvente de crucero.
+        breaks (np.ndarray, optional): True entre dos puntos que no deben unirse (largo n - 1).
+    """
+    mac = np.asarray(mac, dtype=float)
+    weight = np.asarray(weight, dtype=float)
+    outside = np.asarray(outside, dtype=bool)
+    line_mac, line_weight = mac, weight
+    if breaks is not None and np.any(breaks):
+        cut = np.flatnonzero(breaks) + 1
+        line_mac = np.insert(mac, cut, np.nan)
+        line_weight = np.insert(weight, cut, np.nan)
+    ax.plot(line_mac, line_weight, color='#6A0DAD', linewidth=2, label='Trayectoria en vuelo')
+    if outside.any():
+        ax.plot(mac[outside], weight[outside], 'x', color='red', markersize=7, label='Fuera de crucero')
 
 def print_load_summary(df_asignados, pallets_imbalance):
     st.markdown('<div id="results_section"></div>', unsafe_allow_html=True)
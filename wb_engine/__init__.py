@@ -0,0 +1,32 @@
+"""
+Motor de cálculo de peso y balance sin dependencias de interfaz.
+
+Recibe datos tipados (FlightData, AircraftData, manifiesto y tablas de la aeronave) y
+devuelve resultados junto con una lista de diagnósticos estructurados; las páginas de
+Streamlit solo presentan esos diagnósticos (ver `utils.render_diagnostics`).
+"""
+from wb_engine.diagnostics import Diagnostic, Diagnostics
+from wb_engine.bundle import compile_aircraft, load_bundle_tables
+from wb_engine.positions import (
+    CONTOUR_POSITIONS, RULE_POSITIONS, clasificar_base_refinada, sugerencias_batch, sugerencias_final_con_fak,
+    update_position_values, check_cumulative_weights, hold_weights, pallets_lateral_imbalance
+)
+from wb_engine.fuel import (
+    TANK_CAPACITIES, FuelModel, fuel_moments_from_table, fuel_moments_from_tanks, landing_fuel_moments
+)
+from wb_engine.final_values import AddRemoval, load_add_removal, calculate_final_values, limit_diagnostics
+from wb_engine.strategies import (
+    assign_single_position_pallets, strategy_by_cg, strategy_by_aft_cg, strategy_by_destination,
+    strategy_hybrid, strategy_optimal, try_all_strategies
+)
+from wb_engine.trajectory import (
+    BURN_SEQUENCE, burn_tank_fuel, simulate_fuel_burn, trajectory_diagnostics
+)
+from wb_engine.envelope import (
+    PHASES, Envelope, EnvelopeCheck, EnvelopeMarginEvaluator, load_envelope, envelope_diagnostics, flag_trajectory
+)
+from wb_engine.engine import (
+    AircraftTables, EngineResult, load_aircraft_tables, aircraft_data_from_basic, passenger_load,
+    prepare_manifest, run_calculation
+)
+from wb_engine.profile import AircraftProfile, get_aircraft_profile, invalidate_aircraft_profile
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+BUNDLE_FILENAME = "aircraft_bundle.npz"
+MANIFEST_FILENAME = "aircraft_bundle.json"
+BUNDLE_VERSION = 1
+
+
+def file_checksum(path):
+    """SHA-256 del contenido del archivo."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_source_csv(path, read_kwargs):
+    """Lectura de un CSV de la aeronave tal como lo hace la aplicación (`;` y coma decimal)."""
+    return pd.read_csv(path, sep=";", decimal=",", **read_kwargs)
+
+
+def _source_entry(path):
+    stat = os.stat(path)
+    return {"sha256": file_checksum(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _source_is_fresh(path, entry):
+    """True si el CSV no cambió desde que se compiló (fecha y tamaño, o en su defecto el checksum)."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+    if stat.st_size != entry["size"]:
+        return False
+    if stat.st_mtime_ns == entry["mtime_ns"]:
+        return True
+    # Fecha distinta (p. ej. tras un checkout): se confirma por contenido
+    return file_checksum(path) == entry["sha256"]
+
+
+def _encode_table(attribute, df, arrays):
+    """
+    Agrupa las columnas por tipo en bloques 2D (uno por dtype numérico y uno de texto con su
+    máscara de nulos), para que cargar una tabla sean pocas lecturas del paquete.
+    """
+    blocks = {}
+    layout = []
+    for i in range(df.shape[1]):
+        values = df.iloc[:, i]
+        kind = values.dtype.str if values.dtype.kind in "biuf" else "text"
+        blocks.setdefault(kind, []).append(i)
+        layout.append([kind, len(blocks[kind]) - 1])
+
+    for kind, positions in blocks.items():
+        key = f"{attribute}/{kind}"
+        if kind == "text":
+            columns = [df.iloc[:, i] for i in positions]
+            masks = np.column_stack([column.isna().to_numpy() for column in columns])
+            arrays[key] = np.column_stack([
+                np.array(["" if missing else str(value) for value, missing in zip(column, mask)], dtype=str)
+                for column, mask in zip(columns, masks.T)
+            ])
+            arrays[f"{key}/mask"] = masks
+        else:
+            arrays[key] = np.column_stack([df.iloc[:, i].to_numpy() for i in positions])
+    return {"columns": [str(column) for column in df.columns], "layout": layout, "rows": len(df)}
+
+
+def _decode_table(attribute, table, bundle):
+    blocks = {}
+    for kind, _ in table["layout"]:
+        if kind in blocks:
+            continue
+        key = f"{attribute}/{kind}"
+        block = bundle[key]
+        if kind == "text":
+            block = block.astype(object)
+            block[bundle[f"{key}/mask"]] = np.nan
+        blocks[kind] = block
+    df = pd.DataFrame(
+        {i: blocks[kind][:, j] for i, (kind, j) in enumerate(table["layout"])},
+        index=pd.RangeIndex(table["rows"])
+    )
+    df.columns = table["columns"]
+    return df
+
+
+def compile_aircraft(aircraft_folder, aircraft_files):
+    """
+    Convierte los CSV de una aeronave en un paquete binario (aircraft_bundle.npz) con un arreglo
+    tipado por columna, más un manifiesto (aircraft_bundle.json) con el checksum de cada CSV de
+    origen y del paquete.
+
+    Args:
+        aircraft_folder (str): Carpeta de la aeronave.
+        aircraft_files (list): Tuplas (atributo, archivo, argumentos de lectura) a compilar.
+
+    Returns:
+        dict: El manifiesto escrito.
+    """
+    arrays = {}
+    manifest = {"version": BUNDLE_VERSION, "tables": {}}
+    for attribute, filename, read_kwargs in aircraft_files:
+        path = os.path.join(aircraft_folder, filename)
+        if not os.path.exists(path):
+            continue
+        df = read_source_csv(path, read_kwargs)
+        layout = _encode_table(attribute, df, arrays)
+        layout["source"] = filename
+        layout.update(_source_entry(path))
+        manifest["tables"][attribute] = layout
+
+    bundle_path = os.path.join(aircraft_folder, BUNDLE_FILENAME)
+    np.savez(bundle_path, **arrays)
+    manifest["bundle_sha256"] = file_checksum(bundle_path)
+    with open(os.path.join(aircraft_folder, MANIFEST_FILENAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    return manifest
+
+
+def load_bundle_tables(aircraft_folder):
+    """
+    Carga del paquete compilado las tablas cuyo CSV de origen no cambió desde la compilación.
+
+    Returns:
+        dict: Atributo -> DataFrame (igual al que produce `read_source_csv`). Vacío si no hay
+        paquete, si su versión o checksum no coinciden o si no se puede leer; las tablas que
+        falten deben leerse de los CSV.
+    """
+    manifest_path = os.path.join(aircraft_folder, MANIFEST_FILENAME)
+    bundle_path = os.path.join(aircraft_folder, BUNDLE_FILENAME)
+    if not (os.path.exists(manifest_path) and os.path.exists(bundle_path)):
+        return {}
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != BUNDLE_VERSION or file_checksum(bundle_path) != manifest.get("bundle_sha256"):
+            print(f"Advertencia: paquete compilado desactualizado o dañado en {aircraft_folder}; se usan los CSV.")
+            return {}
+        tables = {}
+        with np.load(bundle_path, allow_pickle=False) as bundle:
+            for attribute, layout in manifest["tables"].items():
+                if _source_is_fresh(os.path.join(aircraft_folder, layout["source"]), layout):
+                    tables[attribute] = _decode_table(attribute, layout, bundle)
+        return tables
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Advertencia: no se pudo leer el paquete compilado de {aircraft_folder} ({e}); se usan los CSV.")
+        return {}
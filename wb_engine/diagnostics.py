@@ -0,0 +1,50 @@
+from dataclasses import dataclass, field
+
+LEVELS = ("error", "warning", "info")
+
+
+@dataclass(frozen=True)
+class Diagnostic:
+    """
+    Mensaje estructurado producido por el motor de cálculo.
+
+    Attributes:
+        level (str): "error", "warning" o "info".
+        message (str): Texto para el usuario (en español, igual al que mostraba la interfaz).
+        code (str): Identificador estable del tipo de mensaje, para filtrarlo sin depender del texto.
+        context (dict): Datos asociados (posición, pesos, límites...).
+    """
+    level: str
+    message: str
+    code: str = ""
+    context: dict = field(default_factory=dict)
+
+
+class Diagnostics(list):
+    """Lista de Diagnostic con atajos para agregar mensajes por nivel."""
+
+    def add(self, level, message, code="", **context):
+        if level not in LEVELS:
+            raise ValueError(f"Nivel de diagnóstico no reconocido: {level}")
+        self.append(Diagnostic(level, message, code, context))
+
+    def error(self, message, code="", **context):
+        self.add("error", message, code, **context)
+
+    def warning(self, message, code="", **context):
+        self.add("warning", message, code, **context)
+
+    def info(self, message, code="", **context):
+        self.add("info", message, code, **context)
+
+    @property
+    def errors(self):
+        return [d for d in self if d.level == "error"]
+
+    @property
+    def warnings(self):
+        return [d for d in self if d.level == "warning"]
+
+    @property
+    def has_errors(self):
+        return any(d.level == "error" for d in self)
@@ -0,0 +1,329 @@
+import os
+from dataclasses import dataclass, field
+from functools import cached_property
+
+import pandas as pd
+
+from data_models import AircraftData, FlightData
+from wb_engine.bundle import load_bundle_tables, read_source_csv
+from wb_engine.diagnostics import Diagnostics
+from wb_engine.envelope import Envelope, EnvelopeCheck, EnvelopeMarginEvaluator, envelope_diagnostics, flag_trajectory, load_envelope
+from wb_engine.final_values import AddRemoval, calculate_final_values, limit_diagnostics, load_add_removal
+from wb_engine.fuel import (
+    REQUIRED_FUEL_TABLE_COLUMNS, FuelModel, fuel_moments_from_table, fuel_moments_from_tanks, landing_fuel_moments
+)
+from wb_engine.positions import (
+    check_cumulative_weights, clasificar_base_refinada, hold_weights, pallets_lateral_imbalance, sugerencias_batch
+)
+from wb_engine.strategies import assign_single_position_pallets, try_all_strategies
+from wb_engine.trajectory import simulate_fuel_burn, trajectory_diagnostics
+
+# Archivos de la carpeta de la aeronave (atributo de AircraftTables, nombre de archivo, argumentos de lectura)
+AIRCRAFT_FILES = [
+    ("basic_data", "basic_data.csv", {}),
+    ("restricciones_df", "MD_LD_BULK_restrictions.csv", {}),
+    ("exclusiones_df", "exclusiones.csv", {}),
+    ("cumulative_restrictions_aft_df", "cummulative_restrictions_AFT.csv", {}),
+    ("cumulative_restrictions_fwd_df", "cummulative_restrictions_FWD.csv", {}),
+    ("fuel_table", "Usable_fuel_table.csv", {"encoding": "latin-1"}),
+    ("outer_tanks_df", "outer_tanks.csv", {}),
+    ("inner_tanks_df", "inner_tanks.csv", {}),
+    ("center_tank_df", "center_tank.csv", {}),
+    ("trim_tank_df", "trim_tank.csv", {}),
+    ("passengers_df", "Passengers.csv", {}),
+    ("flite_deck_df", "Flite_deck_passengers.csv", {}),
+    ("trimset_df", "trimset.csv", {})
+]
+
+MANIFEST_COLUMNS = ["Contour", "Number ULD", "ULD Final Destination", "Weight (KGS)", "Pieces", "Notes"]
+
+
+@dataclass
+class AircraftTables:
+    """Tablas de una aeronave ya leídas y normalizadas, tal como las usa el cálculo."""
+    basic_data: pd.DataFrame
+    restricciones_df: pd.DataFrame
+    exclusiones_df: pd.DataFrame
+    cumulative_restrictions_fwd_df: pd.DataFrame
+    cumulative_restrictions_aft_df: pd.DataFrame
+    fuel_table: pd.DataFrame
+    outer_tanks_df: pd.DataFrame
+    inner_tanks_df: pd.DataFrame
+    center_tank_df: pd.DataFrame
+    trim_tank_df: pd.DataFrame
+    passengers_df: pd.DataFrame
+    flite_deck_df: pd.DataFrame
+    trimset_df: pd.DataFrame
+    add_removal: AddRemoval = field(default_factory=AddRemoval)
+    envelope: Envelope = None
+
+    @property
+    def tank_tables(self):
+        """Tablas por tipo de tanque, en el formato de `FuelModel`."""
+        return {
+            "outer": self.outer_tanks_df,
+            "inner": self.inner_tanks_df,
+            "center": self.center_tank_df,
+            "trim": self.trim_tank_df
+        }
+
+    @cached_property
+    def fuel_model(self):
+        """Curvas de combustible (`FuelModel`), construidas una vez por juego de tablas."""
+        return FuelModel(self.fuel_table, self.tank_tables)
+
+
+@dataclass
+class EngineResult:
+    """Resultado de `run_calculation`."""
+    df: pd.DataFrame
+    posiciones_usadas: set
+    rotaciones: dict
+    unassigned: list
+    bow: float = 0.0
+    bow_moment_x: float = 0.0
+    moment_x_fuel_tow: float = 0.0
+    moment_y_fuel_tow: float = 0.0
+    moment_x_fuel_lw: float = 0.0
+    moment_y_fuel_lw: float = 0.0
+    fuel_distribution: dict = field(default_factory=dict)
+    final_results: dict = field(default_factory=dict)
+    validation_df: pd.DataFrame = None
+    complies: bool = False  # Cumple acumulativos y límites de bodega, sin pallets sin asignar
+    ldf_weight: float = 0.0
+    lda_weight: float = 0.0
+    pallets_imbalance: float = 0.0
+    fuel_trajectory: pd.DataFrame = None
+    envelope_check: EnvelopeCheck = None
+    diagnostics: Diagnostics = field(default_factory=Diagnostics)
+
+
+def _with_zero_row(df, quantity_column):
+    """Agrega la fila de 0 pasajeros si la tabla no la tiene."""
+    if 0 in df[quantity_column].values:
+        return df
+    return pd.concat([pd.DataFrame({quantity_column: [0], "Weight": [0], "Moment": [0]}), df], ignore_index=True)
+
+
+def load_aircraft_tables(aircraft_folder, diagnostics=None):
+    """
+    Lee y normaliza los archivos de la carpeta de una aeronave, desde su paquete compilado
+    cuando está vigente y desde los CSV en caso contrario.
+
+    Args:
+        aircraft_folder (str): Carpeta de la aeronave (p. ej. "N342AV").
+        diagnostics (Diagnostics, optional): Lista donde se registran archivos faltantes o inválidos.
+
+    Returns:
+        AircraftTables | None: Las tablas, o None si falta algún archivo o columna requerida.
+    """
+    diagnostics = Diagnostics() if diagnostics is None else diagnostics
+    # Las tablas vigentes del paquete compilado (compile_aircraft.py) evitan leer sus CSV
+    tables = load_bundle_tables(aircraft_folder)
+    for attribute, filename, read_kwargs in AIRCRAFT_FILES:
+        if attribute in tables:
+            continue
+        path = os.path.join(aircraft_folder, filename)
+        if not os.path.exists(path):
+            diagnostics.error(
+                f"No se encontró el archivo en: {path}. Asegúrate de que el archivo exista en la ruta especificada.",
+                "archivo_no_encontrado", path=path
+            )
+            continue
+        tables[attribute] = read_source_csv(path, read_kwargs)
+    if len(tables) != len(AIRCRAFT_FILES):
+        return None
+
+    restricciones_df = tables["restricciones_df"]
+    restricciones_df.columns = [col.strip().replace(" ", "_") for col in restricciones_df.columns]
+    restricciones_df["Temp_Restriction_Symmetric"] = pd.to_numeric(restricciones_df["Temp_Restriction_Symmetric"], errors="coerce").fillna(0)
+    restricciones_df["Temp_Restriction_Asymmetric"] = pd.to_numeric(restricciones_df["Temp_Restriction_Asymmetric"], errors="coerce").fillna(0)
+
+    exclusiones_df = tables["exclusiones_df"]
+    exclusiones_df.set_index(exclusiones_df.columns[0], inplace=True)
+
+    if not all(col in tables["fuel_table"].columns for col in REQUIRED_FUEL_TABLE_COLUMNS):
+        diagnostics.error(
+            f"El archivo Usable_fuel_table.csv no contiene las columnas esperadas: {REQUIRED_FUEL_TABLE_COLUMNS}.",
+            "columnas_combustible"
+        )
+        return None
+
+    tables["passengers_df"] = _with_zero_row(tables["passengers_df"], "Quantity-Passenger")
+    tables["flite_deck_df"] = _with_zero_row(tables["flite_deck_df"], "Quantity-Passenger Flite-Deck")
+    return AircraftTables(
+        add_removal=load_add_removal(aircraft_folder, diagnostics), envelope=load_envelope(aircraft_folder, diagnostics), **tables
+    )
+
+
+def aircraft_data_from_basic(tail, basic_data):
+    """Construye AircraftData a partir de basic_data.csv."""
+    return AircraftData(
+        tail=tail,
+        mtoc=basic_data["MTOW (kg)"].values[0],
+        mlw=basic_data["MLW"].values[0],
+        mzfw=basic_data["MZFW"].values[0],
+        oew=basic_data["OEW"].values[0],
+        arm=basic_data["ARM"].values[0],
+        moment_aircraft=basic_data["Moment_Aircraft"].values[0],
+        cg_aircraft=basic_data["CG_Aircraft"].values[0],
+        lemac=basic_data["LEMAC"].values[0],
+        mac_length=basic_data["MAC_length"].values[0],
+        mrw_limit=basic_data["MRW"].values[0],
+        lateral_imbalance_limit=basic_data["Lateral_Imbalance_Limit"].values[0],
+        ldf_limit=basic_data["LDF_LIMIT"].values[0],
+        lda_limit=basic_data["LDA_LIMIT"].values[0]
+    )
+
+
+def passenger_load(passengers_table, quantity_column, quantity):
+    """
+    Peso y momento X de `quantity` pasajeros según la tabla de pasajeros.
+
+    Returns:
+        tuple: (weight, moment_x)
+    """
+    row = passengers_table[passengers_table[quantity_column] == quantity].iloc[0]
+    return row["Weight"], row["Moment"]
+
+
+def prepare_manifest(manifest_df, restricciones_df, tipo_carga):
+    """
+    Completa un manifiesto (columnas MANIFEST_COLUMNS) con la clasificación de base, las
+    posiciones sugeridas y las columnas de asignación vacías. Las columnas de asignación
+    que ya existan se conservan.
+    """
+    df = manifest_df.copy()
+    df["Weight (KGS)"] = pd.to_numeric(df["Weight (KGS)"], errors="coerce")
+    if "Baseplate Code" not in df.columns:
+        df[["Pallet Base Size", "Baseplate Code"]] = df["Number ULD"].apply(lambda x: pd.Series(clasificar_base_refinada(x)))
+    if "Posiciones Sugeridas" not in df.columns:
+        df["Posiciones Sugeridas"] = sugerencias_batch(df, restricciones_df, tipo_carga.lower())
+    defaults = {"Posición Asignada": "", "X-arm": None, "Y-arm": None, "Momento X": None, "Momento Y": None, "Bodega": None, "Rotated": False}
+    for column, default in defaults.items():
+        if column not in df.columns:
+            df[column] = default
+    return df
+
+
+def run_calculation(flight: FlightData, aircraft: AircraftData, manifest_df, tables: AircraftTables,
+                    optimizacion="cg", fuel_distribution=None, ballast_fuel=0.0, time_budget=10.0):
+    """
+    Cálculo completo de peso y balance sin interfaz: BOW con pasajeros, momentos de combustible,
+    asignación automática del manifiesto, valores finales y validaciones.
+
+    Args:
+        flight (FlightData): Datos del vuelo (combustible, tipo de carga, destino, performance, pasajeros).
+        aircraft (AircraftData): Datos de la aeronave.
+        manifest_df (pd.DataFrame): Manifiesto con las columnas MANIFEST_COLUMNS (se completa con `prepare_manifest`).
+        tables (AircraftTables): Tablas de la aeronave.
+        optimizacion (str | None): Estrategia ("cg", "aft_cg", "destino", "ambos", "optimo", "margen"); con None
+            solo se evalúan las posiciones ya asignadas en el manifiesto.
+        fuel_distribution (dict, optional): Combustible por tanque para el cargue manual; si es None
+            se usa el cargue automático de Usable_fuel_table.csv.
+        ballast_fuel (float): Combustible ballast y/o atrapado (kg).
+        time_budget (float): Tiempo máximo de búsqueda de las estrategias "optimo" y "margen" (s).
+
+    Returns:
+        EngineResult: Manifiesto asignado, resultados finales y diagnósticos.
+    """
+    diagnostics = Diagnostics()
+    tipo_carga = flight.tipo_carga.lower()
+    df = prepare_manifest(manifest_df, tables.restricciones_df, tipo_carga)
+    posiciones_usadas = set(df[df["Posición Asignada"] != ""]["Posición Asignada"].tolist())
+    result = EngineResult(df, posiciones_usadas, {}, [], diagnostics=diagnostics)
+
+    if aircraft.mac_length == 0:
+        diagnostics.error("MAC_length no puede ser cero.", "mac_invalido")
+        return result
+    if aircraft.lemac == 0:
+        diagnostics.error("LEMAC no puede ser cero.", "lemac_invalido")
+        return result
+    if flight.fuel_kg < 0 or flight.taxi_fuel < 0 or flight.trip_fuel < 0:
+        diagnostics.error("Los valores de combustible no pueden ser negativos.", "combustible_negativo")
+        return result
+    if flight.trip_fuel > (flight.fuel_kg - flight.taxi_fuel):
+        diagnostics.error("El Trip Fuel no puede ser mayor que el combustible disponible después del Taxi Fuel.", "trip_fuel_excedido")
+        return result
+
+    cockpit_weight, cockpit_moment_x = passenger_load(tables.flite_deck_df, "Quantity-Passenger Flite-Deck", flight.passengers_cockpit)
+    supernumerary_weight, supernumerary_moment_x = passenger_load(tables.passengers_df, "Quantity-Passenger", flight.passengers_supernumerary)
+    result.bow = aircraft.oew + cockpit_weight + supernumerary_weight
+    result.bow_moment_x = aircraft.moment_aircraft + cockpit_moment_x + supernumerary_moment_x
+    bow_moment_y = 0
+
+    fuel_for_tow = flight.fuel_kg - flight.taxi_fuel
+    fuel_for_lw = flight.fuel_kg - flight.taxi_fuel - flight.trip_fuel
+    if fuel_distribution is None:
+        fuel_mode = "Automático"
+        result.moment_x_fuel_tow, result.moment_y_fuel_tow, result.fuel_distribution = fuel_moments_from_table(tables.fuel_model, fuel_for_tow)
+    else:
+        fuel_mode = "Manual"
+        result.fuel_distribution = dict(fuel_distribution)
+        result.moment_x_fuel_tow, result.moment_y_fuel_tow = fuel_moments_from_tanks(fuel_distribution, tables.fuel_model)
+    result.moment_x_fuel_lw, result.moment_y_fuel_lw = landing_fuel_moments(tables.fuel_model, fuel_for_lw, diagnostics)
+
+    if optimizacion is not None:
+        envelope_margin = None
+        if tables.envelope is not None:
+            envelope_margin = EnvelopeMarginEvaluator(
+                tables.envelope, result.bow + tables.add_removal.weight, result.bow_moment_x + tables.add_removal.moment_x,
+                flight.fuel_kg, flight.taxi_fuel, flight.trip_fuel, result.moment_x_fuel_tow, result.moment_x_fuel_lw,
+                aircraft.lemac, aircraft.mac_length
+            )
+        assign_single_position_pallets(df, tables.restricciones_df, tipo_carga, tables.exclusiones_df, posiciones_usadas, diagnostics)
+        result.posiciones_usadas, result.rotaciones, result.unassigned = try_all_strategies(
+            df, tables.restricciones_df, tipo_carga, tables.exclusiones_df, posiciones_usadas, flight.destino_inicial,
+            optimizacion, result.bow, result.bow_moment_x, bow_moment_y, flight.fuel_kg, flight.taxi_fuel,
+            result.moment_x_fuel_tow, result.moment_y_fuel_tow, aircraft.lemac, aircraft.mac_length,
+            tables.cumulative_restrictions_fwd_df, tables.cumulative_restrictions_aft_df,
+            ldf_limit=aircraft.ldf_limit, lda_limit=aircraft.lda_limit, time_budget=time_budget, diagnostics=diagnostics,
+            envelope_margin=envelope_margin
+        )
+    # Pallets sin posición según el DataFrame final (si los reintentos de la estrategia no cumplen
+    # las restricciones acumulativas, todos sus pallets quedan desasignados)
+    result.unassigned = [(row["Number ULD"], row["Weight (KGS)"]) for _, row in df[df["Posición Asignada"] == ""].iterrows()]
+
+    df_asignados = df[df["Posición Asignada"] != ""]
+    result.final_results = calculate_final_values(
+        df_asignados, result.bow, result.bow_moment_x, bow_moment_y,
+        flight.fuel_kg, flight.taxi_fuel, flight.trip_fuel,
+        result.moment_x_fuel_tow, result.moment_y_fuel_tow, result.moment_x_fuel_lw, result.moment_y_fuel_lw,
+        aircraft.lemac, aircraft.mac_length, aircraft.mtoc, aircraft.mlw, aircraft.mzfw,
+        flight.performance_tow, tables.trimset_df,
+        fuel_distribution=result.fuel_distribution, fuel_mode=fuel_mode, tail=aircraft.tail,
+        ballast_fuel=ballast_fuel, performance_lw=flight.performance_lw, add_removal=tables.add_removal
+    )
+    limit_diagnostics(result.final_results, aircraft, flight.performance_tow, flight.performance_lw, diagnostics)
+    result.fuel_trajectory = simulate_fuel_burn(
+        tables.fuel_model, result.fuel_distribution, result.final_results["zfw_peso"], result.final_results["zfw_momento_x"],
+        fuel_for_tow, flight.trip_fuel, aircraft.lemac, aircraft.mac_length, ballast_fuel=ballast_fuel
+    )
+    if tables.envelope is not None:
+        final = result.final_results
+        result.envelope_check = tables.envelope.check(
+            [final["zfw_peso"], final["tow"], final["lw"]], [final["zfw_mac"], final["tow_mac"], final["lw_mac"]]
+        )
+        envelope_diagnostics(tables.envelope, final, diagnostics)
+        flag_trajectory(tables.envelope, result.fuel_trajectory)
+        trajectory_diagnostics(result.fuel_trajectory, result.fuel_trajectory["Fuera de crucero"], diagnostics)
+
+    cumple, result.validation_df = check_cumulative_weights(
+        df_asignados, tables.cumulative_restrictions_fwd_df, tables.cumulative_restrictions_aft_df, diagnostics
+    )
+    result.ldf_weight, result.lda_weight = hold_weights(df_asignados)
+    for bodega, weight, limit in (("LDF", result.ldf_weight, aircraft.ldf_limit), ("LDA", result.lda_weight, aircraft.lda_limit)):
+        if weight > limit:
+            diagnostics.error(
+                f"El peso total en {bodega} ({weight:.1f} kg) excede el límite permitido ({limit:.1f} kg).",
+                "bodega_excedida", bodega=bodega, weight=weight, limit=limit
+            )
+    result.complies = (
+        cumple and result.ldf_weight <= aircraft.ldf_limit and result.lda_weight <= aircraft.lda_limit and not result.unassigned
+    )
+    result.pallets_imbalance = pallets_lateral_imbalance(df_asignados)
+    if result.unassigned and df_asignados.empty:
+        diagnostics.error("Ningún pallet del manifiesto quedó asignado.", "sin_pallets_asignados", pallets=len(result.unassigned))
+    for uld, _ in result.unassigned:
+        diagnostics.warning(f"El pallet {uld} quedó sin posición asignada.", "pallet_sin_asignar", uld=uld)
+    return result
@@ -0,0 +1,378 @@
+"""
+Envolventes de CG declaradas como datos.
+
+La envolvente de cada modelo está en `envelopes/<Model>.csv` junto a las carpetas de las
+aeronaves, con el modelo tomado de General_aircraft_database.csv; si el modelo no tiene archivo
+propio se usa el de DEFAULT_ENVELOPE_MODEL (A330-200F). Una aeronave con límites propios los
+declara en envelope.csv dentro de su carpeta, que tiene prioridad sobre la del modelo.
+
+Columnas de envelope.csv (separador `;`, coma decimal):
+    Phase: "takeoff", "cruise" o "landing" para los límites; "reference" para las líneas de
+        peso de referencia del gráfico; "projection" para la proyección del gráfico A330-200F.
+    Limit: "fwd" o "aft" para los límites; el rótulo de la línea para "reference";
+        "slope" o "pivot" para "projection".
+    Weight: Peso (kg) del vértice o de la línea de referencia.
+    MAC: %MAC del vértice.
+
+Los vértices de cada límite se toman en el orden del archivo (ordenados por peso de forma
+estable), por lo que dos vértices con el mismo peso describen un escalón. La proyección solo
+afecta al gráfico: desplaza cada %MAC en `slope_MAC * peso / slope_Weight`, hacia adelante si
+está por debajo de `pivot` y hacia atrás si está por encima; la verificación se hace en %MAC real.
+"""
+import os
+from bisect import bisect_right
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from wb_engine.diagnostics import Diagnostics
+
+ENVELOPE_FILENAME = "envelope.csv"
+MODEL_ENVELOPES_DIR = "envelopes"
+AIRCRAFT_DATABASE_FILENAME = "General_aircraft_database.csv"
+DEFAULT_ENVELOPE_MODEL = "A330-200F"
+ENVELOPE_COLUMNS = ["Phase", "Limit", "Weight", "MAC"]
+PHASES = ("takeoff", "cruise", "landing")
+PHASE_NAMES = {"takeoff": "despegue", "cruise": "crucero", "landing": "aterrizaje"}
+# Punto de carga que se verifica en cada fase
+MARGIN_POINTS = (("ZFW", "cruise"), ("TOW", "takeoff"), ("LW", "landing"))
+
+
+@dataclass
+class EnvelopeCheck:
+    """
+    Resultado de `Envelope.check`: una fila por fase y una columna por punto.
+
+    Attributes:
+        phases (tuple): Fases verificadas, en el orden de las filas.
+        fwd_limit (np.ndarray): Límite FWD (%MAC) al peso de cada punto; NaN fuera del rango de pesos.
+        aft_limit (np.ndarray): Límite AFT (%MAC) al peso de cada punto; NaN fuera del rango de pesos.
+        fwd_margin (np.ndarray): %MAC del punto menos el límite FWD (negativo si está más adelante).
+        aft_margin (np.ndarray): Límite AFT menos el %MAC del punto (negativo si está más atrás).
+        inside (np.ndarray): True si el punto está dentro de la envolvente de la fase.
+    """
+    phases: tuple
+    fwd_limit: np.ndarray
+    aft_limit: np.ndarray
+    fwd_margin: np.ndarray
+    aft_margin: np.ndarray
+    inside: np.ndarray
+
+    @property
+    def margin(self):
+        """Margen al límite más cercano (%MAC); negativo fuera de la envolvente."""
+        return np.fmin(self.fwd_margin, self.aft_margin)
+
+    def row(self, phase):
+        return self.phases.index(phase)
+
+
+class Envelope:
+    """
+    Límites de CG de una aeronave compilados en arreglos ordenados por peso.
+
+    Attributes:
+        limits (dict): Fase -> {"fwd": (pesos, %MAC), "aft": (pesos, %MAC)}.
+        references (list): Líneas de referencia del gráfico como (rótulo, peso).
+        projection (tuple | None): (pivot, slope_mac, slope_weight) del gráfico proyectado.
+    """
+
+    def __init__(self, envelope_df):
+        self.limits = {}
+        self.references = []
+        self.projection = None
+
+        phases = envelope_df["Phase"].astype(str).str.strip().str.lower()
+        labels = envelope_df["Limit"].astype(str).str.strip()
+        weights = pd.to_numeric(envelope_df["Weight"], errors="coerce").to_numpy(dtype=float)
+        macs = pd.to_numeric(envelope_df["MAC"], errors="coerce").to_numpy(dtype=float)
+
+        for phase in PHASES:
+            curves = {}
+            for limit in ("fwd", "aft"):
+                mask = ((phases == phase) & (labels.str.lower() == limit)).to_numpy()
+                order = np.argsort(weights[mask], kind="stable")
+                curve = (weights[mask][order], macs[mask][order])
+                if len(curve[0]) < 2 or np.isnan(curve[0]).any() or np.isnan(curve[1]).any():
+                    raise ValueError(f"El límite {limit} de la fase {phase} necesita al menos dos vértices con peso y %MAC.")
+                curves[limit] = curve
+            self.limits[phase] = curves
+
+        for label, weight in zip(labels[phases == "reference"], weights[(phases == "reference").to_numpy()]):
+            self.references.append((label, weight))
+
+        projection = {label.lower(): (weight, mac) for label, weight, mac in zip(
+            labels[phases == "projection"], weights[(phases == "projection").to_numpy()], macs[(phases == "projection").to_numpy()]
+        )}
+        if projection:
+            slope_weight, slope_mac = projection["slope"]
+            self.projection = (projection["pivot"][1], slope_mac, slope_weight)
+
+    @property
+    def phases(self):
+        return tuple(self.limits)
+
+    def weight_range(self, phase):
+        """Rango de pesos (mínimo, máximo) cubierto por los dos límites de la fase."""
+        (fwd_w, _), (aft_w, _) = self.limits[phase]["fwd"], self.limits[phase]["aft"]
+        return max(fwd_w[0], aft_w[0]), min(fwd_w[-1], aft_w[-1])
+
+    def check(self, weights, macs, phases=None):
+        """
+        Verifica puntos (peso, %MAC) contra las envolventes de varias fases a la vez.
+
+        Args:
+            weights (array-like): Pesos (kg).
+            macs (array-like): %MAC de cada punto.
+            phases (tuple, optional): Fases a verificar; por defecto todas.
+
+        Returns:
+            EnvelopeCheck: Límites, márgenes y marcas dentro/fuera, con forma (fases, puntos).
+        """
+        phases = tuple(phases or self.phases)
+        weights = np.atleast_1d(np.asarray(weights, dtype=float))
+        macs = np.atleast_1d(np.asarray(macs, dtype=float))
+
+        fwd_limit = np.empty((len(phases), len(weights)))
+        aft_limit = np.empty((len(phases), len(weights)))
+        for i, phase in enumerate(phases):
+            low, high = self.weight_range(phase)
+            in_range = (weights >= low) & (weights <= high)
+            fwd_limit[i] = np.where(in_range, np.interp(weights, *self.limits[phase]["fwd"]), np.nan)
+            aft_limit[i] = np.where(in_range, np.interp(weights, *self.limits[phase]["aft"]), np.nan)
+
+        fwd_margin = macs - fwd_limit
+        aft_margin = aft_limit - macs
+        inside = (fwd_margin >= 0) & (aft_margin >= 0)
+        return EnvelopeCheck(phases, fwd_limit, aft_limit, fwd_margin, aft_margin, inside)
+
+    def project(self, macs, weights):
+        """%MAC en las coordenadas del gráfico (sin cambios si la envolvente no tiene proyección)."""
+        macs = np.asarray(macs, dtype=float)
+        if self.projection is None:
+            return macs
+        pivot, slope_mac, slope_weight = self.projection
+        return macs + np.sign(macs - pivot) * slope_mac * np.asarray(weights, dtype=float) / slope_weight
+
+
+def _interp_limit(weight, weights, macs):
+    """`np.interp` para un solo peso sobre listas (sin el costo de crear arreglos en cada llamada)."""
+    j = bisect_right(weights, weight) - 1
+    if j < 0:
+        return macs[0]
+    if j >= len(weights) - 1:
+        return macs[-1]
+    return macs[j] + (macs[j + 1] - macs[j]) * (weight - weights[j]) / (weights[j + 1] - weights[j])
+
+
+class EnvelopeMarginEvaluator:
+    """
+    Margen mínimo (%MAC) a los límites FWD/AFT de ZFW (crucero), TOW (despegue) y LW (aterrizaje)
+    en función del peso y el momento X de la carga; es el objetivo "Margen de envolvente" del
+    planificador.
+
+    Los pesos y momentos fijos de cada punto (BOW y combustible) y los vértices de cada límite
+    se guardan al construirlo. El planificador evalúa todas las posiciones candidatas de un
+    pallet con una sola llamada: los límites se interpolan una vez para el peso resultante y el
+    %MAC y el margen de cada candidata se calculan sobre un arreglo de momentos. Los pesos fuera
+    del rango de una fase se acotan a sus extremos para que los planes sigan siendo comparables;
+    el aviso de peso fuera de rango lo da `envelope_diagnostics`.
+    """
+
+    def __init__(self, envelope, bow, bow_moment_x, fuel_kg, taxi_fuel, trip_fuel, moment_x_fuel_tow, moment_x_fuel_lw, lemac, mac_length):
+        """
+        Args:
+            envelope (Envelope): Envolvente de la aeronave.
+            bow (float): Basic Operating Weight (con los ajustes de add_removal).
+            bow_moment_x (float): Momento X del BOW.
+            fuel_kg (float): Combustible total (kg).
+            taxi_fuel (float): Combustible de taxi (kg).
+            trip_fuel (float): Combustible de viaje (kg).
+            moment_x_fuel_tow (float): Momento X del combustible en TOW.
+            moment_x_fuel_lw (float): Momento X del combustible en LW.
+            lemac (float): LEMAC de la aeronave.
+            mac_length (float): Longitud de la MAC (en las unidades de `calculate_final_values`).
+        """
+        fuel_for_tow = fuel_kg - taxi_fuel
+        self.base_weight = (bow, bow + fuel_for_tow, bow + fuel_for_tow - trip_fuel)
+        # Forma (3, 1): una fila por punto de MARGIN_POINTS, para operar contra N momentos
+        self.base_moment = np.array([[bow_moment_x], [bow_moment_x + moment_x_fuel_tow], [bow_moment_x + moment_x_fuel_lw]], dtype=float)
+        self.lemac = lemac
+        self.mac_length = mac_length
+        self.curves = []
+        for _, phase in MARGIN_POINTS:
+            (fwd_w, fwd_mac), (aft_w, aft_mac) = envelope.limits[phase]["fwd"], envelope.limits[phase]["aft"]
+            self.curves.append((
+                envelope.weight_range(phase),
+                (fwd_w.tolist(), fwd_mac.tolist()),
+                (aft_w.tolist(), aft_mac.tolist())
+            ))
+
+    def limits(self, cargo_weight):
+        """
+        Pesos y límites FWD/AFT de ZFW, TOW y LW para un peso de carga.
+
+        Returns:
+            tuple: (pesos, fwd, aft), arreglos de forma (3, 1).
+        """
+        weights, fwd, aft = [], [], []
+        for base, ((low, high), fwd_curve, aft_curve) in zip(self.base_weight, self.curves):
+            weight = base + cargo_weight
+            clipped = min(max(weight, low), high)
+            weights.append([weight])
+            fwd.append([_interp_limit(clipped, *fwd_curve)])
+            aft.append([_interp_limit(clipped, *aft_curve)])
+        return np.array(weights), np.array(fwd), np.array(aft)
+
+    def margins(self, cargo_weight, cargo_moments):
+        """
+        Margen mínimo de cada momento de carga posible con el mismo peso de carga.
+
+        Args:
+            cargo_weight (float): Peso de los pallets asignados (kg).
+            cargo_moments (float | array-like): Momento X de los pallets asignados, uno por alternativa.
+
+        Returns:
+            np.ndarray: Margen mínimo (%MAC) por alternativa; negativo si algún punto queda fuera.
+        """
+        weights, fwd, aft = self.limits(cargo_weight)
+        macs = ((self.base_moment + np.atleast_1d(np.asarray(cargo_moments, dtype=float))) / weights - self.lemac) / self.mac_length
+        return np.minimum(macs - fwd, aft - macs).min(axis=0)
+
+    def margin_bound(self, cargo_weight, moment_min, moment_max):
+        """
+        Cota superior del margen mínimo si el momento final de la carga queda en
+        [moment_min, moment_max] con peso `cargo_weight`.
+        """
+        weights, fwd, aft = self.limits(cargo_weight)
+        mac_min = ((self.base_moment + moment_min) / weights - self.lemac) / self.mac_length
+        mac_max = ((self.base_moment + moment_max) / weights - self.lemac) / self.mac_length
+        # El margen de cada punto es máximo en el centro de su envolvente
+        best = np.clip((fwd + aft) / 2, mac_min, mac_max)
+        return float(np.minimum(best - fwd, aft - best).min())
+
+
+def aircraft_model(aircraft_folder):
+    """Modelo de la aeronave en General_aircraft_database.csv (carpeta superior), o None si no figura."""
+    tail = os.path.basename(os.path.normpath(aircraft_folder))
+    database_path = os.path.join(os.path.dirname(os.path.normpath(aircraft_folder)), AIRCRAFT_DATABASE_FILENAME)
+    try:
+        aircraft_db = pd.read_csv(database_path, sep=";")
+        models = aircraft_db.loc[aircraft_db["Tail"].astype(str).str.strip() == tail, "Model"]
+    except (OSError, ValueError, KeyError):
+        return None
+    return str(models.iloc[0]).strip() if not models.empty else None
+
+
+def resolve_envelope_path(aircraft_folder):
+    """
+    Archivo de envolvente que corresponde a la aeronave: su envelope.csv o, si no lo tiene, la
+    envolvente genérica de su modelo (o de DEFAULT_ENVELOPE_MODEL).
+
+    Returns:
+        tuple: (ruta, modelo), con modelo None si es el archivo propio de la aeronave.
+    """
+    envelope_path = os.path.join(aircraft_folder, ENVELOPE_FILENAME)
+    if os.path.exists(envelope_path):
+        return envelope_path, None
+    models_dir = os.path.join(os.path.dirname(os.path.normpath(aircraft_folder)), MODEL_ENVELOPES_DIR)
+    model = aircraft_model(aircraft_folder)
+    if model is None or not os.path.exists(os.path.join(models_dir, f"{model}.csv")):
+        model = DEFAULT_ENVELOPE_MODEL
+    return os.path.join(models_dir, f"{model}.csv"), model
+
+
+def load_envelope(aircraft_folder, diagnostics=None):
+    """
+    Lee envelope.csv de la carpeta de la aeronave o, si no existe, la envolvente de su modelo
+    (ver `resolve_envelope_path`).
+
+    Args:
+        aircraft_folder (str): Carpeta de la aeronave.
+        diagnostics (Diagnostics, optional): Lista donde se registra si falta, es inválido o se
+            usa la envolvente del modelo.
+
+    Returns:
+        Envelope | None: La envolvente, o None si no hay archivo o no es válido.
+    """
+    diagnostics = Diagnostics() if diagnostics is None else diagnostics
+    envelope_path, model = resolve_envelope_path(aircraft_folder)
+    if not os.path.exists(envelope_path):
+        diagnostics.warning(
+            f"No se encontró el archivo {os.path.join(aircraft_folder, ENVELOPE_FILENAME)} ni la envolvente del modelo "
+            f"{model}. No se verificará ni graficará la envolvente de CG.",
+            "envelope_no_encontrado", path=envelope_path
+        )
+        return None
+    if model is not None:
+        diagnostics.info(
+            f"Se usa la envolvente de CG del modelo {model}.",
+            "envelope_modelo", path=envelope_path, model=model
+        )
+    try:
+        envelope_df = pd.read_csv(envelope_path, sep=";", decimal=",")
+        missing = [col for col in ENVELOPE_COLUMNS if col not in envelope_df.columns]
+        if missing:
+            raise ValueError(f"faltan las columnas {missing}")
+        return Envelope(envelope_df)
+    except (ValueError, KeyError) as e:
+        diagnostics.error(f"El archivo {envelope_path} no es válido: {str(e)}", "envelope_invalido", path=envelope_path)
+        return None
+
+
+def envelope_diagnostics(envelope, final_results, diagnostics=None):
+    """
+    Verifica ZFW (crucero), TOW (despegue) y LW (aterrizaje) contra la envolvente.
+
+    Args:
+        envelope (Envelope): Envolvente de la aeronave.
+        final_results (dict): Resultado de `calculate_final_values`.
+        diagnostics (Diagnostics, optional): Lista donde se registran los puntos fuera de la envolvente.
+
+    Returns:
+        Diagnostics
+    """
+    diagnostics = Diagnostics() if diagnostics is None else diagnostics
+    points = (("ZFW", "zfw_peso", "zfw_mac", "cruise"), ("TOW", "tow", "tow_mac", "takeoff"), ("LW", "lw", "lw_mac", "landing"))
+    # Cada punto se verifica en su propia fase: la diagonal de la matriz fases x puntos
+    check = envelope.check(
+        [final_results[weight] for _, weight, _, _ in points],
+        [final_results[mac] for _, _, mac, _ in points],
+        tuple(phase for _, _, _, phase in points)
+    )
+    for i, (name, weight_key, mac_key, phase) in enumerate(points):
+        weight, mac = final_results[weight_key], final_results[mac_key]
+        condition = PHASE_NAMES[phase]
+        context = {"point": name, "phase": phase, "weight": weight, "mac": mac}
+        if np.isnan(check.fwd_limit[i, i]):
+            low, high = envelope.weight_range(phase)
+            diagnostics.error(
+                f"{name} ({weight:,.1f} kg) está fuera del rango de pesos de la envolvente de {condition} ({low:,.0f} - {high:,.0f} kg).",
+                "fuera_envolvente", **context
+            )
+        elif check.fwd_margin[i, i] < 0:
+            diagnostics.error(
+                f"{name} CG ({mac:.1f}% MAC) está más adelante del límite FWD ({check.fwd_limit[i, i]:.1f}% MAC) en condición de {condition}.",
+                "fuera_envolvente", limit=check.fwd_limit[i, i], **context
+            )
+        elif check.aft_margin[i, i] < 0:
+            diagnostics.error(
+                f"{name} CG ({mac:.1f}% MAC) está más atrás del límite AFT ({check.aft_limit[i, i]:.1f}% MAC) en condición de {condition}.",
+                "fuera_envolvente", limit=check.aft_limit[i, i], **context
+            )
+    return diagnostics
+
+
+def flag_trajectory(envelope, trajectory, phase="cruise"):
+    """
+    Agrega a la trayectoria de `simulate_fuel_burn` el margen y la marca de salida de la envolvente.
+
+    Returns:
+        pd.DataFrame: La trayectoria con "Margen crucero (%MAC)" y "Fuera de crucero".
+    """
+    check = envelope.check(trajectory["Peso (kg)"], trajectory["%MAC"], (phase,))
+    name = PHASE_NAMES[phase]
+    trajectory[f"Margen {name} (%MAC)"] = check.margin[0]
+    trajectory[f"Fuera de {name}"] = ~check.inside[0]
+    return trajectory
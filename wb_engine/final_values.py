@@ -0,0 +1,240 @@
+import os
+from dataclasses import dataclass
+
+import pandas as pd
+
+from wb_engine.diagnostics import Diagnostics
+
+ADD_REMOVAL_COLUMNS = ["component", "Weight", "Average X-Arm (m)", "Average Y-Arm (m)"]
+
+
+@dataclass(frozen=True)
+class AddRemoval:
+    """Totales de los componentes agregados/removidos del BOW (add_removal.csv)."""
+    weight: float = 0.0
+    moment_x: float = 0.0
+    moment_y: float = 0.0
+
+
+def load_add_removal(aircraft_folder, diagnostics=None):
+    """
+    Lee add_removal.csv de la carpeta de la aeronave y devuelve sus totales.
+
+    Si el archivo no existe, no tiene las columnas requeridas o no se puede leer, registra
+    una advertencia y devuelve totales en cero (se usan los valores BOW originales).
+
+    Args:
+        aircraft_folder (str): Carpeta de la aeronave.
+        diagnostics (Diagnostics, optional): Lista donde se registran los mensajes.
+
+    Returns:
+        AddRemoval: Peso y momentos totales de los componentes.
+    """
+    diagnostics = Diagnostics() if diagnostics is None else diagnostics
+    add_removal_path = os.path.join(aircraft_folder, "add_removal.csv")
+    try:
+        if not os.path.exists(add_removal_path):
+            diagnostics.warning(
+                f"No se encontró el archivo {add_removal_path}. Se usarán los valores BOW originales sin ajustes.",
+                "add_removal_no_encontrado", path=add_removal_path
+            )
+            return AddRemoval()
+        add_removal_df = pd.read_csv(add_removal_path, sep=";", decimal=",")
+        if not all(col in add_removal_df.columns for col in ADD_REMOVAL_COLUMNS):
+            diagnostics.warning(
+                f"El archivo {add_removal_path} no contiene todas las columnas requeridas: {ADD_REMOVAL_COLUMNS}",
+                "add_removal_columnas", path=add_removal_path
+            )
+            return AddRemoval()
+        weights = pd.to_numeric(add_removal_df["Weight"], errors="coerce").fillna(0)
+        x_arms = pd.to_numeric(add_removal_df["Average X-Arm (m)"], errors="coerce").fillna(0)
+        y_arms = pd.to_numeric(add_removal_df["Average Y-Arm (m)"], errors="coerce").fillna(0)
+        add_removal = AddRemoval(
+            weight=float(weights.sum()),
+            moment_x=float((weights * x_arms).sum()),
+            moment_y=float((weights * y_arms).sum())
+        )
+        diagnostics.info(f"Componentes adicionales cargados: Peso total = {add_removal.weight:.1f}", "add_removal_cargado", weight=add_removal.weight)
+        return add_removal
+    except Exception as e:
+        diagnostics.warning(
+            f"Error al leer {add_removal_path}: {str(e)}. Se usarán los valores BOW originales sin ajustes.",
+            "add_removal_error", path=add_removal_path
+        )
+        return AddRemoval()
+
+
+def calculate_final_values(
+    df_asignados,
+    bow,
+    bow_moment_x,
+    bow_moment_y,
+    fuel_kg,
+    taxi_fuel,
+    trip_fuel,
+    moment_x_fuel_tow,
+    moment_y_fuel_tow,
+    moment_x_fuel_lw,
+    moment_y_fuel_lw,
+    lemac,
+    mac_length,
+    aircraft_mtoc,
+    aircraft_mlw,
+    aircraft_mzfw,
+    performance_tow,
+    trimset_df,
+    fuel_distribution=None,
+    fuel_mode="Automático",
+    tail="N342AV",
+    ballast_fuel=0.0,
+    performance_lw=0.0,
+    add_removal=None
+):
+    """
+    Calcula pesos, momentos y %MAC de ZFW, MROW, TOW y LW, los límites dinámicos (MZFWD/MTOWD),
+    la carga máxima disponible y el pitch trim.
+
+    El BOW se ajusta con los componentes de add_removal.csv, que se reciben ya cargados
+    (ver `load_add_removal`) en lugar de leerse del disco en cada cálculo.
+
+    Args:
+        add_removal (AddRemoval, optional): Totales de componentes agregados/removidos; sin ajuste si es None.
+
+    Returns:
+        dict: Resultados finales (mismas claves que usa la interfaz).
+    """
+    add_removal = add_removal or AddRemoval()
+    add_removal_weight = add_removal.weight
+    add_removal_moment_x = add_removal.moment_x
+    add_removal_moment_y = add_removal.moment_y
+
+    # Adjust BOW and moments with add_removal components
+    adjusted_bow = bow + add_removal_weight
+    adjusted_bow_moment_x = bow_moment_x + add_removal_moment_x
+    adjusted_bow_moment_y = bow_moment_y + add_removal_moment_y
+
+    momento_x_total = df_asignados["Momento X"].sum() if not df_asignados.empty else 0.0
+    momento_y_total = df_asignados["Momento Y"].sum() if not df_asignados.empty else 0.0
+    peso_total = df_asignados["Weight (KGS)"].sum() if not df_asignados.empty else 0.0
+
+    zfw_peso = adjusted_bow + peso_total
+    zfw_momento_x = adjusted_bow_moment_x + momento_x_total
+    zfw_momento_y = adjusted_bow_moment_y + momento_y_total
+    zfw_cg_x = round(zfw_momento_x / zfw_peso, 3) if zfw_peso != 0 else 0
+    zfw_mac = round(((zfw_cg_x - lemac) / mac_length) * 1, 1)  # Convertido a %
+
+    # MROW Calculation (includes all fuel, including taxi fuel)
+    mrow = adjusted_bow + peso_total + fuel_kg
+    mrow_momento_x = adjusted_bow_moment_x + momento_x_total + moment_x_fuel_tow
+    mrow_momento_y = adjusted_bow_moment_y + momento_y_total + moment_y_fuel_tow
+    mrow_cg_x = round(mrow_momento_x / mrow, 3) if mrow != 0 else 0
+    mrow_mac = round(((mrow_cg_x - lemac) / mac_length) * 1, 1)  # Convertido a %
+
+    tow = adjusted_bow + peso_total + fuel_kg - taxi_fuel
+    tow_momento_x = adjusted_bow_moment_x + momento_x_total + moment_x_fuel_tow
+    tow_momento_y = adjusted_bow_moment_y + momento_y_total + moment_y_fuel_tow
+    tow_cg_x = round(tow_momento_x / tow, 3) if tow != 0 else 0
+    tow_mac = round(((tow_cg_x - lemac) / mac_length) * 1, 1)  # Convertido a %
+
+    lw = adjusted_bow + peso_total + fuel_kg - taxi_fuel - trip_fuel
+    lw_momento_x = adjusted_bow_moment_x + momento_x_total + moment_x_fuel_lw
+    lw_momento_y = adjusted_bow_moment_y + momento_y_total + moment_y_fuel_lw
+    lw_cg_x = round(lw_momento_x / lw, 3) if lw != 0 else 0
+    lw_mac = round(((lw_cg_x - lemac) / mac_length) * 1, 1)  # Convertido a %
+
+    lateral_imbalance = abs(tow_momento_y) if tow_momento_y is not None else 0.0
+
+    if tail != "N342AV":
+        if tow <= 227000:
+            mzfw_dynamic = 178000
+            mzfw_formula = "MZFWD = 178000 kg (TOW <= 227000 kg)"
+        else:
+            mzfw_dynamic = 178000 - (tow - 227000) / 1.2
+            mzfw_formula = f"MZFWD = 178000 - ({tow:.1f} - 227000) / 1.2 = {mzfw_dynamic:.1f} kg"
+        mzfw_dynamic -= ballast_fuel
+        mtow_dynamic = -1.2 * mzfw_dynamic + 440600
+        mtow_formula = f"MTOWD = -1.2 * {mzfw_dynamic:.1f} + 440600 = {mtow_dynamic:.1f} kg"
+    else:
+        mzfw_dynamic = aircraft_mzfw - ballast_fuel
+        mzfw_formula = None
+        mtow_dynamic = aircraft_mtoc
+        mtow_formula = None
+
+    max_payload_zfw = mzfw_dynamic - adjusted_bow
+    mtow_used = mtow_dynamic if tail != "N342AV" else aircraft_mtoc
+    if performance_tow > 0:
+        tow_limit = min(mtow_used, performance_tow)
+    else:
+        tow_limit = mtow_used
+    max_payload_tow = tow_limit - adjusted_bow - (fuel_kg - taxi_fuel)
+    if performance_lw > 0:
+        lw_limit = min(aircraft_mlw, performance_lw)
+    else:
+        lw_limit = aircraft_mlw
+    max_payload_lw = lw_limit - adjusted_bow - (fuel_kg - taxi_fuel - trip_fuel)
+    underload = max(0, min(max_payload_lw, max_payload_tow, max_payload_zfw) - peso_total)
+
+    trimset_row = trimset_df.iloc[(trimset_df.iloc[:, 0] - tow_mac).abs().argsort()[0]]
+    pitch_trim = trimset_row.iloc[1]
+
+    return {
+        "peso_total": peso_total,
+        "zfw_peso": zfw_peso,
+        "zfw_momento_x": zfw_momento_x,
+        "zfw_momento_y": zfw_momento_y,
+        "zfw_mac": zfw_mac,
+        "tow": tow,
+        "tow_momento_x": tow_momento_x,
+        "tow_momento_y": tow_momento_y,
+        "tow_mac": tow_mac,
+        "mrow": mrow,
+        "mrow_momento_x": mrow_momento_x,
+        "mrow_momento_y": mrow_momento_y,
+        "mrow_mac": mrow_mac,
+        "lw": lw,
+        "lw_momento_x": lw_momento_x,
+        "lw_momento_y": lw_momento_y,
+        "lw_mac": lw_mac,
+        "lateral_imbalance": lateral_imbalance,
+        "underload": underload,
+        "pitch_trim": pitch_trim,
+        "fuel_distribution": fuel_distribution,
+        "fuel_mode": fuel_mode,
+        "max_payload_lw": max_payload_lw,
+        "max_payload_tow": max_payload_tow,
+        "max_payload_zfw": max_payload_zfw,
+        "mzfw_dynamic": mzfw_dynamic,
+        "mzfw_formula": mzfw_formula,
+        "mtow_dynamic": mtow_dynamic,
+        "mtow_formula": mtow_formula
+    }
+
+
+def limit_diagnostics(final_results, aircraft_data, performance_tow, performance_lw, diagnostics=None):
+    """
+    Compara TOW, LW y ZFW contra los límites estructurales (dinámicos salvo en N342AV) y de performance.
+
+    Returns:
+        Diagnostics: Un error "limite_excedido" por cada límite superado.
+    """
+    diagnostics = Diagnostics() if diagnostics is None else diagnostics
+    tail = aircraft_data.tail
+    mtow_used = final_results["mtow_dynamic"] if tail != "N342AV" else aircraft_data.mtoc
+    mzfw_used = final_results["mzfw_dynamic"] if tail != "N342AV" else aircraft_data.mzfw
+
+    checks = [
+        (final_results["tow"] > mtow_used,
+         f"TOW ({final_results['tow']:.1f} kg) excede el {'MTOWD' if tail != 'N342AV' else 'MTOW'} ({mtow_used:.1f} kg)."),
+        (performance_tow > 0 and final_results["tow"] > performance_tow,
+         f"TOW ({final_results['tow']:.1f} kg) excede el Performance TOW ({performance_tow:.1f} kg)."),
+        (final_results["lw"] > aircraft_data.mlw,
+         f"LW ({final_results['lw']:.1f} kg) excede el MLW ({aircraft_data.mlw:.1f} kg)."),
+        (performance_lw > 0 and final_results["lw"] > performance_lw,
+         f"LW ({final_results['lw']:.1f} kg) excede el Performance LW ({performance_lw:.1f} kg)."),
+        (final_results["zfw_peso"] > mzfw_used,
+         f"ZFW ({final_results['zfw_peso']:.1f} kg) excede el {'MZFWD' if tail != 'N342AV' else 'MZFW'} ({mzfw_used:.1f} kg).")
+    ]
+    for exceeded, message in checks:
+        if exceeded:
+            diagnostics.error(message, "limite_excedido")
+    return diagnostics
@@ -0,0 +1,220 @@
+import numpy as np
+
+from wb_engine.diagnostics import Diagnostics
+
+# Capacidad máxima de cada tanque (kg)
+TANK_CAPACITIES = {
+    "Outer Tank LH": 2850,
+    "Outer Tank RH": 2850,
+    "Inner Tank LH": 32950,
+    "Inner Tank RH": 32950,
+    "Center Tank": 32725,
+    "Trim Tank": 4875
+}
+
+# Tabla de cada tanque y columnas de momento X/Y (None si el tanque no aporta momento Y)
+TANK_MOMENT_COLUMNS = {
+    "Outer Tank LH": ("outer", "Moment_X_OLH", "Moment_Y_OLH"),
+    "Outer Tank RH": ("outer", "Moment_X_ORH", "Moment_Y_ORH"),
+    "Inner Tank LH": ("inner", "Moment_X_ILH", "Moment_Y_ILH"),
+    "Inner Tank RH": ("inner", "Moment_X_IRH", "Moment_Y_IRH"),
+    "Center Tank": ("center", "CT_MOMENT_X", None),
+    "Trim Tank": ("trim", "T_MOMENT_X", None)
+}
+
+REQUIRED_FUEL_TABLE_COLUMNS = [
+    "Fuel_kg", "Outer Tank LH", "Outer Tank RH", "Inner Tank LH",
+    "Inner Tank RH", "Central Tank", "Trim Tank", "MOMENT-X", "MOMENT-Y"
+]
+
+# Columna de Usable_fuel_table.csv con el combustible de cada tanque
+FUEL_TABLE_TANK_COLUMNS = {
+    "Outer Tank LH": "Outer Tank LH",
+    "Outer Tank RH": "Outer Tank RH",
+    "Inner Tank LH": "Inner Tank LH",
+    "Inner Tank RH": "Inner Tank RH",
+    "Center Tank": "Central Tank",
+    "Trim Tank": "Trim Tank"
+}
+
+
+def _curve(kg, values):
+    """
+    Puntos (kg, valor) ordenados por peso, sin filas con NaN y sin pesos repetidos (se conserva
+    la primera fila de cada peso). Comienza en (0, 0) para que el combustible bajo la primera fila
+    se interpole desde el tanque vacío.
+    """
+    kg = np.asarray(kg, dtype=float)
+    values = np.asarray(values, dtype=float)
+    valid = ~np.isnan(kg) & ~np.isnan(values).reshape(len(kg), -1).any(axis=1)
+    kg, values = kg[valid], values[valid]
+    kg, first = np.unique(kg, return_index=True)
+    values = values[first]
+    if len(kg) == 0 or kg[0] > 0:
+        kg = np.concatenate([[0.0], kg])
+        values = np.concatenate([np.zeros((1,) + values.shape[1:]), values])
+    return kg, values
+
+
+def _interpolate(curve, fuel, extrapolate):
+    """
+    Interpolación lineal de la curva en `fuel` (escalar o arreglo) con `np.searchsorted`.
+
+    Por encima del último punto, si `extrapolate` es True se escala ese punto en proporción al
+    combustible (mismo brazo), como hacía la búsqueda de la fila más cercana; si no, se usa el
+    último punto tal cual.
+    """
+    kg, values = curve
+    fuel = np.asarray(fuel, dtype=float)
+    lower = np.clip(np.searchsorted(kg, fuel, side="right") - 1, 0, len(kg) - 1)
+    upper = np.minimum(lower + 1, len(kg) - 1)
+    span = kg[upper] - kg[lower]
+    weight = np.divide(fuel - kg[lower], span, out=np.zeros_like(span), where=span > 0)
+    if values.ndim > 1:
+        weight = weight[..., None]
+    result = values[lower] + weight * (values[upper] - values[lower])
+    if extrapolate:
+        beyond = fuel > kg[-1]
+        if np.any(beyond):
+            ratio = np.where(beyond, fuel / kg[-1], 1.0) if kg[-1] > 0 else np.where(beyond, 0.0, 1.0)
+            result = result * (ratio[..., None] if values.ndim > 1 else ratio)
+    return result
+
+
+def _as_output(value):
+    """Escalares de Python para entradas escalares; arreglos para entradas vectoriales."""
+    return float(value) if np.ndim(value) == 0 else value
+
+
+class FuelModel:
+    """
+    Curvas de combustible de una aeronave precalculadas como arreglos NumPy ordenados.
+
+    Responde peso -> momento por tanque (y la distribución de Usable_fuel_table.csv) mediante
+    búsqueda binaria e interpolación lineal entre filas, en lugar de ordenar la tabla completa
+    y tomar la fila más cercana en cada consulta. Todos los métodos aceptan un escalar o un
+    arreglo de cantidades de combustible.
+    """
+
+    def __init__(self, fuel_table, tank_tables):
+        """
+        Args:
+            fuel_table (pd.DataFrame): Tabla Usable_fuel_table.csv.
+            tank_tables (dict): Tablas por tipo de tanque ("outer", "inner", "center", "trim").
+        """
+        table_columns = [FUEL_TABLE_TANK_COLUMNS[tank] for tank in TANK_CAPACITIES] + ["MOMENT-X", "MOMENT-Y"]
+        self.fuel_table_curve = _curve(fuel_table["Fuel_kg"], fuel_table[table_columns])
+
+        self.tank_curves = {}
+        for tank, (table_key, column_x, column_y) in TANK_MOMENT_COLUMNS.items():
+            tank_df = tank_tables[table_key]
+            self.tank_curves[tank] = (
+                _curve(tank_df["Kg_Fuel"], tank_df[column_x]),
+                _curve(tank_df["Kg_Fuel"], tank_df[column_y]) if column_y is not None else None
+            )
+
+    def tank_moments(self, tank, fuel):
+        """
+        Momentos de un tanque.
+
+        Args:
+            tank (str): Tanque, con las claves de TANK_CAPACITIES.
+            fuel (float | np.ndarray): Combustible (kg) en el tanque.
+
+        Returns:
+            tuple: (moment_x, moment_y)
+        """
+        curve_x, curve_y = self.tank_curves[tank]
+        moment_x = _interpolate(curve_x, fuel, extrapolate=True)
+        moment_y = _interpolate(curve_y, fuel, extrapolate=True) if curve_y is not None else np.zeros_like(moment_x)
+        return _as_output(moment_x), _as_output(moment_y)
+
+    def tanks_moments(self, tank_fuel):
+        """
+        Suma de los momentos de varios tanques; los tanques sin combustible no aportan.
+
+        Args:
+            tank_fuel (dict): Combustible (kg) por tanque (escalares o arreglos del mismo largo).
+
+        Returns:
+            tuple: (moment_x, moment_y)
+        """
+        moment_x = 0.0
+        moment_y = 0.0
+        for tank, fuel in tank_fuel.items():
+            fuel = np.where(np.asarray(fuel, dtype=float) > 0, fuel, 0.0)
+            tank_x, tank_y = self.tank_moments(tank, fuel)
+            moment_x = moment_x + tank_x
+            moment_y = moment_y + tank_y
+        return _as_output(moment_x), _as_output(moment_y)
+
+    def table_moments(self, fuel):
+        """
+        Cargue automático: distribución y momentos de Usable_fuel_table.csv interpolados.
+
+        Args:
+            fuel (float | np.ndarray): Combustible total (kg). Fuera del rango de la tabla se
+                usa su última fila.
+
+        Returns:
+            tuple: (moment_x, moment_y, tank_fuel) con tank_fuel por tanque.
+        """
+        values = _interpolate(self.fuel_table_curve, fuel, extrapolate=False)
+        tank_fuel = {tank: _as_output(values[..., i]) for i, tank in enumerate(TANK_CAPACITIES)}
+        return _as_output(values[..., -2]), _as_output(values[..., -1]), tank_fuel
+
+
+def fuel_moments_from_table(fuel_model, fuel_for_tow):
+    """
+    Cargue automático: interpola Usable_fuel_table.csv en el combustible de despegue.
+
+    Args:
+        fuel_model (FuelModel): Curvas de combustible de la aeronave.
+        fuel_for_tow (float): Combustible al despegue (total menos taxi) en kg.
+
+    Returns:
+        tuple: (moment_x, moment_y, tank_fuel) con la distribución por tanque interpolada.
+    """
+    return fuel_model.table_moments(fuel_for_tow)
+
+
+def fuel_moments_from_tanks(tank_fuel, fuel_model):
+    """
+    Cargue manual: suma los momentos interpolados de cada tanque.
+
+    Args:
+        tank_fuel (dict): Combustible (kg) por tanque, con las claves de TANK_CAPACITIES.
+        fuel_model (FuelModel): Curvas de combustible de la aeronave.
+
+    Returns:
+        tuple: (moment_x, moment_y)
+    """
+    return fuel_model.tanks_moments(tank_fuel)
+
+
+def landing_fuel_moments(fuel_model, fuel_for_lw, diagnostics=None):
+    """
+    Momentos del combustible al aterrizaje, repartido por igual entre los tanques internos.
+
+    Args:
+        fuel_model (FuelModel): Curvas de combustible de la aeronave.
+        fuel_for_lw (float): Combustible remanente al aterrizaje (kg).
+        diagnostics (Diagnostics, optional): Lista donde se registra si se excede la capacidad.
+
+    Returns:
+        tuple: (moment_x, moment_y)
+    """
+    diagnostics = Diagnostics() if diagnostics is None else diagnostics
+    if fuel_for_lw <= 0:
+        return 0.0, 0.0
+
+    fuel_per_inner_tank = fuel_for_lw / 2
+    max_inner_tank_capacity = TANK_CAPACITIES["Inner Tank LH"]
+    if fuel_per_inner_tank > max_inner_tank_capacity:
+        diagnostics.warning(
+            f"El combustible por tanque interno ({fuel_per_inner_tank:.1f} kg) excede la capacidad máxima ({max_inner_tank_capacity:.1f} kg). Se usará el valor máximo.",
+            "capacidad_tanque_interno", fuel=fuel_per_inner_tank, capacity=max_inner_tank_capacity
+        )
+        fuel_per_inner_tank = max_inner_tank_capacity
+
+    return fuel_model.tanks_moments({"Inner Tank LH": fuel_per_inner_tank, "Inner Tank RH": fuel_per_inner_tank})
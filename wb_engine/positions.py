@@ -0,0 +1,244 @@
+import numpy as np
+import pandas as pd
+
+from restriction_index import get_restriction_index
+from exclusion_matrix import get_exclusion_matrix
+from cumulative_validator import validate_cumulative_weights
+from wb_engine.diagnostics import Diagnostics
+
+# Posiciones candidatas por regla de asignación. Las claves de contorno coinciden con el
+# Contour del manifiesto; las demás identifican reglas por prefijo de ULD o por notas.
+CONTOUR_POSITIONS = {
+    "SBS": ["ABL", "ABR", "BCL", "BCR", "CEL", "CER", "EFL", "EFR",
+            "FHL", "FHR", "HJL", "HJR", "JKL", "JKR", "KML",
+            "KMR", "MPL", "MPR", "PRL", "PRR"],
+    "TT": ["TT"],
+    "SS": ["SS"],
+    "RR": ["RR"],
+    "PRR": ["PRR"],
+    "PRL": ["PRL"],
+    "PP": ["PP"],
+    "BULK": ["51", "52", "53"],
+    "FAK": ["51", "52", "53"]
+}
+
+RULE_POSITIONS = {
+    **CONTOUR_POSITIONS,
+    "AKE/RKN": [
+        "11R", "11L", "12R", "12L", "13R", "13L", "14R", "14L",
+        "21R", "21L", "22R", "22L", "23R", "23L",
+        "31R", "31L", "32R", "32L", "33R", "33L",
+        "41R", "41L", "42R", "42L", "43R", "43L"
+    ],
+    "LD/PMC": ["12P", "13P", "21P", "22P", "31P", "32P", "41P", "42P"],
+    "LD/PLA": ["11", "12", "13", "14", "21", "22", "23", "31", "32", "33", "41", "42", "43"],
+    "LD": [
+        "11L", "11R", "12L", "12P", "12R", "13L", "13P", "13R",
+        "14L", "14R", "21L", "21P", "21R", "22L", "22P", "22R",
+        "23L", "23R", "31L", "31P", "31R", "32L", "32P", "32R",
+        "33L", "33R", "41L", "41P", "41R", "42L", "42P", "42R",
+        "43L", "43R"
+    ],
+    "NOTAS/FAK": ["51", "52", "53"],
+    "P9": ["11"],
+    "CL/M": ["AB", "BC", "CE", "EF", "FH", "HJ", "JK", "KM", "MP"],
+    "CT/M": ["12P", "13P", "21P", "22P", "31P", "32P", "41P", "42P", "AA", "BB", "CC", "EE", "FF", "GG", "HH", "JJ", "KK", "LL", "MM", "PP", "RR", "SS", "TT"],
+    "CT/K": ["A", "B", "C", "D", "E", "F", "G", "H", "I", "K", "L", "M", "P", "T", "S", "U", "12P", "13P", "21P", "22P", "31P", "32P", "41P", "42P"]
+}
+
+def clasificar_base_refinada(uld_code):
+    code = str(uld_code).strip().upper()
+    prefix = code[:3]
+    if prefix in ["PMC", "PMQ", "PMH"]:
+        return "96x125", "M"
+    elif prefix in ["PAJ", "PLA"]:
+        return "88x125", "A"
+    elif prefix == "PAG":
+        return "88x125", "G"
+    elif prefix == "AKE":
+        return "60.4x61.5", "D"
+    elif "FLIGHT" in code or "FAK" in code:
+        return "FAK", "FAK"
+    else:
+        return "Desconocido", "?"
+
+def _reglas_posiciones(df):
+    """
+    Determina, para cada fila del manifiesto, la clave de RULE_POSITIONS que aplica
+    ("" si ninguna), respetando la prioridad de las reglas de asignación.
+    """
+    contour = df["Contour"].astype(str).str.strip().str.upper()
+    uld = df["Number ULD"].astype(str).str.upper()
+    notas = df["Notes"].where(df["Notes"].notna(), "").astype(str).str.upper()
+    base_code = df["Baseplate Code"]
+
+    es_ld = contour.str.startswith("LD")
+    es_fak = (
+        notas.str.contains("FAK", regex=False) | notas.str.contains("FLIGHT", regex=False) |
+        uld.str.contains("FAK", regex=False) | uld.str.contains("FLIGHT", regex=False)
+    )
+    es_cl = notas.str.contains("CL", regex=False) | (contour == "CL")
+    es_ct = notas.str.contains("CT", regex=False) | (contour == "CT")
+
+    condiciones = [
+        contour.isin(["AKE", "RKN"]),
+        contour.isin(list(CONTOUR_POSITIONS)),
+        es_ld & uld.str.startswith("PMC"),
+        es_ld & uld.str.startswith("PLA"),
+        es_ld,
+        es_fak,
+        (contour == "P9") | notas.str.contains("P9", regex=False),
+        es_cl & (base_code == "M"),
+        es_ct & (base_code == "M"),
+        es_ct & (base_code == "K")
+    ]
+    claves = [
+        "AKE/RKN", contour.to_numpy(dtype=object), "LD/PMC", "LD/PLA", "LD",
+        "NOTAS/FAK", "P9", "CL/M", "CT/M", "CT/K"
+    ]
+    return pd.Series(np.select([c.to_numpy() for c in condiciones], claves, default=""), index=df.index)
+
+def sugerencias_batch(df, restricciones_df, tipo_carga):
+    """
+    Calcula las posiciones sugeridas de todo el manifiesto en una sola pasada.
+
+    Las filas se agrupan por regla de asignación y código de base; para cada grupo se compara
+    de forma vectorizada el peso de los pallets contra el Peso Máximo Efectivo de las posiciones
+    candidatas. Devuelve las mismas listas que `sugerencias_final_con_fak` fila por fila.
+
+    Args:
+        df (pd.DataFrame): Manifiesto con Contour, Number ULD, Notes, Baseplate Code y Weight (KGS).
+        restricciones_df (pd.DataFrame): DataFrame con las restricciones.
+        tipo_carga (str): Tipo de carga ("simétrico" o "asimétrico").
+
+    Returns:
+        pd.Series: Lista de posiciones sugeridas ("POS (peso_max kg)") por fila, con el índice de df.
+    """
+    restriction_index = get_restriction_index(restricciones_df)
+    claves = _reglas_posiciones(df).tolist()
+    base_codes = [None if pd.isna(code) else code for code in df["Baseplate Code"]]
+    pesos = df["Weight (KGS)"].to_numpy(dtype=float)
+
+    grupos = {}
+    for i, key in enumerate(zip(claves, base_codes)):
+        if key[0]:
+            grupos.setdefault(key, []).append(i)
+
+    sugerencias = [[] for _ in range(len(df))]
+    for (clave, base_code), filas in grupos.items():
+        positions = RULE_POSITIONS[clave]
+        pesos_max = restriction_index.max_weights(positions, base_code, tipo_carga)
+        for pos, peso_max in zip(positions, pesos_max):
+            if np.isnan(peso_max):
+                print(f"Advertencia: Posición {pos} no encontrada en restricciones_df para base {base_code}")
+        etiquetas = [f"{pos} ({peso_max:.1f} kg)" for pos, peso_max in zip(positions, pesos_max)]
+        permitidas = pesos[filas, None] <= pesos_max[None, :]
+        for fila, mascara in zip(filas, permitidas):
+            sugerencias[fila] = [etiqueta for etiqueta, ok in zip(etiquetas, mascara) if ok]
+    return pd.Series(sugerencias, index=df.index, dtype=object)
+
+def sugerencias_final_con_fak(row, restricciones_df, tipo_carga):
+    """Posiciones sugeridas para una sola fila del manifiesto (ver `sugerencias_batch`)."""
+    return sugerencias_batch(pd.DataFrame([row]), restricciones_df, tipo_carga).iloc[0]
+
+def update_position_values(df, idx, new_position, restricciones_df, tipo_carga, posiciones_usadas, exclusiones_df, diagnostics=None, prune_labels=False):
+    """
+    Valida y asigna una posición a un ULD del manifiesto.
+
+    Args:
+        df (pd.DataFrame): DataFrame con los datos del manifiesto.
+        idx (int): Índice de la fila a actualizar.
+        new_position (str): Posición a asignar (acepta la etiqueta "POS (peso kg)").
+        restricciones_df (pd.DataFrame): DataFrame con las restricciones.
+        tipo_carga (str): Tipo de carga ("simétrico" o "asimétrico").
+        posiciones_usadas (set): Conjunto de posiciones ya asignadas.
+        exclusiones_df (pd.DataFrame): DataFrame con las exclusiones.
+        diagnostics (Diagnostics, optional): Lista donde se registran los motivos de rechazo.
+        prune_labels (bool): Si es True, quita la posición de las sugerencias de las demás filas
+            comparando sin el sufijo de peso (asignación manual); si es False, compara la etiqueta completa.
+
+    Returns:
+        bool: True si la asignación fue exitosa, False si falló.
+    """
+    diagnostics = Diagnostics() if diagnostics is None else diagnostics
+    new_position = new_position.split(" (")[0] if " (" in new_position else new_position
+
+    row = df.loc[idx]
+    restric = get_restriction_index(restricciones_df).lookup(new_position, row["Baseplate Code"])
+    if restric is None:
+        diagnostics.error(f"Posición {new_position} inválida.", "posicion_invalida", position=new_position)
+        return False
+    
+    peso_max = restric.peso_maximo(tipo_carga)
+    
+    print(f"Validando {new_position} para {row['Number ULD']}, peso={row['Weight (KGS)']:.1f}, peso_max={peso_max:.1f}, base_code={row['Baseplate Code']}, tipo_carga={tipo_carga}")
+    
+    exclusion_matrix = get_exclusion_matrix(exclusiones_df)
+    if exclusion_matrix.conflicts(new_position, exclusion_matrix.occupied_mask(posiciones_usadas)):
+        diagnostics.error(
+            f"La posición {new_position} está excluida por posiciones ya asignadas: {exclusion_matrix.excluded_positions(new_position)}",
+            "posicion_excluida", position=new_position
+        )
+        return False
+    
+    if row["Weight (KGS)"] > peso_max:
+        diagnostics.error(
+            f"El peso {row['Weight (KGS)']:.1f} kg excede el máximo permitido de {peso_max:.1f} kg para la posición {new_position}.",
+            "peso_excedido", position=new_position, weight=row["Weight (KGS)"], max_weight=peso_max
+        )
+        return False
+        
+    x_arm = restric.x_arm
+    y_arm = restric.y_arm
+    
+    df.at[idx, "X-arm"] = x_arm
+    df.at[idx, "Y-arm"] = y_arm
+    df.at[idx, "Momento X"] = round(x_arm * row["Weight (KGS)"], 3)
+    df.at[idx, "Momento Y"] = round(y_arm * row["Weight (KGS)"], 3)
+    df.at[idx, "Posición Asignada"] = new_position
+    df.at[idx, "Bodega"] = restric.bodega
+    
+    for i in df.index:
+        if i != idx and isinstance(df.at[i, "Posiciones Sugeridas"], list):
+            if prune_labels:
+                df.at[i, "Posiciones Sugeridas"] = [pos for pos in df.at[i, "Posiciones Sugeridas"] if pos.split(" (")[0] != new_position]
+            else:
+                df.at[i, "Posiciones Sugeridas"] = [pos for pos in df.at[i, "Posiciones Sugeridas"] if pos != new_position]
+    
+    return True
+
+def check_cumulative_weights(df_asignados, cumulative_restrictions_fwd_df, cumulative_restrictions_aft_df, diagnostics=None):
+    """
+    Valida los pesos acumulativos FWD/AFT y registra una advertencia por cada posición que no cumple.
+
+    Returns:
+        tuple: (cumple, validation_df)
+    """
+    diagnostics = Diagnostics() if diagnostics is None else diagnostics
+    cumple, validation_df = validate_cumulative_weights(df_asignados, cumulative_restrictions_fwd_df, cumulative_restrictions_aft_df)
+    if not cumple:
+        for (_, row), x_arm in zip(validation_df.iterrows(), df_asignados["X-arm"]):
+            if row["Cumple"] == "No":
+                diagnostics.warning(
+                    f"El peso acumulativo en {row['Región']} para la posición {row['Posición Asignada']} (X-arm: {x_arm}) es {row['Peso Acumulativo (kg)']:.1f} kg, excede el máximo permitido de {row['Máximo Permitido (kg)']:.1f} kg.",
+                    "acumulativo_excedido", position=row["Posición Asignada"], region=row["Región"]
+                )
+    return cumple, validation_df
+
+def hold_weights(df_asignados):
+    """Peso total asignado en LDF y LDA (kg)."""
+    ldf_weight = df_asignados[df_asignados["Bodega"] == "LDF"]["Weight (KGS)"].sum() if not df_asignados[df_asignados["Bodega"] == "LDF"].empty else 0.0
+    lda_weight = df_asignados[df_asignados["Bodega"] == "LDA"]["Weight (KGS)"].sum() if not df_asignados[df_asignados["Bodega"] == "LDA"].empty else 0.0
+    return ldf_weight, lda_weight
+
+def pallets_lateral_imbalance(df_asignados):
+    """Diferencia absoluta (kg) entre el peso a la izquierda y a la derecha en MD, LDA y LDF."""
+    if df_asignados.empty:
+        return 0.0
+    relevant_pallets = df_asignados[
+        (df_asignados["Bodega"].isin(["MD", "LDA", "LDF"])) &
+        (df_asignados["Y-arm"] != 0)
+    ]
+    left_weight = relevant_pallets[relevant_pallets["Y-arm"] < 0]["Weight (KGS)"].sum()
+    right_weight = relevant_pallets[relevant_pallets["Y-arm"] > 0]["Weight (KGS)"].sum()
+    return abs(left_weight - right_weight)
@@ -0,0 +1,136 @@
+import os
+import threading
+
+import pandas as pd
+
+from wb_engine.diagnostics import Diagnostics
+from wb_engine.envelope import ENVELOPE_FILENAME, resolve_envelope_path
+from wb_engine.engine import AIRCRAFT_FILES, aircraft_data_from_basic, load_aircraft_tables
+
+BASIC_DATA_COLUMNS = [
+    "MTOW (kg)", "MLW", "MZFW", "OEW", "ARM", "Moment_Aircraft", "CG_Aircraft", "LEMAC",
+    "MAC_length", "MRW", "Lateral_Imbalance_Limit", "LDF_LIMIT", "LDA_LIMIT"
+]
+
+# Archivos cuya fecha de modificación invalida el perfil (add_removal.csv y envelope.csv son opcionales)
+PROFILE_FILES = [filename for _, filename, _ in AIRCRAFT_FILES] + ["add_removal.csv", ENVELOPE_FILENAME]
+
+
+def folder_signature(aircraft_folder):
+    """
+    Firma de los archivos de la aeronave: (archivo, mtime_ns, tamaño) por archivo, con None
+    si el archivo no existe. Cambia cuando cualquiera de ellos se guarda, crea o elimina, y
+    cuando cambia la envolvente de modelo que usa la aeronave sin envelope.csv.
+    """
+    signature = []
+    for filename in PROFILE_FILES:
+        try:
+            stat = os.stat(os.path.join(aircraft_folder, filename))
+            signature.append((filename, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append((filename, None, None))
+    envelope_path, _ = resolve_envelope_path(aircraft_folder)
+    try:
+        stat = os.stat(envelope_path)
+        signature.append((envelope_path, stat.st_mtime_ns, stat.st_size))
+    except OSError:
+        signature.append((envelope_path, None, None))
+    return tuple(signature)
+
+
+class AircraftProfile:
+    """
+    Archivos de una aeronave leídos, normalizados y validados una sola vez.
+
+    Attributes:
+        aircraft_folder (str): Carpeta de la aeronave.
+        tail (str): Matrícula.
+        tables (AircraftTables | None): Tablas de la aeronave; None si falta algún archivo.
+        aircraft_data (AircraftData | None): Datos de basic_data.csv; None si no son válidos.
+        signature (tuple): Firma de los archivos con la que se cargó (ver `folder_signature`).
+        diagnostics (Diagnostics): Mensajes de la carga y validación.
+    """
+
+    def __init__(self, aircraft_folder, tail=None):
+        self.aircraft_folder = aircraft_folder
+        self.tail = tail or os.path.basename(os.path.normpath(aircraft_folder))
+        self.signature = folder_signature(aircraft_folder)
+        self.diagnostics = Diagnostics()
+        self.aircraft_data = None
+        self.tables = load_aircraft_tables(aircraft_folder, self.diagnostics)
+        if self.tables is not None:
+            self._validate()
+
+    def _validate(self):
+        basic_data = self.tables.basic_data
+        missing = [col for col in BASIC_DATA_COLUMNS if col not in basic_data.columns]
+        if missing or basic_data.empty:
+            self.diagnostics.error(f"El archivo basic_data.csv no contiene las columnas esperadas: {missing or BASIC_DATA_COLUMNS}.", "basic_data_invalido")
+            self.tables = None
+            return
+        self.aircraft_data = aircraft_data_from_basic(self.tail, basic_data)
+
+        # Las columnas de peso se dejan numéricas para que las tablas compartidas no se modifiquen después
+        restricciones_df = self.tables.restricciones_df
+        for col in ["Symmetric_Max_Weight_(kg)_5%", "Asymmetric_Max_Weight_(kg)_5%"]:
+            restricciones_df[col] = pd.to_numeric(restricciones_df[col], errors="coerce").fillna(0)
+
+    @property
+    def valid(self):
+        return self.tables is not None
+
+    @property
+    def max_passengers_cockpit(self):
+        return int(self.tables.flite_deck_df["Quantity-Passenger Flite-Deck"].max())
+
+    @property
+    def max_passengers_supernumerary(self):
+        return int(self.tables.passengers_df["Quantity-Passenger"].max())
+
+    @property
+    def active_restrictions(self):
+        """Posiciones con restricción temporal activa."""
+        restricciones_df = self.tables.restricciones_df
+        return restricciones_df[
+            (restricciones_df["Temp_Restriction_Symmetric"] != 0) | (restricciones_df["Temp_Restriction_Asymmetric"] != 0)
+        ][["Position", "Bodega", "Temp_Restriction_Symmetric", "Temp_Restriction_Asymmetric"]]
+
+    @property
+    def add_removal_diagnostics(self):
+        return [d for d in self.diagnostics if d.code.startswith("add_removal")]
+
+
+_profile_cache = {}
+_profile_lock = threading.Lock()
+
+
+def _cache_key(aircraft_folder):
+    return os.path.normcase(os.path.abspath(aircraft_folder))
+
+
+def get_aircraft_profile(aircraft_folder, tail=None):
+    """
+    Devuelve el AircraftProfile de la carpeta desde la caché del proceso, recargándolo solo
+    si cambió la fecha de modificación, el tamaño o la existencia de alguno de sus archivos.
+
+    Las tablas del perfil se comparten entre ejecuciones: no deben modificarse en el lugar.
+    """
+    key = _cache_key(aircraft_folder)
+    signature = folder_signature(aircraft_folder)
+    with _profile_lock:
+        profile = _profile_cache.get(key)
+        if profile is not None and profile.signature == signature:
+            return profile
+    profile = AircraftProfile(aircraft_folder, tail)
+    with _profile_lock:
+        _profile_cache[key] = profile
+    return profile
+
+
+def invalidate_aircraft_profile(aircraft_folder=None):
+    """Descarta el perfil en caché de la carpeta (o todos si aircraft_folder es None)."""
+    with _profile_lock:
+        if aircraft_folder is None:
+            _profile_cache.clear()
+        else:
+            _profile_cache.pop(_cache_key(aircraft_folder), None)
@@ -0,0 +1,447 @@
+from cg_scoring import CGScorer
+from optimal_planner import OptimalPlanner
+from wb_engine.diagnostics import Diagnostics
+from wb_engine.positions import update_position_values, check_cumulative_weights
+
+def assign_single_position_pallets(df, restricciones_df, tipo_carga, exclusiones_df, posiciones_usadas, diagnostics=None):
+    """
+    Asigna automáticamente los pallets que tienen una sola posición sugerida.
+    
+    Args:
+        df (pd.DataFrame): DataFrame con los datos del manifiesto.
+        restricciones_df (pd.DataFrame): DataFrame con las restricciones.
+        tipo_carga (str): Tipo de carga ("simetrico" o "asimetrico").
+        exclusiones_df (pd.DataFrame): DataFrame con las exclusiones.
+        posiciones_usadas (set): Conjunto de posiciones ya asignadas.
+        diagnostics (Diagnostics, optional): Lista donde se registran los rechazos de posiciones.
+    """
+    for idx, row in df[df["Posición Asignada"] == ""].iterrows():
+        if len(row["Posiciones Sugeridas"]) == 1:
+            # Limpiar la posición para eliminar el peso máximo
+            pos = row["Posiciones Sugeridas"][0].split(" (")[0]
+            if pos not in posiciones_usadas and update_position_values(df, idx, pos, restricciones_df, tipo_carga, posiciones_usadas, exclusiones_df, diagnostics):
+                posiciones_usadas.add(pos)
+                df.at[idx, "Rotated"] = False
+
+def strategy_by_cg(df, restricciones_df, tipo_carga, exclusiones_df, posiciones_usadas, destino_inicial, bow, bow_moment_x, bow_moment_y, fuel_kg, taxi_fuel, moment_x_fuel_tow, moment_y_fuel_tow, lemac, mac_length, diagnostics=None):
+    """
+    Estrategia de asignación basada en el centro de gravedad (CG), optimizando TOW CG y ZFW CG alrededor de 28% MAC.
+    
+    Args:
+        df (pd.DataFrame): DataFrame con los datos del manifiesto.
+        restricciones_df (pd.DataFrame): DataFrame con las restricciones.
+        tipo_carga (str): Tipo de carga ("simetrico" o "asimetrico").
+        exclusiones_df (pd.DataFrame): DataFrame con las exclusiones.
+        posiciones_usadas (set): Conjunto de posiciones ya asignadas.
+        destino_inicial (str): Destino inicial (no usado en esta estrategia).
+        bow (float): Basic Operating Weight.
+        bow_moment_x (float): Momento X del BOW.
+        bow_moment_y (float): Momento Y del BOW.
+        fuel_kg (float): Combustible total (kg).
+        taxi_fuel (float): Combustible de taxi (kg).
+        moment_x_fuel_tow (float): Momento X del combustible en TOW.
+        moment_y_fuel_tow (float): Momento Y del combustible en TOW.
+        lemac (float): Leading Edge of Mean Aerodynamic Chord.
+        mac_length (float): Longitud del MAC.
+        diagnostics (Diagnostics, optional): Lista donde se registran los rechazos de posiciones.
+    
+    Returns:
+        tuple: (posiciones_usadas, rotaciones)
+    """
+    df_unassigned = df[df["Posición Asignada"] == ""].copy()  # Sin ordenar por peso
+    target_mac = 28.0  # Objetivo para TOW CG y ZFW CG
+    scorer = CGScorer(df, restricciones_df, tipo_carga, exclusiones_df, bow, bow_moment_x, fuel_kg, taxi_fuel, moment_x_fuel_tow, lemac, mac_length, target_mac)
+    rotaciones = {}
+    
+    for idx, row in df_unassigned.iterrows():
+        uld = row["Number ULD"]
+        weight = row["Weight (KGS)"]
+        # Limpiar las posiciones sugeridas para eliminar el peso máximo
+        sugeridas = [pos.split(" (")[0] for pos in row["Posiciones Sugeridas"] if pos.split(" (")[0] not in posiciones_usadas]
+        
+        if len(sugeridas) == 1:
+            pos = sugeridas[0]
+            if update_position_values(df, idx, pos, restricciones_df, tipo_carga, posiciones_usadas, exclusiones_df, diagnostics):
+                scorer.commit(df, idx)
+                posiciones_usadas.add(pos)
+                rotaciones[uld] = False
+                df.at[idx, "Rotated"] = False
+                continue
+        
+        best_position = scorer.best_position(df, idx, sugeridas, posiciones_usadas)
+        
+        if best_position:
+            update_position_values(df, idx, best_position, restricciones_df, tipo_carga, posiciones_usadas, exclusiones_df, diagnostics)
+            scorer.commit(df, idx)
+            posiciones_usadas.add(best_position)
+            rotaciones[uld] = False
+            df.at[idx, "Rotated"] = False
+    
+    return posiciones_usadas, rotaciones
+
+def strategy_by_aft_cg(df, restricciones_df, tipo_carga, exclusiones_df, posiciones_usadas, destino_inicial, bow, bow_moment_x, bow_moment_y, fuel_kg, taxi_fuel, moment_x_fuel_tow, moment_y_fuel_tow, lemac, mac_length, diagnostics=None):
+    """
+    Estrategia de asignación basada en el centro de gravedad (CG) con prioridad en colocar los pallets más pesados en las posiciones más traseras (mayor X-arm),
+    optimizando TOW CG y ZFW CG alrededor de 28% MAC.
+    
+    Args:
+        df (pd.DataFrame): DataFrame con los datos del manifiesto.
+        restricciones_df (pd.DataFrame): DataFrame con las restricciones.
+        tipo_carga (str): Tipo de carga ("simetrico" o "asimetrico").
+        exclusiones_df (pd.DataFrame): DataFrame con las exclusiones.
+        posiciones_usadas (set): Conjunto de posiciones ya asignadas.
+        destino_inicial (str): Destino inicial (no usado en esta estrategia).
+        bow (float): Basic Operating Weight.
+        bow_moment_x (float): Momento X del BOW.
+        bow_moment_y (float): Momento Y del BOW.
+        fuel_kg (float): Combustible total (kg).
+        taxi_fuel (float): Combustible de taxi (kg).
+        moment_x_fuel_tow (float): Momento X del combustible en TOW.
+        moment_y_fuel_tow (float): Momento Y del combustible en TOW.
+        lemac (float): Leading Edge of Mean Aerodynamic Chord.
+        mac_length (float): Longitud del MAC.
+        diagnostics (Diagnostics, optional): Lista donde se registran los rechazos de posiciones.
+    
+    Returns:
+        tuple: (posiciones_usadas, rotaciones)
+    """
+    df_unassigned = df[df["Posición Asignada"] == ""].copy()
+    df_unassigned = df_unassigned.sort_values(by="Weight (KGS)", ascending=False)  # Priorizar pallets más pesados
+    target_mac = 28.0  # Objetivo para TOW CG y ZFW CG
+    scorer = CGScorer(df, restricciones_df, tipo_carga, exclusiones_df, bow, bow_moment_x, fuel_kg, taxi_fuel, moment_x_fuel_tow, lemac, mac_length, target_mac)
+    restriction_index = scorer.restriction_index
+    rotaciones = {}
+    
+    for idx, row in df_unassigned.iterrows():
+        uld = row["Number ULD"]
+        weight = row["Weight (KGS)"]
+        # Limpiar las posiciones sugeridas y ordenarlas por X-arm descendente
+        sugeridas = [pos.split(" (")[0] for pos in row["Posiciones Sugeridas"] if pos.split(" (")[0] not in posiciones_usadas]
+        
+        if len(sugeridas) == 1:
+            pos = sugeridas[0]
+            if update_position_values(df, idx, pos, restricciones_df, tipo_carga, posiciones_usadas, exclusiones_df, diagnostics):
+                scorer.commit(df, idx)
+                posiciones_usadas.add(pos)
+                rotaciones[uld] = False
+                df.at[idx, "Rotated"] = False
+                continue
+        
+        # Ordenar posiciones sugeridas por X-arm descendente (más aft primero)
+        sugeridas_with_xarm = [
+            (pos, restriction_index.lookup(pos).x_arm)
+            for pos in sugeridas
+            if pos in restriction_index
+        ]
+        sugeridas_with_xarm.sort(key=lambda x: x[1], reverse=True)  # Mayor X-arm primero
+        sugeridas = [pos for pos, _ in sugeridas_with_xarm]
+        
+        best_position = scorer.best_position(df, idx, sugeridas, posiciones_usadas)
+        
+        if best_position:
+            update_position_values(df, idx, best_position, restricciones_df, tipo_carga, posiciones_usadas, exclusiones_df, diagnostics)
+            scorer.commit(df, idx)
+            posiciones_usadas.add(best_position)
+            rotaciones[uld] = False
+            df.at[idx, "Rotated"] = False
+    
+    return posiciones_usadas, rotaciones
+
+def strategy_by_destination(df, restricciones_df, tipo_carga, exclusiones_df, posiciones_usadas, destino_inicial, bow, bow_moment_x, bow_moment_y, fuel_kg, taxi_fuel, moment_x_fuel_tow, moment_y_fuel_tow, lemac, mac_length, diagnostics=None):
+    """
+    Estrategia de asignación basada en el destino inicial, priorizando destino_inicial en posiciones MD con X-arm <= 35
+    y manteniendo TOW CG y ZFW CG alrededor de 28% MAC.
+    
+    Args:
+        df (pd.DataFrame): DataFrame con los datos del manifiesto.
+        restricciones_df (pd.DataFrame): DataFrame con las restricciones.
+        tipo_carga (str): Tipo de carga ("simetrico" o "asimetrico").
+        exclusiones_df (pd.DataFrame): DataFrame con las exclusiones.
+        posiciones_usadas (set): Conjunto de posiciones ya asignadas.
+        destino_inicial (str): Destino inicial para priorizar.
+        bow (float): Basic Operating Weight.
+        bow_moment_x (float): Momento X del BOW.
+        bow_moment_y (float): Momento Y del BOW.
+        fuel_kg (float): Combustible total (kg).
+        taxi_fuel (float): Combustible de taxi (kg).
+        moment_x_fuel_tow (float): Momento X del combustible en TOW.
+        moment_y_fuel_tow (float): Momento Y del combustible en TOW.
+        lemac (float): Leading Edge of Mean Aerodynamic Chord.
+        mac_length (float): Longitud del MAC.
+        diagnostics (Diagnostics, optional): Lista donde se registran los rechazos de posiciones.
+    
+    Returns:
+        tuple: (posiciones_usadas, rotaciones)
+    """
+    df_unassigned = df[df["Posición Asignada"] == ""].copy()
+    df_unassigned["Matches_Destination"] = df_unassigned["ULD Final Destination"].str.strip().str.upper() == destino_inicial.upper()
+    df_unassigned = df_unassigned.sort_values(by=["Matches_Destination"], ascending=False)  # Priorizar destino, no peso
+    
+    # Priorizar posiciones en MD con X-arm <= 35, luego LDA
+    md_positions = restricciones_df[
+        (restricciones_df["Bodega"] == "MD") & 
+        (restricciones_df["Average_X-Arm_(m)"] <= 35)
+    ]["Position"].sort_values().tolist()
+    lda_positions = restricciones_df[restricciones_df["Bodega"] == "LDA"]["Position"].sort_values(ascending=False).tolist()
+    preferred_positions_initial = md_positions + lda_positions
+    
+    target_mac = 28.0  # Objetivo para TOW CG y ZFW CG
+    scorer = CGScorer(df, restricciones_df, tipo_carga, exclusiones_df, bow, bow_moment_x, fuel_kg, taxi_fuel, moment_x_fuel_tow, lemac, mac_length, target_mac)
+    rotaciones = {}
+    
+    for idx, row in df_unassigned.iterrows():
+        uld = row["Number ULD"]
+        weight = row["Weight (KGS)"]
+        matches_dest = row["Matches_Destination"]
+        # Limpiar las posiciones sugeridas para eliminar el peso máximo
+        sugeridas = [pos.split(" (")[0] for pos in row["Posiciones Sugeridas"] if pos.split(" (")[0] not in posiciones_usadas]
+        
+        if len(sugeridas) == 1:
+            pos = sugeridas[0]
+            if update_position_values(df, idx, pos, restricciones_df, tipo_carga, posiciones_usadas, exclusiones_df, diagnostics):
+                scorer.commit(df, idx)
+                posiciones_usadas.add(pos)
+                rotaciones[uld] = False
+                df.at[idx, "Rotated"] = False
+                continue
+        
+        # Seleccionar posiciones preferidas según el destino
+        if matches_dest:
+            preferred_positions = [pos for pos in preferred_positions_initial if pos in sugeridas and pos not in posiciones_usadas]
+        else:
+            preferred_positions = [pos for pos in sugeridas if pos not in posiciones_usadas]
+        
+        if not preferred_positions:
+            preferred_positions = [pos for pos in sugeridas if pos not in posiciones_usadas]
+        
+        # Filtrar posiciones que mantengan TOW CG y ZFW CG cerca de 28% MAC
+        best_position = scorer.best_position(df, idx, preferred_positions, posiciones_usadas)
+        
+        if best_position:
+            update_position_values(df, idx, best_position, restricciones_df, tipo_carga, posiciones_usadas, exclusiones_df, diagnostics)
+            scorer.commit(df, idx)
+            posiciones_usadas.add(best_position)
+            rotaciones[uld] = False
+            df.at[idx, "Rotated"] = False
+    
+    return posiciones_usadas, rotaciones
+
+def strategy_hybrid(df, restricciones_df, tipo_carga, exclusiones_df, posiciones_usadas, destino_inicial, bow, bow_moment_x, bow_moment_y, fuel_kg, taxi_fuel, moment_x_fuel_tow, moment_y_fuel_tow, lemac, mac_length, diagnostics=None):
+    """
+    Estrategia híbrida que combina destino y CG, priorizando destino_inicial en MD/LDA y optimizando TOW CG y ZFW CG
+    alrededor de 28% MAC para el resto.
+    
+    Args:
+        df (pd.DataFrame): DataFrame con los datos del manifiesto.
+        restricciones_df (pd.DataFrame): DataFrame con las restricciones.
+        tipo_carga (str): Tipo de carga ("simetrico" o "asimetrico").
+        exclusiones_df (pd.DataFrame): DataFrame con las exclusiones.
+        posiciones_usadas (set): Conjunto de posiciones ya asignadas.
+        destino_inicial (str): Destino inicial para priorizar.
+        bow (float): Basic Operating Weight.
+        bow_moment_x (float): Momento X del BOW.
+        bow_moment_y (float): Momento Y del BOW.
+        fuel_kg (float): Combustible total (kg).
+        taxi_fuel (float): Combustible de taxi (kg).
+        moment_x_fuel_tow (float): Momento X del combustible en TOW.
+        moment_y_fuel_tow (float): Momento Y del combustible en TOW.
+        lemac (float): Leading Edge of Mean Aerodynamic Chord.
+        mac_length (float): Longitud del MAC.
+        diagnostics (Diagnostics, optional): Lista donde se registran los rechazos de posiciones.
+    
+    Returns:
+        tuple: (posiciones_usadas, rotaciones)
+    """
+    df_unassigned = df[df["Posición Asignada"] == ""].copy()
+    df_unassigned["Matches_Destination"] = df_unassigned["ULD Final Destination"].str.strip().str.upper() == destino_inicial.upper()
+    df_unassigned = df_unassigned.sort_values(by=["Matches_Destination"], ascending=False)  # Priorizar destino, no peso
+    
+    # Definir posiciones preferidas para destino_inicial
+    md_positions = restricciones_df[
+        (restricciones_df["Bodega"] == "MD") & 
+        (restricciones_df["Average_X-Arm_(m)"] <= 35)
+    ]["Position"].sort_values().tolist()
+    lda_positions = restricciones_df[restricciones_df["Bodega"] == "LDA"]["Position"].sort_values(ascending=False).tolist()
+    preferred_positions_initial = md_positions + lda_positions
+    
+    target_mac = 28.0  # Objetivo para TOW CG y ZFW CG
+    scorer = CGScorer(df, restricciones_df, tipo_carga, exclusiones_df, bow, bow_moment_x, fuel_kg, taxi_fuel, moment_x_fuel_tow, lemac, mac_length, target_mac)
+    rotaciones = {}
+    
+    for idx, row in df_unassigned.iterrows():
+        uld = row["Number ULD"]
+        weight = row["Weight (KGS)"]
+        matches_dest = row["Matches_Destination"]
+        # Limpiar las posiciones sugeridas para eliminar el peso máximo
+        sugeridas = [pos.split(" (")[0] for pos in row["Posiciones Sugeridas"] if pos.split(" (")[0] not in posiciones_usadas]
+        
+        if len(sugeridas) == 1:
+            pos = sugeridas[0]
+            if update_position_values(df, idx, pos, restricciones_df, tipo_carga, posiciones_usadas, exclusiones_df, diagnostics):
+                scorer.commit(df, idx)
+                posiciones_usadas.add(pos)
+                rotaciones[uld] = False
+                df.at[idx, "Rotated"] = False
+                continue
+        
+        # Seleccionar posiciones según el destino o CG
+        if matches_dest:
+            preferred_positions = [pos for pos in preferred_positions_initial if pos in sugeridas and pos not in posiciones_usadas]
+        else:
+            preferred_positions = [pos for pos in sugeridas if pos not in posiciones_usadas]
+        
+        if not preferred_positions:
+            preferred_positions = [pos for pos in sugeridas if pos not in posiciones_usadas]
+        
+        best_position = scorer.best_position(df, idx, preferred_positions, posiciones_usadas)
+        
+        if best_position:
+            update_position_values(df, idx, best_position, restricciones_df, tipo_carga, posiciones_usadas, exclusiones_df, diagnostics)
+            scorer.commit(df, idx)
+            posiciones_usadas.add(best_position)
+            rotaciones[uld] = False
+            df.at[idx, "Rotated"] = False
+    
+    return posiciones_usadas, rotaciones
+
+def strategy_optimal(df, restricciones_df, tipo_carga, exclusiones_df, posiciones_usadas, bow, bow_moment_x, fuel_kg, taxi_fuel, moment_x_fuel_tow, lemac, mac_length, cumulative_restrictions_fwd_df, cumulative_restrictions_aft_df, ldf_limit=None, lda_limit=None, time_budget=10.0, diagnostics=None, envelope_margin=None):
+    """
+    Estrategia exacta: busca por branch-and-bound el plan que asigna más pallets y, a igual cantidad,
+    deja TOW CG y ZFW CG más cerca de 28% MAC (o, con `envelope_margin`, maximiza el margen mínimo a
+    la envolvente en ZFW, TOW y LW), respetando pesos máximos, exclusiones, restricciones
+    acumulativas FWD/AFT y límites de LDF/LDA. Si se agota time_budget, aplica el mejor plan encontrado.
+    
+    Args:
+        df (pd.DataFrame): DataFrame con los datos del manifiesto.
+        restricciones_df (pd.DataFrame): DataFrame con las restricciones.
+        tipo_carga (str): Tipo de carga ("simetrico" o "asimetrico").
+        exclusiones_df (pd.DataFrame): DataFrame con las exclusiones.
+        posiciones_usadas (set): Conjunto de posiciones ya asignadas.
+        bow (float): Basic Operating Weight.
+        bow_moment_x (float): Momento X del BOW.
+        fuel_kg (float): Combustible total (kg).
+        taxi_fuel (float): Combustible de taxi (kg).
+        moment_x_fuel_tow (float): Momento X del combustible en TOW.
+        lemac (float): Leading Edge of Mean Aerodynamic Chord.
+        mac_length (float): Longitud del MAC.
+        cumulative_restrictions_fwd_df (pd.DataFrame): Restricciones acumulativas FWD.
+        cumulative_restrictions_aft_df (pd.DataFrame): Restricciones acumulativas AFT.
+        ldf_limit (float, optional): Límite de peso en LDF (kg).
+        lda_limit (float, optional): Límite de peso en LDA (kg).
+        time_budget (float): Tiempo máximo de búsqueda en segundos.
+        diagnostics (Diagnostics, optional): Lista donde se registran los rechazos de posiciones.
+        envelope_margin (EnvelopeMarginEvaluator, optional): Objetivo de margen de envolvente.
+    
+    Returns:
+        tuple: (posiciones_usadas, rotaciones, plan) con plan de tipo PlanResult.
+    """
+    target_mac = 28.0  # Objetivo para TOW CG y ZFW CG
+    planner = OptimalPlanner(
+        restricciones_df, tipo_carga, exclusiones_df, cumulative_restrictions_fwd_df, cumulative_restrictions_aft_df,
+        bow, bow_moment_x, fuel_kg, taxi_fuel, moment_x_fuel_tow, lemac, mac_length,
+        ldf_limit=ldf_limit, lda_limit=lda_limit, target_mac=target_mac, time_budget=time_budget, objective=envelope_margin
+    )
+    plan = planner.solve(df, posiciones_usadas)
+    diagnostics = Diagnostics() if diagnostics is None else diagnostics
+    criterio = f"desviación {plan.deviation:.3f}% MAC" if envelope_margin is None else f"margen de envolvente {-plan.deviation:.2f}% MAC"
+    estado = "Plan óptimo" if plan.optimal else "Mejor plan encontrado al agotarse el tiempo (no se demostró que sea óptimo)"
+    diagnostics.info(
+        f"{estado}: {plan.assigned_count} pallets, {criterio}, {plan.nodes} nodos en {plan.elapsed:.2f} s.",
+        "plan_optimo", optimal=plan.optimal, nodes=plan.nodes, elapsed=plan.elapsed
+    )
+    
+    rotaciones = {}
+    for idx, pos in plan.assignments:
+        if update_position_values(df, idx, pos, restricciones_df, tipo_carga, posiciones_usadas, exclusiones_df, diagnostics):
+            posiciones_usadas.add(pos)
+            rotaciones[df.at[idx, "Number ULD"]] = False
+            df.at[idx, "Rotated"] = False
+    
+    return posiciones_usadas, rotaciones, plan
+
+def try_all_strategies(df, restricciones_df, tipo_carga, exclusiones_df, posiciones_usadas, destino_inicial, optimizacion, bow, bow_moment_x, bow_moment_y, fuel_kg, taxi_fuel, moment_x_fuel_tow, moment_y_fuel_tow, lemac, mac_length, cumulative_restrictions_fwd_df, cumulative_restrictions_aft_df, ldf_limit=None, lda_limit=None, time_budget=10.0, diagnostics=None, envelope_margin=None):
+    """
+    Ejecuta la estrategia seleccionada para asignar pallets, reintentando si no se cumplen restricciones acumulativas.
+    
+    Args:
+        df (pd.DataFrame): DataFrame con los datos del manifiesto.
+        restricciones_df (pd.DataFrame): DataFrame con las restricciones.
+        tipo_carga (str): Tipo de carga ("simetrico" o "asimetrico").
+        exclusiones_df (pd.DataFrame): DataFrame con las exclusiones.
+        posiciones_usadas (set): Conjunto de posiciones ya asignadas.
+        destino_inicial (str): Destino inicial para priorizar.
+        optimizacion (str): Estrategia de optimización ("destino", "cg", "ambos", "aft_cg", "optimo", "margen").
+        bow (float): Basic Operating Weight.
+        bow_moment_x (float): Momento X del BOW.
+        bow_moment_y (float): Momento Y del BOW.
+        fuel_kg (float): Combustible total (kg).
+        taxi_fuel (float): Combustible de taxi (kg).
+        moment_x_fuel_tow (float): Momento X del combustible en TOW.
+        moment_y_fuel_tow (float): Momento Y del combustible en TOW.
+        lemac (float): Leading Edge of Mean Aerodynamic Chord.
+        mac_length (float): Longitud del MAC.
+        cumulative_restrictions_fwd_df (pd.DataFrame): Restricciones acumulativas FWD.
+        cumulative_restrictions_aft_df (pd.DataFrame): Restricciones acumulativas AFT.
+        ldf_limit (float, optional): Límite de peso en LDF (kg), usado por las estrategias "optimo" y "margen".
+        lda_limit (float, optional): Límite de peso en LDA (kg), usado por las estrategias "optimo" y "margen".
+        time_budget (float): Tiempo máximo de búsqueda de las estrategias "optimo" y "margen" en segundos.
+        diagnostics (Diagnostics, optional): Lista donde se registran los rechazos de posiciones y las
+            advertencias de pesos acumulativos.
+        envelope_margin (EnvelopeMarginEvaluator, optional): Objetivo de la estrategia "margen"; sin él
+            la estrategia se ejecuta como "optimo".
+    
+    Returns:
+        tuple: (posiciones_usadas, rotaciones, unassigned_pallets)
+    """
+    diagnostics = Diagnostics() if diagnostics is None else diagnostics
+    if optimizacion == "margen" and envelope_margin is None:
+        diagnostics.warning(
+            "No hay envolvente de CG para esta aeronave; la estrategia Margen de envolvente se ejecuta como Óptimo.",
+            "margen_sin_envolvente"
+        )
+    if optimizacion in ("optimo", "margen"):
+        # El plan exacto ya cumple las restricciones acumulativas: no requiere reintentos
+        posiciones_usadas, rotaciones, _ = strategy_optimal(
+            df, restricciones_df, tipo_carga, exclusiones_df, posiciones_usadas, bow, bow_moment_x,
+            fuel_kg, taxi_fuel, moment_x_fuel_tow, lemac, mac_length,
+            cumulative_restrictions_fwd_df, cumulative_restrictions_aft_df, ldf_limit, lda_limit, time_budget, diagnostics,
+            envelope_margin=envelope_margin if optimizacion == "margen" else None
+        )
+        unassigned_pallets = [(row["Number ULD"], row["Weight (KGS)"]) for _, row in df[df["Posición Asignada"] == ""].iterrows()]
+        return posiciones_usadas, rotaciones, unassigned_pallets
+    
+    strategies = {
+        "cg": strategy_by_cg,
+        "destino": strategy_by_destination,
+        "ambos": strategy_hybrid,
+        "aft_cg": strategy_by_aft_cg
+    }
+    max_attempts = 2  # Reducido para evitar ciclos innecesarios
+    attempt = 1
+    rotaciones = {}
+    
+    strategy = strategies[optimizacion]
+    while df["Posición Asignada"].eq("").any() and attempt <= max_attempts:
+        temp_posiciones_usadas, temp_rotaciones = strategy(
+            df, restricciones_df, tipo_carga, exclusiones_df, posiciones_usadas.copy(),
+            destino_inicial, bow, bow_moment_x, bow_moment_y, fuel_kg, taxi_fuel,
+            moment_x_fuel_tow, moment_y_fuel_tow, lemac, mac_length, diagnostics
+        )
+        posiciones_usadas.update(temp_posiciones_usadas)
+        rotaciones.update(temp_rotaciones)
+        
+        # Verificar restricciones acumulativas
+        df_asignados = df[df["Posición Asignada"] != ""].copy()
+        complies, _ = check_cumulative_weights(df_asignados, cumulative_restrictions_fwd_df, cumulative_restrictions_aft_df, diagnostics)
+        if not complies:
+            # Desasignar pallets asignados en este intento
+            df.loc[df.index.isin(df_asignados.index), "Posición Asignada"] = ""
+            posiciones_usadas = set(df[df["Posición Asignada"] != ""]["Posición Asignada"].tolist())
+            rotaciones = {k: v for k, v in rotaciones.items() if k in df[df["Posición Asignada"] != ""]["Number ULD"].values}
+            attempt += 1
+        else:
+            break
+    
+    # También cuando ningún intento cumplió y sus pallets se desasignaron
+    unassigned_pallets = [(row["Number ULD"], row["Weight (KGS)"]) for _, row in df[df["Posición Asignada"] == ""].iterrows()]
+    return posiciones_usadas, rotaciones, unassigned_pallets
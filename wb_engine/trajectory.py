@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+
+from wb_engine.diagnostics import Diagnostics
+
+# Secuencia simplificada de uso de combustible del A330: (tanques que se consumen juntos,
+# combustible que queda en cada uno al terminar la etapa). El central se transfiere primero a
+# los internos; los internos se consumen hasta 3500 kg, momento en que se transfiere el trim
+# hacia adelante y luego los externos; por último se consume el resto de los internos.
+BURN_SEQUENCE = [
+    (("Center Tank",), 0.0),
+    (("Inner Tank LH", "Inner Tank RH"), 3500.0),
+    (("Trim Tank",), 0.0),
+    (("Outer Tank LH", "Outer Tank RH"), 0.0),
+    (("Inner Tank LH", "Inner Tank RH"), 0.0)
+]
+
+TRAJECTORY_STEP_KG = 100.0
+
+
+def burn_tank_fuel(tank_fuel, burned, reserved=None, sequence=BURN_SEQUENCE):
+    """
+    Combustible por tanque después de quemar `burned` kg siguiendo la secuencia de uso.
+
+    Dentro de cada etapa el consumo se reparte en proporción al combustible disponible de cada
+    tanque, de modo que los tanques simétricos bajan por igual.
+
+    Args:
+        tank_fuel (dict): Combustible inicial (kg) por tanque.
+        burned (float | np.ndarray): Combustible quemado (kg).
+        reserved (dict, optional): Combustible no utilizable por tanque (p. ej. el atrapado en el trim).
+        sequence (list): Etapas (tanques, remanente por tanque) en orden de uso.
+
+    Returns:
+        dict: Combustible por tanque (arreglos del mismo largo que `burned`).
+    """
+    reserved = reserved or {}
+    burned = np.asarray(burned, dtype=float)
+    remaining = {tank: float(fuel) for tank, fuel in tank_fuel.items()}
+    result = {tank: np.full(burned.shape, fuel) for tank, fuel in remaining.items()}
+
+    stage_start = 0.0
+    for tanks, floor in sequence:
+        available = {
+            tank: max(remaining.get(tank, 0.0) - max(floor, reserved.get(tank, 0.0)), 0.0)
+            for tank in tanks
+        }
+        stage_total = sum(available.values())
+        if stage_total <= 0:
+            continue
+        stage_burn = np.clip(burned - stage_start, 0.0, stage_total)
+        for tank, tank_available in available.items():
+            result[tank] = result[tank] - stage_burn * (tank_available / stage_total)
+            remaining[tank] -= tank_available
+        stage_start += stage_total
+    return result
+
+
+def simulate_fuel_burn(fuel_model, tank_fuel, zfw_weight, zfw_moment_x, fuel_for_tow, trip_fuel,
+                       lemac, mac_length, ballast_fuel=0.0, step=TRAJECTORY_STEP_KG):
+    """
+    Trayectoria de peso y %MAC desde el despegue hasta el aterrizaje quemando el combustible
+    de viaje por tanque según BURN_SEQUENCE.
+
+    Si la distribución por tanque incluye más combustible que el de despegue (cargue manual,
+    que incluye el taxi), el excedente se quema antes del primer punto. El combustible atrapado
+    (`ballast_fuel`) se deja en el trim. El peso sigue al de la interfaz (ZFW + combustible
+    remanente); los momentos salen de las tablas de cada tanque, por lo que los extremos pueden
+    diferir levemente de los %MAC de TOW y LW, que usan la tabla de cargue y los tanques internos.
+
+    Args:
+        fuel_model (FuelModel): Curvas de combustible de la aeronave.
+        tank_fuel (dict): Combustible (kg) por tanque al cargar.
+        zfw_weight (float): Peso ZFW (kg).
+        zfw_moment_x (float): Momento X del ZFW.
+        fuel_for_tow (float): Combustible al despegue (kg).
+        trip_fuel (float): Combustible de viaje (kg).
+        lemac (float): LEMAC de la aeronave.
+        mac_length (float): Longitud de la MAC (en las unidades de `calculate_final_values`).
+        ballast_fuel (float): Combustible atrapado en el trim (kg).
+        step (float): Paso de combustible quemado entre puntos (kg).
+
+    Returns:
+        pd.DataFrame: Un punto por paso con el combustible quemado y remanente, el combustible
+        por tanque, el peso, el momento X y el %MAC.
+    """
+    reserved = {"Trim Tank": min(ballast_fuel, tank_fuel.get("Trim Tank", 0.0))}
+    loaded_fuel = sum(tank_fuel.values()) - reserved["Trim Tank"]
+    taxi_burn = max(loaded_fuel - fuel_for_tow, 0.0)
+
+    burned = np.append(np.arange(0.0, trip_fuel, step), trip_fuel) if trip_fuel > 0 else np.zeros(1)
+    fuel_by_tank = burn_tank_fuel(tank_fuel, burned + taxi_burn, reserved)
+    moment_x, _ = fuel_model.tanks_moments(fuel_by_tank)
+
+    weight = zfw_weight + fuel_for_tow - burned
+    cg_x = (zfw_moment_x + moment_x) / weight
+    trajectory = pd.DataFrame({
+        "Combustible quemado (kg)": burned,
+        "Combustible (kg)": fuel_for_tow - burned,
+        **{f"{tank} (kg)": fuel for tank, fuel in fuel_by_tank.items()},
+        "Peso (kg)": weight,
+        "Momento X": zfw_moment_x + moment_x,
+        "%MAC": (cg_x - lemac) / mac_length
+    })
+    return trajectory
+
+
+def trajectory_diagnostics(trajectory, outside, diagnostics=None):
+    """
+    Registra una advertencia si algún punto de la trayectoria sale de la envolvente de crucero.
+
+    Args:
+        trajectory (pd.DataFrame): Resultado de `simulate_fuel_burn`.
+        outside (array-like): True para cada punto fuera de la envolvente (ver `flag_trajectory`).
+        diagnostics (Diagnostics, optional): Lista donde se registra la advertencia.
+
+    Returns:
+        Diagnostics
+    """
+    diagnostics = Diagnostics() if diagnostics is None else diagnostics
+    outside = np.asarray(outside, dtype=bool)
+    if outside.any():
+        first = trajectory[outside].iloc[0]
+        diagnostics.warning(
+            f"La trayectoria de CG en vuelo sale de la envolvente de crucero en {int(outside.sum())} punto(s); "
+            f"el primero tras quemar {first['Combustible quemado (kg)']:,.0f} kg "
+            f"({first['Peso (kg)']:,.0f} kg, {first['%MAC']:.1f}% MAC).",
+            "trayectoria_fuera_crucero", points=int(outside.sum()), burned=float(first["Combustible quemado (kg)"])
+        )
+    return diagnostics
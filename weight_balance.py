@@ -10,10 +10,8 @@ import copy
 import plotly.io as pio
 import matplotlib
 import matplotlib.pyplot as plt
-import base64
 import time
 import requests
-import pythoncom
 from openpyxl import load_workbook
 from openpyxl.drawing.image import Image as OpenpyxlImage
 import matplotlib.pyplot as plt
@@ -26,11 +24,26 @@ from PIL import Image as PILImage
 from utils import calculate_peso_maximo_efectivo
 matplotlib.use('Agg')
 
-from utils import load_csv_with_fallback, clasificar_base_refinada
-from calculations import sugerencias_final_con_fak, check_cumulative_weights, calculate_final_values
+from utils import load_csv_with_fallback, clasificar_base_refinada, render_diagnostics
+from calculations import sugerencias_batch, check_cumulative_weights, calculate_final_values
+from wb_engine.diagnostics import Diagnostics
+from wb_engine.final_values import limit_diagnostics
+from wb_engine.fuel import fuel_moments_from_table, fuel_moments_from_tanks, landing_fuel_moments
+from wb_engine.positions import hold_weights, pallets_lateral_imbalance
+from wb_engine.profile import get_aircraft_profile
+from wb_engine.trajectory import simulate_fuel_burn, trajectory_diagnostics
+from wb_engine.envelope import EnvelopeMarginEvaluator, envelope_diagnostics, flag_trajectory
+from envelope_plot import plot_cg_envelope
+from figure_cache import get_figure_cache, plan_hash
+from exclusion_matrix import get_exclusion_matrix
 from manual_calculation import manual_assignment
 from automatic_calculation import automatic_assignment
-from visualizations import print_final_summary, plot_main_deck, plot_lower_decks
+from visualizations import print_final_summary, render_main_deck, render_lower_decks
+from deck_svg import render_main_deck_svg, render_lower_decks_svg
+from lir_publisher import get_lir_publisher, lir_flight_id, lir_flight_url
+from export_jobs import JOB_DONE, JOB_FAILED, export_job_id, get_export_queue
+from document_export import export_documents
+from history_index import get_history_index
 from data_models import FlightData, AircraftData, CalculationState, FinalResults
 
 class NumpyEncoder(json.JSONEncoder):
@@ -64,11 +77,26 @@ class NumpyEncoder(json.JSONEncoder):
 
 def weight_balance_calculation():
     try:
-        from utils import load_csv_with_fallback, clasificar_base_refinada
-        from calculations import sugerencias_final_con_fak, check_cumulative_weights, calculate_final_values
+        from utils import load_csv_with_fallback, clasificar_base_refinada, render_diagnostics
+        from calculations import sugerencias_batch, check_cumulative_weights, calculate_final_values
+        from wb_engine.diagnostics import Diagnostics
+        from wb_engine.final_values import limit_diagnostics
+        from wb_engine.fuel import fuel_moments_from_table, fuel_moments_from_tanks, landing_fuel_moments
+        from wb_engine.positions import hold_weights, pallets_lateral_imbalance
+        from wb_engine.profile import get_aircraft_profile
+        from wb_engine.trajectory import simulate_fuel_burn, trajectory_diagnostics
+        from wb_engine.envelope import EnvelopeMarginEvaluator, envelope_diagnostics, flag_trajectory
+        from envelope_plot import plot_cg_envelope
+        from figure_cache import get_figure_cache, plan_hash
+        from exclusion_matrix import get_exclusion_matrix
         from manual_calculation import manual_assignment
         from automatic_calculation import automatic_assignment
-        from visualizations import print_final_summary, plot_main_deck, plot_lower_decks
+        from visualizations import print_final_summary, render_main_deck, render_lower_decks
+        from deck_svg import render_main_deck_svg, render_lower_decks_svg
+        from lir_publisher import get_lir_publisher, lir_flight_id, lir_flight_url
+        from export_jobs import JOB_DONE, JOB_FAILED, export_job_id, get_export_queue
+        from document_export import export_documents
+        from history_index import get_history_index
         from data_models import FlightData, AircraftData, CalculationState, FinalResults
     except ImportError as e:
         st.error(f"Error al importar módulos: {str(e)}. Verifique que todos los archivos necesarios estén en el directorio correcto.")
@@ -337,26 +365,31 @@ def weight_balance_calculation():
         st.error(f"La carpeta {aircraft_folder} no existe.")
         return
 
-    basic_data_path = os.path.join(aircraft_folder, "basic_data.csv")
-    if not os.path.exists(basic_data_path):
-        st.error(f"No se encontró el archivo en: {basic_data_path}. Asegúrate de que el archivo exista en la ruta especificada.")
+    # Archivos de la aeronave leídos y validados una sola vez por proceso (se recargan si cambian en disco)
+    profile = get_aircraft_profile(aircraft_folder, tail)
+    if not profile.valid:
+        render_diagnostics(profile.diagnostics.errors)
         return
-    basic_data = pd.read_csv(basic_data_path, sep=";", decimal=",")
+    tables = profile.tables
+    basic_data = tables.basic_data
+    restricciones_df = tables.restricciones_df
+    exclusiones_df = tables.exclusiones_df
+    cumulative_restrictions_aft_df = tables.cumulative_restrictions_aft_df
+    cumulative_restrictions_fwd_df = tables.cumulative_restrictions_fwd_df
+    fuel_table = tables.fuel_table
+    outer_tanks_df = tables.outer_tanks_df
+    inner_tanks_df = tables.inner_tanks_df
+    center_tank_df = tables.center_tank_df
+    trim_tank_df = tables.trim_tank_df
+    passengers_df = tables.passengers_df
+    flite_deck_df = tables.flite_deck_df
+    trimset_df = tables.trimset_df
+    max_passengers_supernumerary = profile.max_passengers_supernumerary
+    max_passengers_cockpit = profile.max_passengers_cockpit
 
     st.markdown('<div id="restrictions_section"></div>', unsafe_allow_html=True)
     st.subheader("Restricciones Temporales Activas")
-    restrictions_path = os.path.join(aircraft_folder, "MD_LD_BULK_restrictions.csv")
-    if not os.path.exists(restrictions_path):
-        st.error(f"No se encontró el archivo en: {restrictions_path}. Asegúrate de que el archivo exista en la ruta especificada.")
-        return
-    restricciones_df = pd.read_csv(restrictions_path, sep=";", decimal=",")
-    restricciones_df.columns = [col.strip().replace(" ", "_") for col in restricciones_df.columns]
-    restricciones_df["Temp_Restriction_Symmetric"] = pd.to_numeric(restricciones_df["Temp_Restriction_Symmetric"], errors="coerce").fillna(0)
-    restricciones_df["Temp_Restriction_Asymmetric"] = pd.to_numeric(restricciones_df["Temp_Restriction_Asymmetric"], errors="coerce").fillna(0)
-
-    active_restrictions = restricciones_df[
-        (restricciones_df["Temp_Restriction_Symmetric"] != 0) | (restricciones_df["Temp_Restriction_Asymmetric"] != 0)
-    ][["Position", "Bodega", "Temp_Restriction_Symmetric", "Temp_Restriction_Asymmetric"]]
+    active_restrictions = profile.active_restrictions
     
     if active_restrictions.empty:
         st.info(f"No hay restricciones temporales activas para la aeronave {tail}.")
@@ -373,82 +406,11 @@ def weight_balance_calculation():
             use_container_width=True
         )
 
-    exclusions_path = os.path.join(aircraft_folder, "exclusiones.csv")
-    if not os.path.exists(exclusions_path):
-        st.error(f"No se encontró el archivo en: {exclusions_path}. Asegúrate de que el archivo exista en la ruta especificada.")
-        return
-    exclusiones_df = pd.read_csv(exclusions_path, sep=";", decimal=",")
-    exclusiones_df.set_index(exclusiones_df.columns[0], inplace=True)
-
-    cumulative_restrictions_aft_path = os.path.join(aircraft_folder, "cummulative_restrictions_AFT.csv")
-    if not os.path.exists(cumulative_restrictions_aft_path):
-        st.error(f"No se encontró el archivo en: {cumulative_restrictions_aft_path}. Asegúrate de que el archivo exista en la ruta especificada.")
-        return
-    cumulative_restrictions_aft_df = pd.read_csv(cumulative_restrictions_aft_path, sep=";", decimal=",")
-
-    cumulative_restrictions_fwd_path = os.path.join(aircraft_folder, "cummulative_restrictions_FWD.csv")
-    if not os.path.exists(cumulative_restrictions_fwd_path):
-        st.error(f"No se encontró el archivo en: {cumulative_restrictions_fwd_path}. Asegúrate de que el archivo exista en la ruta especificada.")
-        return
-    cumulative_restrictions_fwd_df = pd.read_csv(cumulative_restrictions_fwd_path, sep=";", decimal=",")
-
-    fuel_table_path = os.path.join(aircraft_folder, "Usable_fuel_table.csv")
-    if not os.path.exists(fuel_table_path):
-        st.error(f"No se encontró el archivo en: {fuel_table_path}. Asegúrate de que el archivo exista en la ruta especificada.")
-        return
-    fuel_table = pd.read_csv(fuel_table_path, sep=";", decimal=",", encoding="latin-1")
-    required_fuel_columns = ["Fuel_kg", "Outer Tank LH", "Outer Tank RH", "Inner Tank LH", "Inner Tank RH", "Central Tank", "Trim Tank", "MOMENT-X", "MOMENT-Y"]
-    if not all(col in fuel_table.columns for col in required_fuel_columns):
-        st.error(f"El archivo Usable_fuel_table.csv no contiene las columnas esperadas: {required_fuel_columns}.")
-        return
-
-    outer_tanks_path = os.path.normpath(os.path.join(aircraft_folder, "outer_tanks.csv"))
-    inner_tanks_path = os.path.normpath(os.path.join(aircraft_folder, "inner_tanks.csv"))
-    center_tank_path = os.path.normpath(os.path.join(aircraft_folder, "center_tank.csv"))
-    trim_tank_path = os.path.normpath(os.path.join(aircraft_folder, "trim_tank.csv"))
-
-    missing_files = []
-    if not os.path.exists(outer_tanks_path):
-        missing_files.append("outer_tanks.csv")
-    if not os.path.exists(inner_tanks_path):
-        missing_files.append("inner_tanks.csv")
-    if not os.path.exists(center_tank_path):
-        missing_files.append("center_tank.csv")
-    if not os.path.exists(trim_tank_path):
-        missing_files.append("trim_tank.csv")
-
-    if missing_files:
-        st.error(f"Faltan los siguientes archivos en la carpeta de la aeronave: {', '.join(missing_files)}")
-        return
-
-    outer_tanks_df = pd.read_csv(outer_tanks_path, sep=";", decimal=",")
-    inner_tanks_df = pd.read_csv(inner_tanks_path, sep=";", decimal=",")
-    center_tank_df = pd.read_csv(center_tank_path, sep=";", decimal=",")
-    trim_tank_df = pd.read_csv(trim_tank_path, sep=";", decimal=",")
-
-    passengers_path = os.path.join(aircraft_folder, "Passengers.csv")
-    if not os.path.exists(passengers_path):
-        st.error(f"No se encontró el archivo en: {passengers_path}. Asegúrate de que el archivo exista en la ruta especificada.")
-        return
-    passengers_df = pd.read_csv(passengers_path, sep=";", decimal=",")
-    max_passengers_supernumerary = int(passengers_df["Quantity-Passenger"].max())
-    if 0 not in passengers_df["Quantity-Passenger"].values:
-        passengers_df = pd.concat([pd.DataFrame({"Quantity-Passenger": [0], "Weight": [0], "Moment": [0]}), passengers_df], ignore_index=True)
-
-    flite_deck_path = os.path.join(aircraft_folder, "Flite_deck_passengers.csv")
-    if not os.path.exists(flite_deck_path):
-        st.error(f"No se encontró el archivo en: {flite_deck_path}. Asegúrate de que el archivo exista en la ruta especificada.")
-        return
-    flite_deck_df = pd.read_csv(flite_deck_path, sep=";", decimal=",")
-    max_passengers_cockpit = int(flite_deck_df["Quantity-Passenger Flite-Deck"].max())
-    if 0 not in flite_deck_df["Quantity-Passenger Flite-Deck"].values:
-        flite_deck_df = pd.concat([pd.DataFrame({"Quantity-Passenger Flite-Deck": [0], "Weight": [0], "Moment": [0]}), flite_deck_df], ignore_index=True)
-
-    trimset_path = os.path.join(aircraft_folder, "trimset.csv")
-    if not os.path.exists(trimset_path):
-        st.error(f"No se encontró el archivo en: {trimset_path}. Asegúrate de que el archivo exista en la ruta especificada.")
-        return
-    trimset_df = pd.read_csv(trimset_path, sep=";", decimal=",")
+    exclusion_report = get_exclusion_matrix(exclusiones_df).report
+    if exclusion_report:
+        with st.expander(f"Advertencias en exclusiones.csv ({len(exclusion_report)})", expanded=False):
+            for advertencia in exclusion_report:
+                st.warning(advertencia)
 
     st.markdown('<div id="flight_info_section"></div>', unsafe_allow_html=True)
     st.subheader("Información del Vuelo")
@@ -594,22 +556,7 @@ def weight_balance_calculation():
         st.error("El Trip Fuel no puede ser mayor que el combustible disponible después del Taxi Fuel.")
         return
 
-    aircraft_data = AircraftData(
-        tail=tail,
-        mtoc=basic_data["MTOW (kg)"].values[0],
-        mlw=basic_data["MLW"].values[0],
-        mzfw=basic_data["MZFW"].values[0],
-        oew=basic_data["OEW"].values[0],
-        arm=basic_data["ARM"].values[0],
-        moment_aircraft=basic_data["Moment_Aircraft"].values[0],
-        cg_aircraft=basic_data["CG_Aircraft"].values[0],
-        lemac=basic_data["LEMAC"].values[0],
-        mac_length=basic_data["MAC_length"].values[0],
-        mrw_limit=basic_data["MRW"].values[0],
-        lateral_imbalance_limit=basic_data["Lateral_Imbalance_Limit"].values[0],
-        ldf_limit=basic_data["LDF_LIMIT"].values[0],
-        lda_limit=basic_data["LDA_LIMIT"].values[0]
-    )
+    aircraft_data = profile.aircraft_data
 
     if aircraft_data.mac_length == 0:
         st.error("MAC_length no puede ser cero.")
@@ -644,68 +591,13 @@ def weight_balance_calculation():
             st.error(f"Faltan columnas en Usable_fuel_table.csv: {', '.join(missing_columns)}")
             return
         
-        fuel_row_tow = fuel_table.iloc[(fuel_table["Fuel_kg"] - fuel_for_tow).abs().argsort()[0]]
-        moment_x_fuel_tow = fuel_row_tow["MOMENT-X"]
-        moment_y_fuel_tow = fuel_row_tow["MOMENT-Y"]
-        tank_fuel = {
-            "Outer Tank LH": fuel_row_tow["Outer Tank LH"],
-            "Outer Tank RH": fuel_row_tow["Outer Tank RH"],
-            "Inner Tank LH": fuel_row_tow["Inner Tank LH"],
-            "Inner Tank RH": fuel_row_tow["Inner Tank RH"],
-            "Center Tank": fuel_row_tow["Central Tank"],
-            "Trim Tank": fuel_row_tow["Trim Tank"]
-        }
+        moment_x_fuel_tow, moment_y_fuel_tow, tank_fuel = fuel_moments_from_table(tables.fuel_model, fuel_for_tow)
     else:
-        moment_x_fuel_tow = 0.0
-        moment_y_fuel_tow = 0.0
-        tanks = {
-            "Outer Tank LH": {"df": outer_tanks_df, "max_kg": 2850},
-            "Outer Tank RH": {"df": outer_tanks_df, "max_kg": 2850},
-            "Inner Tank LH": {"df": inner_tanks_df, "max_kg": 32950},
-            "Inner Tank RH": {"df": inner_tanks_df, "max_kg": 32950},
-            "Center Tank": {"df": center_tank_df, "max_kg": 32725},
-            "Trim Tank": {"df": trim_tank_df, "max_kg": 4875}
-        }
-        for tank, fuel in tank_fuel.items():
-            if fuel > 0:
-                tank_df = tanks[tank]["df"]
-                closest_row = tank_df.iloc[(tank_df["Kg_Fuel"] - fuel).abs().argsort()[0]]
-                closest_fuel = closest_row["Kg_Fuel"]
-                ratio = fuel / closest_fuel if closest_fuel != 0 else 0
-                if tank == "Outer Tank LH":
-                    moment_x_fuel_tow += closest_row["Moment_X_OLH"] * ratio
-                    moment_y_fuel_tow += closest_row["Moment_Y_OLH"] * ratio
-                elif tank == "Outer Tank RH":
-                    moment_x_fuel_tow += closest_row["Moment_X_ORH"] * ratio
-                    moment_y_fuel_tow += closest_row["Moment_Y_ORH"] * ratio
-                elif tank == "Inner Tank LH":
-                    moment_x_fuel_tow += closest_row["Moment_X_ILH"] * ratio
-                    moment_y_fuel_tow += closest_row["Moment_Y_ILH"] * ratio
-                elif tank == "Inner Tank RH":
-                    moment_x_fuel_tow += closest_row["Moment_X_IRH"] * ratio
-                    moment_y_fuel_tow += closest_row["Moment_Y_IRH"] * ratio
-                elif tank == "Center Tank":
-                    moment_x_fuel_tow += closest_row["CT_MOMENT_X"] * ratio
-                elif tank == "Trim Tank":
-                    moment_x_fuel_tow += closest_row["T_MOMENT_X"] * ratio
-
-    if fuel_for_lw > 0:
-        fuel_per_inner_tank = fuel_for_lw / 2
-        max_inner_tank_capacity = 32950
-
-        if fuel_per_inner_tank > max_inner_tank_capacity:
-            st.warning(f"El combustible por tanque interno ({fuel_per_inner_tank:.1f} kg) excede la capacidad máxima ({max_inner_tank_capacity:.1f} kg). Se usará el valor máximo.")
-            fuel_per_inner_tank = max_inner_tank_capacity
-
-        inner_tank_row = inner_tanks_df.iloc[(inner_tanks_df["Kg_Fuel"] - fuel_per_inner_tank).abs().argsort()[0]]
-        closest_fuel = inner_tank_row["Kg_Fuel"]
-        ratio = fuel_per_inner_tank / closest_fuel if closest_fuel != 0 else 0
-
-        moment_x_fuel_lw = (inner_tank_row["Moment_X_ILH"] + inner_tank_row["Moment_X_IRH"]) * ratio
-        moment_y_fuel_lw = (inner_tank_row["Moment_Y_ILH"] + inner_tank_row["Moment_Y_IRH"]) * ratio
-    else:
-        moment_x_fuel_lw = 0.0
-        moment_y_fuel_lw = 0.0
+        moment_x_fuel_tow, moment_y_fuel_tow = fuel_moments_from_tanks(tank_fuel, tables.fuel_model)
+
+    fuel_diagnostics = Diagnostics()
+    moment_x_fuel_lw, moment_y_fuel_lw = landing_fuel_moments(tables.fuel_model, fuel_for_lw, fuel_diagnostics)
+    render_diagnostics(fuel_diagnostics)
 
     st.markdown('<div id="manifest_section"></div>', unsafe_allow_html=True)
     st.subheader("Carga del Manifiesto")
@@ -736,7 +628,7 @@ def weight_balance_calculation():
             df["Weight (KGS)"] = pd.to_numeric(df["Weight (KGS)"], errors="coerce")
             
             df[["Pallet Base Size", "Baseplate Code"]] = df["Number ULD"].apply(lambda x: pd.Series(clasificar_base_refinada(x)))
-            df["Posiciones Sugeridas"] = df.apply(lambda row: sugerencias_final_con_fak(row, restricciones_df, tipo_carga.lower()), axis=1)
+            df["Posiciones Sugeridas"] = sugerencias_batch(df, restricciones_df, tipo_carga.lower())
             df["Posición Asignada"] = ""
             df["X-arm"] = None
             df["Y-arm"] = None
@@ -864,7 +756,7 @@ def weight_balance_calculation():
                 df["Weight (KGS)"] = pd.to_numeric(df["Weight (KGS)"], errors="coerce")
                 
                 df[["Pallet Base Size", "Baseplate Code"]] = df["Number ULD"].apply(lambda x: pd.Series(clasificar_base_refinada(x)))
-                df["Posiciones Sugeridas"] = df.apply(lambda row: sugerencias_final_con_fak(row, restricciones_df, tipo_carga.lower()), axis=1)
+                df["Posiciones Sugeridas"] = sugerencias_batch(df, restricciones_df, tipo_carga.lower())
                 df["Posición Asignada"] = ""
                 df["X-arm"] = None
                 df["Y-arm"] = None
@@ -1045,6 +937,20 @@ def weight_balance_calculation():
         )
 
     with tab2:
+        envelope_margin = None
+        if tables.envelope is not None:
+            envelope_margin = EnvelopeMarginEvaluator(
+                tables.envelope,
+                st.session_state.calculation_state.bow + tables.add_removal.weight,
+                st.session_state.calculation_state.bow_moment_x + tables.add_removal.moment_x,
+                flight_data.fuel_kg,
+                flight_data.taxi_fuel,
+                flight_data.trip_fuel,
+                st.session_state.calculation_state.moment_x_fuel_tow,
+                st.session_state.calculation_state.moment_x_fuel_lw,
+                aircraft_data.lemac,
+                aircraft_data.mac_length
+            )
         automatic_assignment(
             st.session_state.calculation_state.df,
             restricciones_df,
@@ -1064,7 +970,10 @@ def weight_balance_calculation():
             aircraft_data.mac_length,
             cumulative_restrictions_fwd_df,
             cumulative_restrictions_aft_df,
-            tab_prefix="auto"
+            tab_prefix="auto",
+            ldf_limit=aircraft_data.ldf_limit,
+            lda_limit=aircraft_data.lda_limit,
+            envelope_margin=envelope_margin
         )
 
     st.markdown('<div id="desassign_pallets_section"></div>', unsafe_allow_html=True)
@@ -1106,35 +1015,16 @@ def weight_balance_calculation():
         mzfw_used = final_results["mzfw_dynamic"] if tail != "N342AV" else aircraft_data.mzfw
         mzfw_formula = final_results["mzfw_formula"] if tail != "N342AV" else None
 
-        alerts = []
-        if final_results["tow"] > mtow_used:
-            alerts.append(f"TOW ({final_results['tow']:.1f} kg) excede el {'MTOWD' if tail != 'N342AV' else 'MTOW'} ({mtow_used:.1f} kg).")
-        if performance_tow > 0 and final_results["tow"] > performance_tow:
-            alerts.append(f"TOW ({final_results['tow']:.1f} kg) excede el Performance TOW ({performance_tow:.1f} kg).")
-        if final_results["lw"] > aircraft_data.mlw:
-            alerts.append(f"LW ({final_results['lw']:.1f} kg) excede el MLW ({aircraft_data.mlw:.1f} kg).")
-        if performance_lw > 0 and final_results["lw"] > performance_lw:
-            alerts.append(f"LW ({final_results['lw']:.1f} kg) excede el Performance LW ({performance_lw:.1f} kg).")
-        if final_results["zfw_peso"] > mzfw_used:
-            alerts.append(f"ZFW ({final_results['zfw_peso']:.1f} kg) excede el {'MZFWD' if tail != 'N342AV' else 'MZFW'} ({mzfw_used:.1f} kg).")
+        alerts = [diagnostic.message for diagnostic in limit_diagnostics(final_results, aircraft_data, performance_tow, performance_lw)]
 
         complies, validation_df = check_cumulative_weights(df_asignados, cumulative_restrictions_fwd_df, cumulative_restrictions_aft_df)
 
-        ldf_weight = df_asignados[df_asignados["Bodega"] == "LDF"]["Weight (KGS)"].sum() if not df_asignados[df_asignados["Bodega"] == "LDF"].empty else 0.0
-        lda_weight = df_asignados[df_asignados["Bodega"] == "LDA"]["Weight (KGS)"].sum() if not df_asignados[df_asignados["Bodega"] == "LDA"].empty else 0.0
+        ldf_weight, lda_weight = hold_weights(df_asignados)
         ldf_complies = ldf_weight <= aircraft_data.ldf_limit
         lda_complies = lda_weight <= aircraft_data.lda_limit
         complies = complies and ldf_complies and lda_complies
 
-        pallets_imbalance = 0.0
-        if not df_asignados.empty:
-            relevant_pallets = df_asignados[
-                (df_asignados["Bodega"].isin(["MD", "LDA", "LDF"])) &
-                (df_asignados["Y-arm"] != 0)
-            ]
-            left_weight = relevant_pallets[relevant_pallets["Y-arm"] < 0]["Weight (KGS)"].sum()
-            right_weight = relevant_pallets[relevant_pallets["Y-arm"] > 0]["Weight (KGS)"].sum()
-            pallets_imbalance = abs(left_weight - right_weight)
+        pallets_imbalance = pallets_lateral_imbalance(df_asignados)
 
         st.markdown('<div id="validation_section"></div>', unsafe_allow_html=True)
         st.subheader("Validación de Pesos Acumulativos")
@@ -1173,20 +1063,7 @@ def weight_balance_calculation():
 
 
 
-       # Load add_removal.csv to calculate add_removal_weight
-        add_removal_path = os.path.join(aircraft_folder, "add_removal.csv")
-        add_removal_weight = 0.0
-        if os.path.exists(add_removal_path):
-            try:
-                add_removal_df = pd.read_csv(add_removal_path, sep=";", decimal=",")
-                if "Weight" in add_removal_df.columns:
-                    add_removal_weight = pd.to_numeric(add_removal_df["Weight"], errors="coerce").sum()
-                else:
-                    st.warning("El archivo add_removal.csv no contiene la columna 'Weight'.")
-            except Exception as e:
-                st.warning(f"Error al cargar add_removal.csv: {str(e)}")
-        else:
-            st.info("No se encontró add_removal.csv. Se asume peso removido/adicionado de 0 kg.")
+        add_removal_weight = tables.add_removal.weight
 
         # Calculate adjusted_bow
         adjusted_bow = bow + add_removal_weight
@@ -1261,34 +1138,12 @@ def weight_balance_calculation():
         # Envelope Section
         st.markdown('<div id="envelope_section"></div>', unsafe_allow_html=True)
         st.subheader("Envelope")
-        plt_envelope = None
+        envelope_image = None
         temp_results = None
+        fuel_trajectory = None
+        envelope = tables.envelope
+        render_diagnostics([d for d in profile.diagnostics if d.code.startswith("envelope")])
         try:
-            if tail == "N342AV":
-                try:
-                    from N342AV_envelope import plot_cg_envelope
-                except ImportError:
-                    st.error("No se encontró N342AV_envelope.py")
-                    return
-            elif tail == "N337QT":
-                try:
-                    from N337QT_envelope import plot_cg_envelope
-                except ImportError:
-                    st.error("No se encontró N337QT_envelope.py")
-                    return
-            elif tail == "N338QT":
-                try:
-                    from N338QT_envelope import plot_cg_envelope
-                except ImportError:
-                    st.error("No se encontró N338QT_envelope.py")
-                    return
-            else:
-                try:
-                    from A330_200F_envelope import plot_cg_envelope
-                except ImportError:
-                    st.error("No se encontró A330_200F_envelope.py")
-                    return
-
             temp_results = calculate_final_values(
                 df_asignados if not df_asignados.empty else pd.DataFrame(columns=df.columns),
                 st.session_state.calculation_state.bow,
@@ -1319,78 +1174,43 @@ def weight_balance_calculation():
             if missing_keys:
                 st.warning(f"No se puede graficar el envelope. Faltan o son inválidos: {', '.join(missing_keys)}")
             else:
-                # Plot the envelope and get envelope data
-                envelope_data = plot_cg_envelope(
+                # In-flight CG trajectory burning the trip fuel tank by tank
+                fuel_trajectory = simulate_fuel_burn(
+                    tables.fuel_model,
+                    st.session_state.calculation_state.fuel_distribution,
                     temp_results["zfw_peso"],
-                    temp_results["zfw_mac"],
-                    temp_results["tow"],
-                    temp_results["tow_mac"],
-                    temp_results["lw"],
-                    temp_results["lw_mac"]
+                    temp_results["zfw_momento_x"],
+                    flight_data.fuel_kg - flight_data.taxi_fuel,
+                    flight_data.trip_fuel,
+                    aircraft_data.lemac,
+                    aircraft_data.mac_length,
+                    ballast_fuel=st.session_state.get("computed_ballast_fuel", 0.0)
                 )
-                plt_envelope = envelope_data["fig"]
-                st.pyplot(plt_envelope)
-                plt.close(plt_envelope)  # Close the figure to free memory
-
-                # Function to interpolate %MAC limit at a given weight
-                def interpolate_limit(weight, x_vals, y_vals):
-                    if not x_vals or not y_vals:
-                        return None
-                    # Sort points by weight
-                    sorted_points = sorted(zip(y_vals, x_vals), key=lambda x: x[0])
-                    w = [p[0] for p in sorted_points]
-                    m = [p[1] for p in sorted_points]
-                    # Handle out-of-range cases
-                    if weight < w[0]:
-                        return m[0]
-                    if weight > w[-1]:
-                        return m[-1]
-                    # Linear interpolation
-                    for i in range(len(w) - 1):
-                        if w[i] <= weight <= w[i + 1]:
-                            fraction = (weight - w[i]) / (w[i + 1] - w[i])
-                            return m[i] + fraction * (m[i + 1] - m[i])
-                    return m[-1]
-
-                # Validate CG values against envelope limits
-                # ZFW CG (use cruise envelope, as ZFW is typically evaluated in cruise condition)
-                zfw_weight = temp_results["zfw_peso"]
-                zfw_mac_proj = envelope_data["projected_cg"]["zfw"]
-                zfw_limit_fwd = interpolate_limit(zfw_weight, envelope_data["cruise"]["fwd"]["x"], envelope_data["cruise"]["fwd"]["y"])
-                zfw_limit_aft = interpolate_limit(zfw_weight, envelope_data["cruise"]["aft"]["x"], envelope_data["cruise"]["aft"]["y"])
-                if zfw_limit_fwd is not None and zfw_limit_aft is not None:
-                    if zfw_mac_proj < zfw_limit_fwd:
-                        alerts.append(f"ZFW CG ({zfw_mac_proj:.1f}% MAC) está más adelante del límite FWD ({zfw_limit_fwd:.1f}% MAC) en condición de crucero.")
-                    elif zfw_mac_proj > zfw_limit_aft:
-                        alerts.append(f"ZFW CG ({zfw_mac_proj:.1f}% MAC) está más atrás del límite AFT ({zfw_limit_aft:.1f}% MAC) en condición de crucero.")
-                else:
-                    alerts.append("No se pudieron validar los límites de ZFW CG debido a datos de envolvente inválidos.")
-
-                # TOW CG (use takeoff envelope)
-                tow_weight = temp_results["tow"]
-                tow_mac_proj = envelope_data["projected_cg"]["tow"]
-                tow_limit_fwd = interpolate_limit(tow_weight, envelope_data["takeoff"]["fwd"]["x"], envelope_data["takeoff"]["fwd"]["y"])
-                tow_limit_aft = interpolate_limit(tow_weight, envelope_data["takeoff"]["aft"]["x"], envelope_data["takeoff"]["aft"]["y"])
-                if tow_limit_fwd is not None and tow_limit_aft is not None:
-                    if tow_mac_proj < tow_limit_fwd:
-                        alerts.append(f"TOW CG ({tow_mac_proj:.1f}% MAC) está más adelante del límite FWD ({tow_limit_fwd:.1f}% MAC) en condición de despegue.")
-                    elif tow_mac_proj > tow_limit_aft:
-                        alerts.append(f"TOW CG ({tow_mac_proj:.1f}% MAC) está más atrás del límite AFT ({tow_limit_aft:.1f}% MAC) en condición de despegue.")
-                else:
-                    alerts.append("No se pudieron validar los límites de TOW CG debido a datos de envolvente inválidos.")
-
-                # LW CG (use landing envelope)
-                lw_weight = temp_results["lw"]
-                lw_mac_proj = envelope_data["projected_cg"]["lw"]
-                lw_limit_fwd = interpolate_limit(lw_weight, envelope_data["landing"]["fwd"]["x"], envelope_data["landing"]["fwd"]["y"])
-                lw_limit_aft = interpolate_limit(lw_weight, envelope_data["landing"]["aft"]["x"], envelope_data["landing"]["aft"]["y"])
-                if lw_limit_fwd is not None and lw_limit_aft is not None:
-                    if lw_mac_proj < lw_limit_fwd:
-                        alerts.append(f"LW CG ({lw_mac_proj:.1f}% MAC) está más adelante del límite FWD ({lw_limit_fwd:.1f}% MAC) en condición de aterrizaje.")
-                    elif lw_mac_proj > lw_limit_aft:
-                        alerts.append(f"LW CG ({lw_mac_proj:.1f}% MAC) está más atrás del límite AFT ({lw_limit_aft:.1f}% MAC) en condición de aterrizaje.")
-                else:
-                    alerts.append("No se pudieron validar los límites de LW CG debido a datos de envolvente inválidos.")
+
+                if envelope is not None:
+                    flag_trajectory(envelope, fuel_trajectory)
+                    envelope_points = tuple(temp_results[k] for k in required_keys)
+                    envelope_image = get_figure_cache().render(
+                        ("envelope", plan_hash(
+                            df_asignados, tail, envelope_points,
+                            fuel_trajectory[["Peso (kg)", "%MAC"]].to_numpy().tobytes()
+                        )),
+                        lambda: plot_cg_envelope(
+                            envelope,
+                            *envelope_points,
+                            trajectory=fuel_trajectory,
+                            title=f"Envolvente de Centro de Gravedad vs Peso - {tail}"
+                        ),
+                        format="png"
+                    )
+                    st.image(envelope_image.data)
+
+                    # Validate ZFW (cruise), TOW (takeoff) and LW (landing) and the in-flight trajectory
+                    alerts.extend(d.message for d in envelope_diagnostics(envelope, temp_results))
+                    alerts.extend(d.message for d in trajectory_diagnostics(fuel_trajectory, fuel_trajectory["Fuera de crucero"]))
+
+                with st.expander("Trayectoria de CG en vuelo", expanded=False):
+                    st.dataframe(fuel_trajectory.round(1), use_container_width=True)
 
         except Exception as e:
             st.error(f"Error al generar el envelope: {str(e)}")
@@ -1400,96 +1220,62 @@ def weight_balance_calculation():
         st.subheader("Distribución de Pallets")
         st.markdown('<div id="main_deck_distribution_section"></div>', unsafe_allow_html=True)
 
-        # Function to send images and data to Flask server
-        def send_images_to_flask(main_deck_base64, lower_decks_base64, total_carga, tow_cg, lateral_imbalance, pallets_imbalance, zfw_cg, lw_cg):
-            try:
-                response = requests.post(
-                    "http://localhost:5000/update_images",
-                    json={
-                        "main_deck_base64": main_deck_base64,
-                        "lower_decks_base64": lower_decks_base64,
-                        "total_carga": total_carga,
-                        "tow_cg": tow_cg,
-                        "lateral_imbalance": lateral_imbalance,
-                        "pallets_imbalance": pallets_imbalance,
-                        "zfw_cg": zfw_cg,
-                        "lw_cg": lw_cg
-                    },
-                    timeout=90
-                )
-                if response.status_code != 200:
-                    st.warning("No se pudo enviar las imágenes al servidor Flask.")
-            except requests.RequestException as e:
-                st.warning(f"Error al enviar imágenes al servidor Flask: {str(e)}")
-
-        # Generate plots with optimized size
-        st.write("**Main Deck**")
-        main_deck_fig = plot_main_deck(df_asignados, restricciones_df)
-        if main_deck_fig:
-            main_deck_fig.set_size_inches(18, 5)
-            main_deck_img = BytesIO()
-            main_deck_fig.savefig(main_deck_img, format="jpeg", bbox_inches="tight", dpi=100)
-            main_deck_img.seek(0)
-            st.session_state.main_deck_base64 = base64.b64encode(main_deck_img.getvalue()).decode('utf-8')
-            st.pyplot(main_deck_fig)
-            plt.close(main_deck_fig)
-        else:
-            st.session_state.main_deck_base64 = None
-            st.warning("No se pudo generar la gráfica de Main Deck.")
-
-        st.write("**Lower Decks**")
-        lower_decks_fig = plot_lower_decks(df_asignados, restricciones_df)
-        if lower_decks_fig:
-            lower_decks_fig.set_size_inches(18, 5)
-            lower_decks_img = BytesIO()
-            lower_decks_fig.savefig(lower_decks_img, format="jpeg", bbox_inches="tight", dpi=100)
-            lower_decks_img.seek(0)
-            st.session_state.lower_decks_base64 = base64.b64encode(lower_decks_img.getvalue()).decode('utf-8')
-            st.pyplot(lower_decks_fig)
-            plt.close(lower_decks_fig)
-        else:
-            st.session_state.lower_decks_base64 = None
-            st.warning("No se pudo generar la gráfica de Lower Decks.")
+        # Deck images: per-tail static background plus the assigned pallets, reused until the plan changes
+        deck_plan_hash = plan_hash(df_asignados, tail)
 
-        # Send images and data to Flask server immediately the first time
-        if (st.session_state.get('main_deck_base64') or st.session_state.get('lower_decks_base64')) and not st.session_state.get('images_sent', False):
-            total_carga = df_asignados["Weight (KGS)"].sum() if not df_asignados.empty else 0.0
-            send_images_to_flask(
-                st.session_state.get('main_deck_base64'),
-                st.session_state.get('lower_decks_base64'),
-                total_carga,
-                final_results.get("tow_mac", 0.0),
-                final_results.get("lateral_imbalance", 0.0),
-                pallets_imbalance,
-                final_results.get("zfw_mac", 0.0),
-                final_results.get("lw_mac", 0.0)
+        def deck_raster(name, render):
+            return get_figure_cache().render_image(
+                (name, deck_plan_hash), lambda: render(df_asignados, restricciones_df, tail), format="jpeg"
             )
-            st.session_state.images_sent = True
-
-        # Send images and data to Flask server every 3 seconds for updates
-        if st.session_state.get('main_deck_base64') or st.session_state.get('lower_decks_base64'):
-            if 'last_update_time' not in st.session_state:
-                st.session_state.last_update_time = time.time()
-
-            current_time = time.time()
-            if current_time - st.session_state.last_update_time >= 3:
-                total_carga = df_asignados["Weight (KGS)"].sum() if not df_asignados.empty else 0.0
-                send_images_to_flask(
-                    st.session_state.get('main_deck_base64'),
-                    st.session_state.get('lower_decks_base64'),
-                    total_carga,
-                    final_results.get("tow_mac", 0.0),
-                    final_results.get("lateral_imbalance", 0.0),
-                    pallets_imbalance,
-                    final_results.get("zfw_mac", 0.0),
-                    final_results.get("lw_mac", 0.0)
-                )
-                st.session_state.last_update_time = current_time
+
+        def deck_vector(name, render):
+            return get_figure_cache().render_image(
+                (name, deck_plan_hash), lambda: (render(df_asignados, restricciones_df) or "").encode("utf-8") or None, format="svg"
+            )
+
+        deck_mode = st.radio(
+            "Formato de la distribución",
+            ["SVG", "Imagen"],
+            horizontal=True,
+            key="deck_render_mode",
+            help="SVG es más liviano y muestra el detalle de cada pallet al pasar el cursor. La exportación a Excel usa siempre la imagen."
+        )
+        published_decks = {}
+        for name, label, render_raster, render_vector in (
+            ("main_deck", "Main Deck", render_main_deck, render_main_deck_svg),
+            ("lower_decks", "Lower Decks", render_lower_decks, render_lower_decks_svg)
+        ):
+            st.write(f"**{label}**")
+            if deck_mode == "SVG":
+                deck_image = deck_vector(name, render_vector)
+                if deck_image:
+                    st.markdown(deck_image.data.decode("utf-8"), unsafe_allow_html=True)
+            else:
+                deck_image = deck_raster(name, render_raster)
+                if deck_image:
+                    st.image(deck_image.data)
+            if not deck_image:
+                st.warning(f"No se pudo generar la gráfica de {label}.")
+            published_decks[name] = deck_image
+
+        # Publish to the LIR server in the background; unchanged plans are not re-sent
+        if any(published_decks.values()):
+            flight_id = lir_flight_id(tail, flight_data.numero_vuelo, flight_data.fecha_vuelo)
+            lir_error = get_lir_publisher().publish(published_decks, {
+                "total_carga": df_asignados["Weight (KGS)"].sum() if not df_asignados.empty else 0.0,
+                "tow_cg": final_results.get("tow_mac", 0.0),
+                "lateral_imbalance": final_results.get("lateral_imbalance", 0.0),
+                "pallets_imbalance": pallets_imbalance,
+                "zfw_cg": final_results.get("zfw_mac", 0.0),
+                "lw_cg": final_results.get("lw_mac", 0.0)
+            }, flight_id=flight_id)
+            if lir_error:
+                st.warning(lir_error)
 
             st.markdown(
-                """
+                f"""
                 <style>
-                .custom-button {
+                .custom-button {{
                     background-color: #4CAF50;
                     color: white;
                     padding: 10px 20px;
@@ -1500,12 +1286,12 @@ def weight_balance_calculation():
                     text-align: center;
                     display: inline-block;
                     text-decoration: none;
-                }
-                .custom-button:hover {
+                }}
+                .custom-button:hover {{
                     background-color: #45a009;
-                }
+                }}
                 </style>
-                <a href="http://localhost:5000/pallet_distribution" target="_blank" class="custom-button">Ver LIR Paralela</a>
+                <a href="{lir_flight_url(flight_id)}" target="_blank" class="custom-button">Ver LIR Paralela</a>
                 """,
                 unsafe_allow_html=True
             )
@@ -1554,25 +1340,8 @@ def weight_balance_calculation():
                 )
                 st.write("### Envelope")
                 try:
-                    plt.figure(figsize=(8, 6))
-                    if tail == "N342AV":
-                        from N342AV_envelope import plot_cg_envelope
-                    elif tail == "N337QT":
-                        from N337QT_envelope import plot_cg_envelope
-                    elif tail == "N338QT":
-                        from N338QT_envelope import plot_cg_envelope
-                    else:
-                        from A330_200F_envelope import plot_cg_envelope
-                    plot_cg_envelope(
-                        temp_results["zfw_peso"],
-                        temp_results["zfw_mac"],
-                        temp_results["tow"],
-                        temp_results["tow_mac"],
-                        temp_results["lw"],
-                        temp_results["lw_mac"]
-                    )
-                    st.pyplot(plt.gcf())
-                    plt.close()
+                    if envelope_image is not None:
+                        st.image(envelope_image.data)
                 except Exception as e:
                     st.error(f"Error al generar el envelope: {str(e)}")
                 if st.button("Cerrar", key="close_envelope"):
@@ -1707,156 +1476,119 @@ def weight_balance_calculation():
         json_save_path = get_unique_filename(json_path, "json")
         excel_save_path = get_unique_filename(excel_path, "xlsm")
 
+        export_queue = get_export_queue(output_dir)
         if st.button("Exportar Documentos", key="export_documents"):
             if data_to_save is None:
                 st.error("No se pudieron generar los documentos debido a datos insuficientes.")
             else:
-                try:
-                    # Export JSON
-                    json_str = json.dumps(data_to_save, indent=4, ensure_ascii=False, cls=NumpyEncoder)
-                    json_bytes = json_str.encode('utf-8')
-                    with open(json_save_path, "wb") as f:
-                        f.write(json_bytes)
-                    json_buffer = BytesIO(json_bytes)
-
-                    # Export Excel
-                    template_path = os.path.join(script_dir, "templates", "template.xlsm")
-                    if not os.path.exists(template_path):
-                        st.error(f"No se encontró el archivo de plantilla en: {template_path}")
-                        return
-
-                    wb = load_workbook(template_path, keep_vba=True)
-                    ws = wb.active
-
-                    # Fill in the cells
-                    ws['A3'] = flight_data.operador
-                    ws['C3'] = flight_data.numero_vuelo
-                    ws['D3'] = flight_data.fecha_vuelo
-                    ws['E3'] = flight_data.matricula
-                    ws['F3'] = flight_data.ruta_vuelo
-                    ws['H3'] = flight_data.revision
-                    ws['B4'] = aircraft_data.oew
-                    ws['B5'] = st.session_state.get("computed_ballast_fuel", 0.0)
-                    ws['B6'] = add_removal_weight
-                    ws['B7'] = adjusted_bow
-                    ws['B8'] = final_results.get("peso_total", 0.0)
-                    ws['B9'] = mzfw_used
-                    ws['B10'] = fuel_for_tow
-                    ws['B12'] = flight_data.trip_fuel
-                    ws['B13'] = flight_data.taxi_fuel
-                    ws['B15'] = final_results.get("underload", 0.0)
-                    ws['B16'] = final_results.get("mrow", 0.0)
-                    ws['B18'] = final_results.get("zfw_peso", 0.0)
-                    ws['B19'] = final_results.get("tow", 0.0)
-                    ws['B20'] = final_results.get("lw", 0.0)
-                    ws['B21'] = final_results.get("pitch_trim", 0.0)
-                    ws['B23'] = flight_data.passengers_cockpit + 2
-                    ws['B24'] = flight_data.passengers_supernumerary
-                    ws['B36'] = mtow_used
-                    ws['B37'] = flight_data.performance_tow
-                    ws['B40'] = aircraft_data.mlw
-                    ws['B41'] = flight_data.performance_lw
-                    ws['C18'] = final_results.get("zfw_mac", 0.0)
-                    ws['C19'] = final_results.get("tow_mac", 0.0)
-                    ws['C20'] = final_results.get("lw_mac", 0.0)
-
-                    bodega_summary = df_asignados.groupby("Bodega")["Weight (KGS)"].sum().reset_index()
-                    ws['B25'] = bodega_summary[bodega_summary["Bodega"] == "MD"]["Weight (KGS)"].iloc[0] if not bodega_summary[bodega_summary["Bodega"] == "MD"].empty else 0.0
-                    ws['B26'] = bodega_summary[bodega_summary["Bodega"] == "LDF"]["Weight (KGS)"].iloc[0] if not bodega_summary[bodega_summary["Bodega"] == "LDF"].empty else 0.0
-                    ws['B27'] = bodega_summary[bodega_summary["Bodega"] == "LDA"]["Weight (KGS)"].iloc[0] if not bodega_summary[bodega_summary["Bodega"] == "LDA"].empty else 0.0
-                    ws['B28'] = bodega_summary[bodega_summary["Bodega"] == "BULK"]["Weight (KGS)"].iloc[0] if not bodega_summary[bodega_summary["Bodega"] == "BULK"].empty else 0.0
-                    ws['B29'] = final_results.get("lateral_imbalance", 0.0)
-                    ws['E7'] = flight_data.takeoff_runway
-                    ws['E8'] = flight_data.flaps_conf
-                    ws['E9'] = flight_data.anti_ice
-                    ws['E10'] = flight_data.air_condition
-                    ws['E12'] = flight_data.temperature
-                    ws['E13'] = flight_data.qnh
-
-                    # Add User Full Name and License to cells
-                    user_info = f"{full_name} - {user_license}"
-                    ws['C31'] = user_info
-                    ws['C32'] = user_info
-                    ws['N31'] = user_info
-                    ws['N32'] = user_info
-
-                    # Insert images
-                    if plt_envelope:
-                        envelope_img = BytesIO()
-                        plt_envelope.savefig(envelope_img, format="png", bbox_inches="tight", dpi=100)
-                        envelope_img.seek(0)
-                        img = OpenpyxlImage(envelope_img)
-                        img.width = 400
-                        img.height = 400
-                        ws.add_image(img, 'G6')
-                        plt.close(plt_envelope)
-
-                    if st.session_state.get('main_deck_base64'):
-                        main_deck_img = BytesIO(base64.b64decode(st.session_state.main_deck_base64))
-                        img = OpenpyxlImage(main_deck_img)
-                        img.width = 800
-                        img.height = 200
-                        ws.add_image(img, 'M6')
-
-                    if st.session_state.get('lower_decks_base64'):
-                        lower_decks_img = BytesIO(base64.b64decode(st.session_state.lower_decks_base64))
-                        img = OpenpyxlImage(lower_decks_img)
-                        img.width = 800
-                        img.height = 200
-                        ws.add_image(img, 'M21')
-
-                    # Save Excel
-                    wb.save(excel_save_path)
-                    with open(excel_save_path, "rb") as f:
-                        excel_buffer = BytesIO(f.read())
-                    excel_buffer.seek(0)
-
-                    # Provide downloads
-                    col_dl1, col_dl2 = st.columns(2)
-                    with col_dl1:
-                        st.download_button(
-                            label="Descargar JSON",
-                            data=json_buffer,
-                            file_name=os.path.basename(json_save_path),
-                            mime="application/json"
-                        )
-                    with col_dl2:
+                json_bytes = json.dumps(data_to_save, indent=4, ensure_ascii=False, cls=NumpyEncoder).encode('utf-8')
+                bodega_summary = df_asignados.groupby("Bodega")["Weight (KGS)"].sum().reset_index()
+                user_info = f"{full_name} - {user_license}"
+                cells = {
+                    "A3": flight_data.operador,
+                    "C3": flight_data.numero_vuelo,
+                    "D3": flight_data.fecha_vuelo,
+                    "E3": flight_data.matricula,
+                    "F3": flight_data.ruta_vuelo,
+                    "H3": flight_data.revision,
+                    "B4": aircraft_data.oew,
+                    "B5": st.session_state.get("computed_ballast_fuel", 0.0),
+                    "B6": add_removal_weight,
+                    "B7": adjusted_bow,
+                    "B8": final_results.get("peso_total", 0.0),
+                    "B9": mzfw_used,
+                    "B10": fuel_for_tow,
+                    "B12": flight_data.trip_fuel,
+                    "B13": flight_data.taxi_fuel,
+                    "B15": final_results.get("underload", 0.0),
+                    "B16": final_results.get("mrow", 0.0),
+                    "B18": final_results.get("zfw_peso", 0.0),
+                    "B19": final_results.get("tow", 0.0),
+                    "B20": final_results.get("lw", 0.0),
+                    "B21": final_results.get("pitch_trim", 0.0),
+                    "B23": flight_data.passengers_cockpit + 2,
+                    "B24": flight_data.passengers_supernumerary,
+                    "B36": mtow_used,
+                    "B37": flight_data.performance_tow,
+                    "B40": aircraft_data.mlw,
+                    "B41": flight_data.performance_lw,
+                    "C18": final_results.get("zfw_mac", 0.0),
+                    "C19": final_results.get("tow_mac", 0.0),
+                    "C20": final_results.get("lw_mac", 0.0),
+                    "B25": bodega_summary[bodega_summary["Bodega"] == "MD"]["Weight (KGS)"].iloc[0] if not bodega_summary[bodega_summary["Bodega"] == "MD"].empty else 0.0,
+                    "B26": bodega_summary[bodega_summary["Bodega"] == "LDF"]["Weight (KGS)"].iloc[0] if not bodega_summary[bodega_summary["Bodega"] == "LDF"].empty else 0.0,
+                    "B27": bodega_summary[bodega_summary["Bodega"] == "LDA"]["Weight (KGS)"].iloc[0] if not bodega_summary[bodega_summary["Bodega"] == "LDA"].empty else 0.0,
+                    "B28": bodega_summary[bodega_summary["Bodega"] == "BULK"]["Weight (KGS)"].iloc[0] if not bodega_summary[bodega_summary["Bodega"] == "BULK"].empty else 0.0,
+                    "B29": final_results.get("lateral_imbalance", 0.0),
+                    "E7": flight_data.takeoff_runway,
+                    "E8": flight_data.flaps_conf,
+                    "E9": flight_data.anti_ice,
+                    "E10": flight_data.air_condition,
+                    "E12": flight_data.temperature,
+                    "E13": flight_data.qnh,
+                    "C31": user_info,
+                    "C32": user_info,
+                    "N31": user_info,
+                    "N32": user_info
+                }
+                images = [
+                    ("G6", lambda: envelope_image, 400, 400),
+                    ("M6", lambda: deck_raster("main_deck", render_main_deck), 800, 200),
+                    ("M21", lambda: deck_raster("lower_decks", render_lower_decks), 800, 200)
+                ]
+                template_path = os.path.join(script_dir, "templates", "template.xlsm")
+
+                def export_task(report):
+                    files = export_documents(report, json_bytes, json_save_path, excel_save_path, template_path, cells, images)
+                    # Keep the calculation history index in step with Output
+                    get_history_index().add_export(files["json"], json.loads(json_bytes), files.get("excel"), files.get("pdf"))
+                    return files
+
+                # Same plan revision -> same job: re-exports reuse the documents already generated
+                export_job, _ = export_queue.submit(export_job_id(json_bytes, cells), export_task)
+                st.session_state.export_job_id = export_job.job_id
+
+        def show_export_job(export_job):
+            if export_job.status == JOB_FAILED:
+                st.error(f"Error al generar los documentos: {export_job.error}")
+                return
+            if export_job.status != JOB_DONE:
+                st.progress(export_job.progress, text=f"Exportación {export_job.job_id}: {export_job.message}")
+                return
+            st.success("Documentos generados.")
+            for warning in export_job.warnings:
+                st.warning(warning)
+            downloads = [
+                ("json", "Descargar JSON", "application/json"),
+                ("excel", "Descargar Excel", "application/vnd.ms-excel.sheet.macroEnabled.12"),
+                ("pdf", "Descargar PDF", "application/pdf")
+            ]
+            downloads = [item for item in downloads if os.path.exists(export_job.files.get(item[0], ""))]
+            for col, (kind, label, mime) in zip(st.columns(len(downloads) or 1), downloads):
+                with col:
+                    with open(export_job.files[kind], "rb") as f:
                         st.download_button(
-                            label="Descargar Excel",
-                            data=excel_buffer,
-                            file_name=os.path.basename(excel_save_path),
-                            mime="application/vnd.ms-excel.sheet.macroEnabled.12"
+                            label=label,
+                            data=f.read(),
+                            file_name=os.path.basename(export_job.files[kind]),
+                            mime=mime,
+                            key=f"download_{kind}_{export_job.job_id}"
                         )
-                    import win32com.client as win32
-                    pythoncom.CoInitialize()
 
-                    # Crear ruta para el PDF reemplazando .xlsm por .pdf
-                    pdf_save_path = excel_save_path.replace(".xlsm", ".pdf")
-
-                    # Iniciar Excel
-                    excel = win32.gencache.EnsureDispatch("Excel.Application")
-                    excel.Visible = False  # No mostrar ventana de Excel
-                    
-
-                    # Abrir el archivo recién guardado
-                    libro = excel.Workbooks.Open(excel_save_path)
-
-                    # Seleccionar la hoja que deseas exportar (por índice o nombre)
-                    hoja = libro.Sheets(1)  # Cambia a otro índice si deseas otra hoja
-
-                    # Exportar a PDF
-                    hoja.ExportAsFixedFormat(0, pdf_save_path)
-
-                    # Cerrar el libro sin guardar cambios
-                    libro.Close(SaveChanges=False)
-                    excel.Quit()
-
-                    
-                    st.success(f"Documentos generados.")
-
-                                   
-                except Exception as e:
-                    st.error(f"Error al generar los documentos: {str(e)}")
-        else:
+        export_job = export_queue.get(st.session_state["export_job_id"]) if st.session_state.get("export_job_id") else None
+        if export_job is None:
             st.warning("Presiona boton para exportar.")
+        elif not export_job.finished and hasattr(st, "fragment"):
+            # While the job runs only this block is refreshed (st.fragment, Streamlit >= 1.37)
+            @st.fragment(run_every=1)
+            def export_job_progress():
+                if export_job.finished:
+                    st.rerun()
+                show_export_job(export_job)
+
+            export_job_progress()
+        else:
+            show_export_job(export_job)
+            if not export_job.finished and st.button("Actualizar estado", key="refresh_export_job"):
+                st.rerun()
         
@@ -0,0 +1,286 @@
+"""
+Plantilla `template.xlsm` precargada para exportar sin abrirla con openpyxl en cada exportación.
+
+El archivo se lee una sola vez por proceso (se recarga si cambia en disco) y se guarda como las
+partes del zip ya descomprimidas. Para cada exportación solo se regeneran la hoja (las celdas
+escritas se reemplazan en el XML, sin parsear ni serializar el resto del libro), el dibujo y sus
+relaciones con las imágenes nuevas; las demás partes (estilos, macros, tema, etc.) se copian tal
+cual al nuevo archivo.
+"""
+import math
+import os
+import posixpath
+import re
+import threading
+import zipfile
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+IMAGE_REL_TYPE = f"{REL_NS}/image"
+DRAWING_REL_TYPE = f"{REL_NS}/drawing"
+EMU_PER_PIXEL = 9525
+IMAGE_CONTENT_TYPES = {"jpeg": "image/jpeg", "png": "image/png"}
+
+_ROW_RE = re.compile(r'<row r="(\d+)"[^>]*?(?:/>|>.*?</row>)', re.S)
+_CELL_RE = re.compile(r'<c r="([A-Z]+)(\d+)"([^>]*?)(?:/>|>.*?</c>)', re.S)
+_STYLE_RE = re.compile(r'\ss="(\d+)"')
+_RELATIONSHIP_RE = re.compile(r'<Relationship [^>]*?Id="([^"]+)"[^>]*?/>')
+
+
+def column_index(column):
+    """Índice (1 = A) de la columna de una celda."""
+    index = 0
+    for char in column:
+        index = index * 26 + ord(char) - 64
+    return index
+
+
+def split_cell(cell):
+    match = re.match(r"^([A-Z]+)(\d+)$", cell)
+    if not match:
+        raise ValueError(f"Celda inválida: {cell}")
+    return match.group(1), int(match.group(2))
+
+
+def cell_xml(cell, value, style=None):
+    """
+    XML de una celda con su valor: número, booleano o texto (en línea, sin tocar sharedStrings).
+
+    Args:
+        cell (str): Referencia, p. ej. "B4".
+        value: Valor a escribir; None deja la celda vacía.
+        style (str, optional): Índice de estilo (`s`) de la celda en la plantilla.
+    """
+    style_attr = f' s="{style}"' if style is not None else ""
+    if value is None:
+        return f'<c r="{cell}"{style_attr}/>'
+    if isinstance(value, bool):
+        return f'<c r="{cell}"{style_attr} t="b"><v>{int(value)}</v></c>'
+    try:
+        number = float(value) if not isinstance(value, str) else None
+    except (TypeError, ValueError):
+        number = None
+    if number is not None and math.isfinite(number):
+        return f'<c r="{cell}"{style_attr}><v>{repr(number) if not number.is_integer() else int(number)}</v></c>'
+    return f'<c r="{cell}"{style_attr} t="inlineStr"><is><t xml:space="preserve">{escape(str(value))}</t></is></c>'
+
+
+def patch_row(row_xml, row, cells):
+    """Reemplaza o inserta (en orden de columna) las celdas de una fila."""
+    start = row_xml.index(">") + 1
+    if row_xml.endswith("/>"):
+        open_tag, body = row_xml[:-2] + ">", ""
+    else:
+        open_tag, body = row_xml[:start], row_xml[start:-len("</row>")]
+    # `spans` es solo una pista de las columnas usadas; se quita porque pueden agregarse celdas
+    open_tag = re.sub(r'\sspans="[^"]*"', "", open_tag)
+    existing = [(column_index(m.group(1)), m.group(1), m.group(0), m.group(3)) for m in _CELL_RE.finditer(body)]
+    new_cells = {}
+    for column, value in cells.items():
+        new_cells[column_index(column)] = (column, value)
+    parts = []
+    for index, column, xml, attrs in existing:
+        if index in new_cells:
+            style = _STYLE_RE.search(attrs)
+            new_column, value = new_cells.pop(index)
+            parts.append((index, cell_xml(f"{new_column}{row}", value, style.group(1) if style else None)))
+        else:
+            parts.append((index, xml))
+    parts.extend((index, cell_xml(f"{column}{row}", value)) for index, (column, value) in new_cells.items())
+    parts.sort(key=lambda part: part[0])
+    return open_tag + "".join(xml for _, xml in parts) + "</row>"
+
+
+def patch_sheet(sheet_xml, cells):
+    """
+    Escribe `cells` en el XML de la hoja modificando solo las filas afectadas.
+
+    Args:
+        sheet_xml (str): XML de la hoja de la plantilla.
+        cells (dict): Celda -> valor.
+
+    Returns:
+        str: XML de la hoja con los valores.
+    """
+    by_row = {}
+    for cell, value in cells.items():
+        column, row = split_cell(cell)
+        by_row.setdefault(row, {})[column] = value
+
+    rows = {int(m.group(1)): m for m in _ROW_RE.finditer(sheet_xml)}
+    pieces = []
+    position = sheet_xml.index("<sheetData>") + len("<sheetData>") if "<sheetData>" in sheet_xml else None
+    if position is None:
+        # Hoja sin datos (<sheetData/>)
+        sheet_xml = sheet_xml.replace("<sheetData/>", "<sheetData></sheetData>", 1)
+        position = sheet_xml.index("<sheetData>") + len("<sheetData>")
+    end = sheet_xml.index("</sheetData>")
+    last = position
+    pieces.append(sheet_xml[:position])
+    pending = sorted(row for row in by_row if row not in rows)
+    for row, match in sorted(rows.items()):
+        while pending and pending[0] < row:
+            new_row = pending.pop(0)
+            pieces.append(patch_row(f'<row r="{new_row}"/>', new_row, by_row[new_row]))
+        pieces.append(sheet_xml[last:match.start()])
+        pieces.append(patch_row(match.group(0), row, by_row[row]) if row in by_row else match.group(0))
+        last = match.end()
+    pieces.append(sheet_xml[last:end])
+    for new_row in pending:
+        pieces.append(patch_row(f'<row r="{new_row}"/>', new_row, by_row[new_row]))
+    pieces.append(sheet_xml[end:])
+    return "".join(pieces)
+
+
+def _resolve(base_part, target):
+    return posixpath.normpath(posixpath.join(posixpath.dirname(base_part), target))
+
+
+def _rels_path(part):
+    return posixpath.join(posixpath.dirname(part), "_rels", posixpath.basename(part) + ".rels")
+
+
+class XlsmTemplate:
+    """
+    Partes de una plantilla .xlsm en memoria, listas para generar libros con otras celdas e imágenes.
+
+    Args:
+        path (str): Ruta de la plantilla.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.mtime = os.path.getmtime(path)
+        with zipfile.ZipFile(path) as archive:
+            self.infos = archive.infolist()
+            self.parts = {info.filename: archive.read(info.filename) for info in self.infos}
+        self.sheet_path = self._first_sheet()
+        self.sheet_xml = self.parts[self.sheet_path].decode("utf-8")
+        self.drawing_path = self._sheet_drawing()
+
+    def _first_sheet(self):
+        workbook = self.parts["xl/workbook.xml"].decode("utf-8")
+        sheet_rid = re.search(r'<sheet [^>]*?r:id="([^"]+)"', workbook).group(1)
+        rels = self.parts["xl/_rels/workbook.xml.rels"].decode("utf-8")
+        target = re.search(rf'<Relationship [^>]*?Id="{sheet_rid}"[^>]*?/>', rels).group(0)
+        return _resolve("xl/workbook.xml", re.search(r'Target="([^"]+)"', target).group(1).lstrip("/"))
+
+    def _sheet_drawing(self):
+        rels = self.parts.get(_rels_path(self.sheet_path), b"").decode("utf-8")
+        for match in _RELATIONSHIP_RE.finditer(rels):
+            if f'Type="{DRAWING_REL_TYPE}"' in match.group(0):
+                return _resolve(self.sheet_path, re.search(r'Target="([^"]+)"', match.group(0)).group(1))
+        return None
+
+    @property
+    def supports_images(self):
+        """True si la hoja ya tiene un dibujo al que agregar las imágenes."""
+        return self.drawing_path is not None
+
+    def _image_parts(self, images):
+        """Partes del dibujo, sus relaciones y los archivos de imagen nuevos."""
+        drawing = self.parts[self.drawing_path].decode("utf-8")
+        drawing_rels_path = _rels_path(self.drawing_path)
+        rels = self.parts.get(drawing_rels_path, b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                              b'<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships"></Relationships>').decode("utf-8")
+        rel_ids = {int(rid[3:]) for rid in _RELATIONSHIP_RE.findall(rels) if rid.startswith("rId") and rid[3:].isdigit()}
+        shape_ids = [int(i) for i in re.findall(r'<xdr:cNvPr id="(\d+)"', drawing)]
+        next_rel, next_shape = max(rel_ids, default=0) + 1, max(shape_ids, default=1) + 1
+
+        media, anchors, relationships = {}, [], []
+        for i, (anchor, rendered, width, height) in enumerate(images):
+            if not rendered:
+                continue
+            column, row = split_cell(anchor)
+            rid = f"rId{next_rel}"
+            media_name = f"xl/media/export_image{i + 1}.{rendered.format}"
+            media[media_name] = rendered.data
+            relationships.append(
+                f'<Relationship Id="{rid}" Type="{IMAGE_REL_TYPE}" Target="{posixpath.relpath(media_name, posixpath.dirname(self.drawing_path))}"/>'
+            )
+            anchors.append(
+                f'<xdr:oneCellAnchor><xdr:from><xdr:col>{column_index(column) - 1}</xdr:col><xdr:colOff>0</xdr:colOff>'
+                f'<xdr:row>{row - 1}</xdr:row><xdr:rowOff>0</xdr:rowOff></xdr:from>'
+                f'<xdr:ext cx="{int(width * EMU_PER_PIXEL)}" cy="{int(height * EMU_PER_PIXEL)}"/>'
+                f'<xdr:pic><xdr:nvPicPr><xdr:cNvPr id="{next_shape}" name="Imagen {next_shape}"/>'
+                f'<xdr:cNvPicPr><a:picLocks noChangeAspect="1"/></xdr:cNvPicPr></xdr:nvPicPr>'
+                f'<xdr:blipFill><a:blip xmlns:r="{REL_NS}" r:embed="{rid}"/><a:stretch><a:fillRect/></a:stretch></xdr:blipFill>'
+                f'<xdr:spPr><a:prstGeom prst="rect"><a:avLst/></a:prstGeom></xdr:spPr></xdr:pic>'
+                f'<xdr:clientData/></xdr:oneCellAnchor>'
+            )
+            next_rel += 1
+            next_shape += 1
+
+        parts = dict(media)
+        parts[self.drawing_path] = drawing.replace("</xdr:wsDr>", "".join(anchors) + "</xdr:wsDr>").encode("utf-8")
+        parts[drawing_rels_path] = rels.replace("</Relationships>", "".join(relationships) + "</Relationships>").encode("utf-8")
+
+        content_types = self.parts["[Content_Types].xml"].decode("utf-8")
+        for extension in sorted({name.rsplit(".", 1)[1] for name in media}):
+            if f'Extension="{extension}"' not in content_types:
+                content_types = content_types.replace(
+                    "<Override ", f'<Default Extension="{extension}" ContentType="{IMAGE_CONTENT_TYPES.get(extension, "application/octet-stream")}"/><Override ', 1
+                )
+        parts["[Content_Types].xml"] = content_types.encode("utf-8")
+        return parts
+
+    def render(self, cells, images=()):
+        """
+        Libro .xlsm con las celdas e imágenes.
+
+        Args:
+            cells (dict): Celda -> valor de la hoja activa.
+            images (iterable): (celda de anclaje, RenderedFigure o None, ancho px, alto px).
+
+        Returns:
+            bytes: Contenido del archivo .xlsm.
+        """
+        images = list(images)
+        if any(rendered for _, rendered, _, _ in images) and not self.supports_images:
+            raise ValueError("La plantilla no tiene un dibujo en la hoja para insertar imágenes.")
+        changed = {self.sheet_path: patch_sheet(self.sheet_xml, cells).encode("utf-8")}
+        # Que Excel recalcule las fórmulas de la plantilla al abrir (máximos TOW y LW)
+        workbook = self.parts["xl/workbook.xml"].decode("utf-8")
+        if "fullCalcOnLoad" not in workbook:
+            workbook = re.sub(r"<calcPr\b", '<calcPr fullCalcOnLoad="1"', workbook, count=1)
+        changed["xl/workbook.xml"] = workbook.encode("utf-8")
+        if any(rendered for _, rendered, _, _ in images):
+            changed.update(self._image_parts(images))
+
+        buffer = BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            for info in self.infos:
+                archive.writestr(info, changed.pop(info.filename, self.parts[info.filename]), compress_type=info.compress_type)
+            for name, data in changed.items():
+                archive.writestr(name, data, compress_type=zipfile.ZIP_STORED if name.startswith("xl/media/") else zipfile.ZIP_DEFLATED)
+        return buffer.getvalue()
+
+    def save(self, path, cells, images=()):
+        """Guarda en `path` el libro de `render`."""
+        data = self.render(cells, images)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+def get_xlsm_template(path):
+    """
+    Plantilla precargada del proceso; se vuelve a leer si el archivo cambió en disco.
+
+    Args:
+        path (str): Ruta de la plantilla .xlsm.
+
+    Returns:
+        XlsmTemplate
+    """
+    path = os.path.abspath(path)
+    with _templates_lock:
+        template = _templates.get(path)
+        if template is None or template.mtime != os.path.getmtime(path):
+            template = _templates[path] = XlsmTemplate(path)
+        return template